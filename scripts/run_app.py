@@ -36,8 +36,15 @@ def main():
     print(f"ETL pipeline running in {os.getenv('ENV')} environment!")
 
     try:
+        dtype_backend = os.getenv("DTYPE_BACKEND", "numpy_nullable")
+
         logger.info("Starting extraction phase")
-        extracted_data = extract_data()
+        extracted_data = extract_data(
+            projected=True,
+            workers=int(os.getenv("EXTRACT_WORKERS", "1")),
+            use_cache=os.getenv("EXTRACT_CACHE", "false").lower() == "true",
+            dtype_backend=dtype_backend
+        )
         logger.info("Data extraction phase completed")
 
         # Proof of extraction
@@ -54,7 +61,10 @@ def main():
         # Transformation phase
         logger.info("Beginning data transformation phase")
         transformed_data = transform_data(
-            extracted_data['detailed_listings_data']
+            extracted_data['detailed_listings_data'],
+            calendar=extracted_data.get('calendar'),
+            reviews=extracted_data.get('reviews'),
+            dtype_backend=dtype_backend
         )
 
         output_dir = Path("data/processed")
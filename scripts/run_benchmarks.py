@@ -0,0 +1,647 @@
+import os
+import math
+import sys
+import timeit
+import tracemalloc
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from src.extract.extract_reviews import iter_review_batches
+from src.extract.extract_listings import read_listings_file
+from src.transform.review_sentiment import load_lexicon, review_sentiment
+from src.transform.clean_listings import (
+    clean_listings,
+    parse_bool_column,
+    convert_numeric_columns,
+)
+from src.transform.transform_listings import (
+    transform_listings,
+    impute_minimum_beds,
+    impute_bathrooms,
+    impute_group_statistic,
+)
+from src.transform.amenity_bitset import encode_amenities, has_amenities
+from src.transform.amenity_index import build_amenity_index, query_listings
+from src.transform.amenity_uplift import amenity_uplift
+from src.transform.listing_aggregates import (
+    DIMENSIONS,
+    GROUPING_SETS,
+    METRICS,
+    cube,
+    grouping_sets_aggregate,
+)
+from src.transform.quantile_sketch import sketch_chunks, sketch_quantiles
+from src.utils.dtype_utils import backend_dtype
+from src.utils.memory_utils import copy_on_write, frame_memory_mb
+
+
+# Writes a reviews.csv with random comments built from lexicon words and
+# filler words, so every run scores the same kind of text.
+def make_reviews_file(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(
+        list(load_lexicon().index)
+        + ["the", "flat", "host", "was", "very", "stay", "place", "not"] * 10
+    )
+    words = rng.choice(vocabulary, size=(rows, 20))
+
+    pd.DataFrame({
+        "listing_id": rng.integers(1, rows // 50 + 2, size=rows),
+        "id": np.arange(rows),
+        "date": "2024-01-01",
+        "comments": [" ".join(review) for review in words],
+    }).to_csv(path, index=False)
+
+
+# Scores the same file with an increasing number of worker processes
+# and reports reviews processed per second.
+def benchmark_review_sentiment(rows=1_000_000, max_workers=None):
+    max_workers = max_workers or os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reviews = Path(tmp_dir) / "reviews.csv"
+        make_reviews_file(reviews, rows)
+
+        results = []
+        for workers in sorted({1, 2, 4, max_workers}):
+            if workers > max_workers:
+                continue
+
+            start_time = timeit.default_timer()
+            review_sentiment(iter_review_batches(reviews), workers=workers)
+            elapsed = timeit.default_timer() - start_time
+
+            results.append({
+                "workers": workers,
+                "seconds": round(elapsed, 2),
+                "reviews_per_second": round(rows / elapsed),
+            })
+
+    results = pd.DataFrame(results)
+    results["speedup"] = (
+        results["reviews_per_second"] / results["reviews_per_second"].iloc[0]
+    ).round(2)
+
+    return results
+
+
+# Compares the memory of the text columns and the time of the amenities
+# clean up under the python-backed and the Arrow-backed string dtype.
+def benchmark_dtype_backends(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    amenities = np.array(["Wifi", "Kitchen", "Washer", "Heating", "TV",
+                          "Hair dryer", "Smoke alarm", "Self check-in"])
+    columns = {
+        "amenities": [
+            str(list(rng.choice(amenities, size=rng.integers(1, 8))))
+            for _ in range(rows)
+        ],
+        "property_type": rng.choice(
+            ["Entire rental unit", "Private room in home", "Entire condo"],
+            size=rows),
+        "host_response_time": rng.choice(
+            ["within an hour", "within a day", "a few days or more"],
+            size=rows),
+    }
+
+    results = []
+    for dtype_backend in ["numpy_nullable", "pyarrow"]:
+        frame = pd.DataFrame(columns).astype(
+            backend_dtype("string", dtype_backend))
+
+        start_time = timeit.default_timer()
+        frame["amenities"].str.replace(r"[\[\]\"']", "", regex=True)
+        replace_time = timeit.default_timer() - start_time
+
+        memory = frame.memory_usage(deep=True, index=False) / 1024 ** 2
+        results.append({
+            "dtype_backend": dtype_backend,
+            **{f"{col}_mb": round(mb, 1) for col, mb in memory.items()},
+            "str_replace_seconds": round(replace_time, 2),
+        })
+
+    return pd.DataFrame(results)
+
+
+# The per row apply convert_superhost_to_bool used before parse_bool_column
+def legacy_parse_bool(series):
+    return series.apply(
+        lambda x: True if str(x).strip().lower() in ["t", "true", "yes", "y"]
+        else False if str(x).strip().lower() in ["f", "false", "no", "n"]
+        else pd.NA
+    ).astype("boolean")
+
+
+# Parses the same flag column with the old apply and with parse_bool_column
+# and reports rows parsed per second.
+def benchmark_bool_parsing(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    flags = pd.Series(
+        rng.choice(["t", "f", "t", "f", "True", "no", ""], size=rows)
+    ).replace("", None)
+
+    results = []
+    for name, parse in [("apply", legacy_parse_bool),
+                        ("parse_bool_column", parse_bool_column)]:
+        start_time = timeit.default_timer()
+        parse(flags)
+        elapsed = timeit.default_timer() - start_time
+
+        results.append({
+            "parser": name,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed),
+        })
+
+    results = pd.DataFrame(results)
+    results["speedup"] = (
+        results["rows_per_second"] / results["rows_per_second"].iloc[0]
+    ).round(1)
+
+    return results
+
+
+# The cast, replace, cast, cast chains convert_numeric_columns replaced
+def legacy_parse_numbers(df):
+    df["price"] = pd.to_numeric(
+        df["price"].astype("string").str.replace(r"[^\d.]", "", regex=True),
+        errors="coerce").astype("Int64")
+    for col in ["host_response_rate", "host_acceptance_rate"]:
+        df[col] = (
+            df[col].astype("string").str.replace("%", "", regex=False)
+            .replace("", np.nan).astype("float64").astype("Int64")
+        )
+    for col in ["beds", "bedrooms"]:
+        df[col] = (
+            df[col].astype("string").replace("", np.nan)
+            .astype("float64").astype("Int64")
+        )
+
+    return df
+
+
+# Parses the price, rate and bed columns with the old chains and with the fused
+# stage, and reports the time and the peak memory allocated while parsing.
+def benchmark_numeric_parsing(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(20, 5000, size=rows)
+    columns = {
+        "price": [f"${price:,}.00" for price in prices],
+        "host_response_rate": rng.choice(
+            [f"{rate}%" for rate in range(101)] + [""], size=rows),
+        "host_acceptance_rate": rng.choice(
+            [f"{rate}%" for rate in range(101)] + [""], size=rows),
+        "beds": rng.choice(["1", "2", "3", "4", ""], size=rows),
+        "bedrooms": rng.choice(["1", "2", "3", ""], size=rows),
+    }
+
+    results = []
+    for name, parse in [("chained casts", legacy_parse_numbers),
+                        ("convert_numeric_columns", convert_numeric_columns)]:
+        frame = pd.DataFrame(columns).astype("string")
+        start_time = timeit.default_timer()
+        parse(frame.copy())
+        elapsed = timeit.default_timer() - start_time
+
+        # Measured separately, tracing every allocation slows the parsing down
+        tracemalloc.start()
+        parse(frame)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results.append({
+            "parser": name,
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(rows / elapsed),
+            "peak_mb": round(peak / 1024 ** 2, 1),
+            # One Int64 column (values and mask), the least any parser
+            # allocates
+            "result_mb": round(frame["price"].array.nbytes / 1024 ** 2, 1),
+        })
+
+    return pd.DataFrame(results)
+
+
+# Cleans and transforms the full raw listings (every column, as the copies
+# used to duplicate) with and without copy-on-write, and reports the peak
+# memory allocated by each stage.
+def benchmark_copy_free(file_path):
+    raw = read_listings_file(Path(file_path), projected=False)
+
+    results = []
+    for copy_free in [False, True]:
+        with copy_on_write(copy_free):
+            tracemalloc.start()
+            cleaned = clean_listings(raw, vocabulary={}, copy=not copy_free)
+            clean_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+
+            transform_listings(cleaned, copy=not copy_free)
+            transform_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        results.append({
+            "copy_free": copy_free,
+            "raw_mb": round(frame_memory_mb(raw), 1),
+            "clean_peak_mb": round(clean_peak / 1024 ** 2, 1),
+            "transform_peak_mb": round(transform_peak / 1024 ** 2, 1),
+        })
+
+    return pd.DataFrame(results)
+
+
+# The row-wise version impute_minimum_beds used before it was vectorised
+def legacy_impute_minimum_beds(df):
+    df = df.rename(columns={"beds": "minimum_beds"})
+    df["was_beds_imputed"] = df["minimum_beds"].isna()
+    df["minimum_beds"] = df.apply(
+        lambda row: row["bedrooms"]
+        if (pd.isna(row["minimum_beds"]) and not pd.isna(row["bedrooms"]))
+        else row["minimum_beds"],
+        axis=1
+    )
+    df["minimum_beds"] = df[["minimum_beds", "bedrooms"]].max(axis=1)
+    df["minimum_beds"] = pd.to_numeric(
+        df["minimum_beds"], errors="coerce").astype("Int64")
+
+    return df
+
+
+# Times the row-wise and the vectorised bed imputation at each size
+def benchmark_impute_minimum_beds(sizes=(100_000, 1_000_000), seed=0):
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for rows in sizes:
+        beds = rng.integers(0, 8, size=rows).astype("float64")
+        beds[rng.random(rows) < 0.1] = np.nan
+        frame = pd.DataFrame({
+            "beds": pd.array(beds).astype("Int64"),
+            "bedrooms": pd.array(rng.integers(1, 6, size=rows), dtype="Int64"),
+        })
+
+        for name, impute in [("apply", legacy_impute_minimum_beds),
+                             ("impute_minimum_beds", impute_minimum_beds)]:
+            start_time = timeit.default_timer()
+            impute(frame.copy())
+            elapsed = timeit.default_timer() - start_time
+
+            results.append({
+                "rows": rows,
+                "implementation": name,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows / elapsed),
+            })
+
+    return pd.DataFrame(results)
+
+
+# The row-wise version impute_bathrooms used before estimate_bathrooms
+def legacy_impute_bathrooms(df):
+    df["was_bathrooms_imputed"] = df["bathrooms"].isna()
+
+    def estimate_bathrooms(bedrooms):
+        if pd.isna(bedrooms):
+            return None
+        if bedrooms <= 2:
+            return 1
+        if bedrooms == 3:
+            return 2
+        return math.ceil((bedrooms / 3) * 2)
+
+    df["bathrooms"] = df.apply(
+        lambda row: estimate_bathrooms(row["bedrooms"])
+        if pd.isna(row["bathrooms"])
+        else row["bathrooms"],
+        axis=1
+    )
+
+    return df
+
+
+# Times the row-wise and the vectorised bathroom imputation
+def benchmark_impute_bathrooms(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    bathrooms = rng.choice([1.0, 1.5, 2.0, 3.0], size=rows)
+    bathrooms[rng.random(rows) < 0.2] = np.nan
+    frame = pd.DataFrame({
+        "bathrooms": bathrooms,
+        "bedrooms": pd.array(rng.integers(0, 8, size=rows), dtype="Int64"),
+    })
+
+    results = []
+    for name, impute in [("apply", legacy_impute_bathrooms),
+                         ("impute_bathrooms", impute_bathrooms)]:
+        start_time = timeit.default_timer()
+        impute(frame.copy())
+        elapsed = timeit.default_timer() - start_time
+
+        results.append({
+            "implementation": name,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed),
+        })
+
+    return pd.DataFrame(results)
+
+
+# Fills missing prices with the group median through the per-group lambda
+# impute_price_column used before and through impute_group_statistic, with
+# more groups the more neighbourhoods and property types there are.
+def benchmark_group_imputation(rows=1_000_000, groups=(1_000, 10_000), seed=0):
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for group_count in groups:
+        price = rng.integers(20, 2500, size=rows).astype("float64")
+        price[rng.random(rows) < 0.1] = np.nan
+        frame = pd.DataFrame({
+            "neighbourhood_cleansed": rng.integers(
+                0, group_count // 10, size=rows),
+            "property_type": rng.integers(0, 10, size=rows),
+            "price": price,
+        })
+        by = ["neighbourhood_cleansed", "property_type"]
+
+        def lambda_transform(df):
+            df["price"] = df.groupby(by)["price"].transform(
+                lambda x: x.fillna(x.median()))
+
+        for name, impute in [
+            ("lambda", lambda_transform),
+            ("impute_group_statistic",
+             lambda df: impute_group_statistic(df, "price", by)),
+        ]:
+            start_time = timeit.default_timer()
+            impute(frame.copy())
+            elapsed = timeit.default_timer() - start_time
+
+            results.append({
+                "groups": group_count,
+                "implementation": name,
+                "seconds": round(elapsed, 3),
+            })
+
+    return pd.DataFrame(results)
+
+
+# Compares the amenities as python lists with the packed bitset: memory, and
+# the time to find the listings that have two given amenities.
+def benchmark_amenity_bitset(rows=1_000_000, vocabulary_size=100, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(
+        [f"Amenity {number}" for number in range(vocabulary_size)])
+    amenities = pd.Series([
+        list(rng.choice(vocabulary, size=size, replace=False))
+        for size in rng.integers(5, 40, size=rows)
+    ])
+    wanted = list(vocabulary[:2])
+
+    start_time = timeit.default_timer()
+    bits, names = encode_amenities(amenities)
+    encode_time = timeit.default_timer() - start_time
+
+    start_time = timeit.default_timer()
+    [all(name in row for name in wanted) for row in amenities]
+    list_query_time = timeit.default_timer() - start_time
+
+    start_time = timeit.default_timer()
+    has_amenities(bits, names, wanted)
+    bitset_query_time = timeit.default_timer() - start_time
+
+    # Each list plus every distinct string object it points to (counted once)
+    strings = {id(name): name for row in amenities for name in row}
+    list_mb = (
+        sum(sys.getsizeof(row) for row in amenities)
+        + sum(sys.getsizeof(name) for name in strings.values())
+    ) / 1024 ** 2
+
+    return pd.DataFrame([
+        {"encoding": "python lists", "mb": round(list_mb, 1),
+         "query_seconds": round(list_query_time, 3)},
+        {"encoding": "packed bitset", "mb": round(bits.nbytes / 1024 ** 2, 1),
+         "query_seconds": round(bitset_query_time, 3),
+         "encode_seconds": round(encode_time, 2)},
+    ])
+
+
+# "Hackney flats with a dishwasher and self check-in under 120": a scan of the
+# amenity lists against the inverted index, over listings with 5-40 of 100
+# amenities
+def benchmark_amenity_index(rows=1_000_000, vocabulary_size=100, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(
+        [f"Amenity {number}" for number in range(vocabulary_size)])
+    df = pd.DataFrame({
+        "neighbourhood_cleansed": pd.Categorical(
+            rng.choice(["Hackney", "Camden", "Islington", "Westminster"],
+                       size=rows)),
+        "price": pd.array(rng.integers(30, 400, size=rows), dtype="Int64"),
+        "amenities": [
+            list(rng.choice(vocabulary, size=size, replace=False))
+            for size in rng.integers(5, 40, size=rows)
+        ],
+    })
+    wanted = list(vocabulary[:2])
+
+    start_time = timeit.default_timer()
+    index = build_amenity_index(df["amenities"])
+    build_time = timeit.default_timer() - start_time
+
+    start_time = timeit.default_timer()
+    has_all = df["amenities"].map(
+        lambda row: all(name in row for name in wanted))
+    scanned = df[has_all & (df["neighbourhood_cleansed"] == "Hackney")
+                 & (df["price"] <= 120)]
+    scan_time = timeit.default_timer() - start_time
+
+    start_time = timeit.default_timer()
+    found = query_listings(
+        df, index, wanted, neighbourhood_cleansed="Hackney", price=(None, 120))
+    index_time = timeit.default_timer() - start_time
+
+    assert found.index.equals(scanned.index)
+
+    return pd.DataFrame([
+        {"query": "scan amenity lists", "ms": round(scan_time * 1000, 1)},
+        {"query": "inverted index", "ms": round(index_time * 1000, 1),
+         "build_seconds": round(build_time, 2), "matches": len(found)},
+    ])
+
+
+# Mean revenue with against without each amenity per neighbourhood: a groupby
+# per amenity over exploded lists (the prototype) against bincounts over the
+# amenity index
+def benchmark_amenity_uplift(rows=1_000_000, vocabulary_size=100, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(
+        [f"Amenity {number}" for number in range(vocabulary_size)])
+    df = pd.DataFrame({
+        "neighbourhood_cleansed": rng.choice(
+            [f"Neighbourhood {number}" for number in range(33)], size=rows),
+        "estimated_revenue_l365d": rng.gamma(2.0, 5000.0, size=rows),
+        "amenities": [
+            list(rng.choice(vocabulary, size=size, replace=False))
+            for size in rng.integers(5, 40, size=rows)
+        ],
+    })
+
+    start_time = timeit.default_timer()
+    exploded = df[["neighbourhood_cleansed", "estimated_revenue_l365d"]].join(
+        df["amenities"].explode().rename("amenity"))
+    group_totals = df.groupby("neighbourhood_cleansed")[
+        "estimated_revenue_l365d"].agg(["sum", "count"])
+    for _, with_amenity in exploded.groupby("amenity"):
+        present = with_amenity.groupby("neighbourhood_cleansed")[
+            "estimated_revenue_l365d"].agg(["sum", "count"])
+        absent = group_totals - present
+        present["sum"] / present["count"] - absent["sum"] / absent["count"]
+    loop_time = timeit.default_timer() - start_time
+
+    start_time = timeit.default_timer()
+    index = build_amenity_index(df["amenities"])
+    index_time = timeit.default_timer() - start_time
+
+    start_time = timeit.default_timer()
+    uplift = amenity_uplift(df, index)
+    uplift_time = timeit.default_timer() - start_time
+
+    return pd.DataFrame([
+        {"method": "groupby per amenity", "seconds": round(loop_time, 2)},
+        {"method": "sparse bincounts", "seconds": round(uplift_time, 2),
+         "index_seconds": round(index_time, 2), "cells": len(uplift)},
+    ])
+
+
+# The dashboard groupings (and the full cube) of the listing metrics: one
+# groupby per grouping against one pass over sorted cell codes
+def benchmark_grouping_sets(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "neighbourhood_cleansed": pd.Categorical(rng.choice(
+            [f"Neighbourhood {number}" for number in range(33)], size=rows)),
+        "room_type": pd.Categorical(rng.choice(
+            ["Entire home/apt", "Private room", "Shared room", "Hotel room"],
+            size=rows)),
+        "property_type": pd.Categorical(rng.choice(
+            [f"Property type {number}" for number in range(80)], size=rows)),
+        **{col: rng.random(rows) for col in METRICS},
+    })
+
+    results = []
+    for name, grouping_sets in [
+        ("dashboard", GROUPING_SETS), ("cube", cube(DIMENSIONS))
+    ]:
+        start_time = timeit.default_timer()
+        for grouping_set in grouping_sets:
+            if grouping_set:
+                df.groupby(list(grouping_set), observed=True)[METRICS].agg(
+                    ["mean", "size"])
+            else:
+                df[METRICS].mean()
+        groupby_time = timeit.default_timer() - start_time
+
+        start_time = timeit.default_timer()
+        aggregates = grouping_sets_aggregate(df, grouping_sets)
+        one_pass_time = timeit.default_timer() - start_time
+
+        results.append({
+            "grouping_sets": name,
+            "groupby_seconds": round(groupby_time, 2),
+            "one_pass_seconds": round(one_pass_time, 2),
+            "groups": len(aggregates),
+        })
+
+    return pd.DataFrame(results)
+
+
+# Group medians of prices arriving in chunks: exact medians need every price in
+# memory, a sketch keeps at most about compression / 2 centroids per group.
+# One row per compression shows the accuracy / latency trade-off.
+def benchmark_quantile_sketch(
+    rows=1_000_000, chunk_rows=100_000, compressions=(50, 100, 200, 500),
+    seed=0,
+):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "listing_group": rng.integers(0, 500, size=rows),
+        "price": rng.lognormal(4.5, 0.7, size=rows),
+    })
+    chunks = [
+        df.iloc[start:start + chunk_rows]
+        for start in range(0, rows, chunk_rows)
+    ]
+
+    start_time = timeit.default_timer()
+    exact = pd.concat(chunks).groupby("listing_group")["price"].median()
+    results = [{
+        "method": "exact median",
+        "seconds": round(timeit.default_timer() - start_time, 2),
+        "values_kept": rows, "max_relative_error": 0.0,
+    }]
+
+    for compression in compressions:
+        start_time = timeit.default_timer()
+        sketch = sketch_chunks(chunks, "price", "listing_group", compression)
+        medians = sketch_quantiles(sketch, "listing_group")[0.5]
+        seconds = timeit.default_timer() - start_time
+
+        results.append({
+            "method": f"sketch (compression {compression})",
+            "seconds": round(seconds, 2),
+            "values_kept": len(sketch),
+            "max_relative_error": round((medians / exact - 1).abs().max(), 4),
+        })
+
+    return pd.DataFrame(results)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"\nReview sentiment ({rows} reviews, {os.cpu_count()} cores)")
+    print(benchmark_review_sentiment(rows).to_string(index=False))
+
+    print(f"\nDtype backends ({rows} listings)")
+    print(benchmark_dtype_backends(rows).to_string(index=False))
+
+    print(f"\nBoolean flag parsing ({rows} rows)")
+    print(benchmark_bool_parsing(rows).to_string(index=False))
+
+    print(f"\nNumeric parsing ({rows} rows)")
+    print(benchmark_numeric_parsing(rows).to_string(index=False))
+
+    print("\nMinimum beds imputation")
+    print(benchmark_impute_minimum_beds().to_string(index=False))
+
+    print(f"\nBathrooms imputation ({rows} rows)")
+    print(benchmark_impute_bathrooms(rows).to_string(index=False))
+
+    print(f"\nGroup median imputation ({rows} rows)")
+    print(benchmark_group_imputation(rows).to_string(index=False))
+
+    print(f"\nAmenity bitset ({rows} listings)")
+    print(benchmark_amenity_bitset(rows).to_string(index=False))
+
+    print(f"\nAmenity index query ({rows} listings)")
+    print(benchmark_amenity_index(rows).to_string(index=False))
+
+    print(f"\nAmenity revenue uplift ({rows} listings)")
+    print(benchmark_amenity_uplift(rows).to_string(index=False))
+
+    print(f"\nGrouping sets aggregation ({rows} listings)")
+    print(benchmark_grouping_sets(rows).to_string(index=False))
+
+    print(f"\nGroup median sketches ({rows} prices)")
+    print(benchmark_quantile_sketch(rows).to_string(index=False))
+
+    listings = Path("data/raw/detailed_listings_data.csv")
+    if listings.exists():
+        print(f"\nCopy-free pipeline ({listings})")
+        print(benchmark_copy_free(listings).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,18 @@ import os
 import sys
 from pathlib import Path
 from config.env_config import setup_env
-from src.extract.extract import extract_data
+from src.extract.extract import (
+    extract_data,
+    extract_data_incremental,
+    extract_aggregates,
+)
+from src.extract.extract_listings import (
+    extract_listings_chunked,
+    list_raw_csv_files,
+)
+from src.extract.extract_manifest import commit_manifest
 from src.utils.logging_utils import setup_logger
-from src.transform.transform_data import transform_data
+from src.transform.transform_data import transform_data, transform_data_chunked
 
 
 def main():
@@ -20,8 +29,59 @@ def main():
     )
 
     try:
+        # numpy_nullable (default) or pyarrow for Arrow-backed columns
+        dtype_backend = os.getenv("DTYPE_BACKEND", "numpy_nullable")
+        # Clean and transform under copy-on-write without defensive copies
+        copy_free = os.getenv("COPY_FREE", "false").lower() == "true"
+        # Store the cleaned numeric columns in their smallest safe dtypes
+        downcast = os.getenv("DOWNCAST", "false").lower() == "true"
+        # Approximate group medians with quantile sketches (unset keeps them
+        # exact)
+        median_compression = os.getenv("MEDIAN_COMPRESSION")
+        median_compression = (
+            int(median_compression) if median_compression else None
+        )
+
+        # Stream the listings instead when they are too big for memory
+        chunk_size = os.getenv("EXTRACT_CHUNK_SIZE")
+        if chunk_size:
+            logger.info(
+                f"Streaming extraction and transformation in chunks of "
+                f"{chunk_size} rows"
+            )
+            chunks = extract_listings_chunked(
+                chunksize=int(chunk_size), dtype_backend=dtype_backend
+            )
+            aggregates = extract_aggregates(
+                list_raw_csv_files(),
+                workers=int(os.getenv("EXTRACT_WORKERS", "1"))
+            )
+            transform_data_chunked(
+                chunks['detailed_listings_data'],
+                calendar=aggregates.get('calendar'),
+                reviews=aggregates.get('reviews'),
+                dtype_backend=dtype_backend,
+                copy_free=copy_free,
+                downcast=downcast,
+                median_compression=median_compression
+            )
+            logger.info("ETL pipeline successfully completed")
+            return
+
         logger.info("Starting extraction phase")
-        extracted_data = extract_data()
+        extract_options = dict(
+            projected=True,
+            workers=int(os.getenv("EXTRACT_WORKERS", "1")),
+            use_cache=os.getenv("EXTRACT_CACHE", "false").lower() == "true",
+            dtype_backend=dtype_backend
+        )
+
+        # Only pick up new or changed snapshots when running incrementally
+        delta = None
+        if os.getenv("EXTRACT_INCREMENTAL", "false").lower() == "true":
+            extracted_data, delta = extract_data_incremental(**extract_options)
+        else:
+            extracted_data = extract_data(**extract_options)
         logger.info("Data extraction phase completed")
 
         # proof of confirmation
@@ -32,18 +92,32 @@ def main():
 
         for name, df in extracted_data.items():
             logger.info(
-                f"Dataset '{name}' Extraction returned: {df.shape[0]} rows and "
-                f"{df.shape[1]} columns"
+                f"Dataset '{name}' Extraction returned: {df.shape[0]} rows "
+                f"and {df.shape[1]} columns"
             )
 
         # Transformation phase
-        logger.info("Beginning data transformation phase")
-        transformed_data = transform_data(
-            extracted_data['detailed_listings_data'])
+        if 'detailed_listings_data' in extracted_data:
+            logger.info("Beginning data transformation phase")
+            transformed_data = transform_data(
+                extracted_data['detailed_listings_data'],
+                calendar=extracted_data.get('calendar'),
+                reviews=extracted_data.get('reviews'),
+                dtype_backend=dtype_backend,
+                copy_free=copy_free,
+                downcast=downcast,
+                median_compression=median_compression)
+        else:
+            logger.info("Listings unchanged since the last run, "
+                        "skipping transformation")
         # Create output directory and file
         output_dir = Path("data/processed")
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Record the processed snapshots only once everything succeeded
+        if delta is not None:
+            commit_manifest(delta)
+
         logger.info("ETL pipeline successfully completed")
 
     except Exception as e:
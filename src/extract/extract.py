@@ -1,21 +1,120 @@
 import pandas as pd
-from src.extract.extract_listings import extract_listings
+from src.extract.extract_listings import (
+    extract_listings,
+    list_raw_csv_files,
+    dataset_name,
+    SEPARATE_DATASETS,
+)
+from src.extract.extract_calendar import extract_calendar
+from src.extract.extract_reviews import (
+    iter_review_batches,
+    review_batch_to_chunk,
+    REVIEWS_COLUMNS,
+)
+from src.transform.clean_reviews import (
+    new_review_totals,
+    add_review_chunk,
+    finish_reviews,
+)
+from src.transform.review_sentiment import review_sentiment
+from src.extract.extract_manifest import load_manifest, diff_against_manifest
+from src.extract.extract_cache import read_with_cache
 from src.utils.logging_utils import setup_logger
+from src.utils.dtype_utils import DEFAULT_DTYPE_BACKEND
 
 logger = setup_logger("extract_data", "extract_data.log")
 
 
-def extract_data() -> dict[str, pd.DataFrame]:
+def tally_reviews(batches, totals):
+    """
+    Yield the listing id and comments of every review batch while adding
+    the whole batch to the review totals (see clean_reviews), so
+    reviews.csv is parsed once for both the totals and the sentiment.
+    :param totals: Running totals from new_review_totals.
+    """
+    for batch in batches:
+        add_review_chunk(totals, review_batch_to_chunk(batch))
+        yield batch.select(["listing_id", "comments"])
+
+
+def aggregate_file(file_path, workers: int = 1) -> pd.DataFrame:
+    """
+    Reduce calendar.csv or reviews.csv to one row per listing, indexed
+    by listing_id.
+    Review sentiment is scored from the same pass over reviews.csv as
+    the other review aggregates.
+    :param workers: Number of processes used to score review comments.
+    """
+    if dataset_name(file_path) == "calendar":
+        return extract_calendar(file_path)
+
+    totals = new_review_totals()
+    batches = iter_review_batches(file_path, columns=REVIEWS_COLUMNS)
+    sentiment = review_sentiment(
+        tally_reviews(batches, totals), workers=workers
+    )
+
+    return finish_reviews(totals).join(sentiment)
+
+
+def extract_aggregates(
+    raw_files, workers: int = 1, use_cache: bool = False
+) -> dict[str, pd.DataFrame]:
+    """
+    Stream the large per-listing files (calendar.csv, reviews.csv) and
+    reduce them to one row per listing, keyed by dataset name.
+    :param workers: Number of processes used to score review comments.
+    :param use_cache: Load the aggregates of unchanged files from the
+    Parquet cache instead of streaming the files again.
+    """
+    aggregates = {}
+
+    for file_path in raw_files:
+        name = dataset_name(file_path)
+        if name not in SEPARATE_DATASETS:
+            continue
+
+        if use_cache:
+            # The cache stores plain columns, so listing_id goes through
+            # it as one and becomes the index again afterwards
+            aggregates[name] = read_with_cache(
+                file_path,
+                lambda fp: aggregate_file(fp, workers).reset_index(),
+                "aggregates",
+            ).set_index("listing_id")
+        else:
+            aggregates[name] = aggregate_file(file_path, workers)
+
+    return aggregates
+
+
+def extract_data(
+    projected: bool = False,
+    workers: int = 1,
+    use_cache: bool = False,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> dict[str, pd.DataFrame]:
     """
     Extract all datasets needed for ETL.
-    For now: listings only.
-    Extend later: multiple datasets.
+    Listings are loaded as they are, the calendar and reviews are
+    streamed and reduced to one row per listing (see extract_aggregates).
+    :param projected: Read only the listings columns used downstream.
+    :param workers: Number of processes used to parse the raw files.
+    :param use_cache: Load unchanged raw files from the Parquet cache
+    in data/cache instead of parsing the CSVs again.
+    :param dtype_backend: "numpy_nullable" or "pyarrow" for the listings.
     """
 
     try:
         logger.info("Starting data extraction process")
 
-        listings = extract_listings()
+        listings = extract_listings(
+            projected=projected, workers=workers, use_cache=use_cache,
+            dtype_backend=dtype_backend,
+        )
+        listings.update(extract_aggregates(
+            list_raw_csv_files(), workers=workers, use_cache=use_cache
+        ))
 
         for name, df in listings.items():
             logger.info(f"Extraction dataset - '{name}': {df.shape}")
@@ -25,3 +124,61 @@ def extract_data() -> dict[str, pd.DataFrame]:
     except Exception as e:
         logger.error(f"Data extraction failed: {e}")
         raise
+
+
+def extract_data_incremental(
+    projected: bool = False,
+    workers: int = 1,
+    use_cache: bool = False,
+    manifest_path=None,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> tuple[dict[str, pd.DataFrame], dict]:
+    """
+    Extract only the raw files that are new or changed since the last
+    committed manifest (see extract_manifest.commit_manifest).
+    Returns the datasets and the delta describing what changed, so the
+    downstream stages can skip work when nothing did.
+    """
+
+    try:
+        logger.info("Starting incremental data extraction process")
+
+        raw_files = list_raw_csv_files()
+        delta = diff_against_manifest(raw_files, load_manifest(manifest_path))
+
+        to_extract = set(delta["new"]) | set(delta["changed"])
+        files = [fp for fp in raw_files if fp.name in to_extract]
+
+        if not files:
+            logger.info("No new or changed raw files since the last run")
+            return {}, delta
+
+        # The saved output has the calendar and reviews aggregates joined on,
+        # so when one of them changed every listings file is extracted again
+        # (otherwise the transform is skipped and the change is lost once the
+        # manifest records it)
+        aggregates_changed = any(
+            dataset_name(fp) in SEPARATE_DATASETS for fp in files
+        )
+        listings = extract_listings(
+            projected=projected, workers=workers, use_cache=use_cache,
+            files=raw_files if aggregates_changed else files,
+            dtype_backend=dtype_backend,
+        )
+        # The aggregates are joined onto the listings, so they are rebuilt
+        # whenever the listings are transformed again, not only when the
+        # calendar changed. With no listings to join them onto they would
+        # be thrown away, so the large files are not read at all.
+        if listings:
+            listings.update(extract_aggregates(
+                raw_files, workers=workers, use_cache=use_cache
+            ))
+
+        for name, df in listings.items():
+            logger.info(f"Extraction dataset - '{name}': {df.shape}")
+
+        return listings, delta
+
+    except Exception as e:
+        logger.error(f"Data extraction failed: {e}")
+        raise
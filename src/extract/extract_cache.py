@@ -0,0 +1,85 @@
+import os
+import json
+from pathlib import Path
+from typing import Callable
+import pandas as pd
+
+from src.utils.logging_utils import setup_logger
+from src.utils.file_utils import file_fingerprint
+
+# Hits and misses are reported alongside the rest of the extract_data log
+logger = setup_logger("extract_data", "extract_data.log")
+
+CACHE_DIR = Path(__file__).resolve().parents[2] / "data" / "cache"
+
+
+def _load_fingerprint(file_path: Path, cache_dir: Path) -> dict:
+    """
+    Fingerprint a raw file (size, mtime and sha256).
+    The stored fingerprint is reused while the size and mtime are
+    unchanged, so unchanged files are not read again just to hash them.
+    """
+    sidecar = cache_dir / f"{file_path.name}.json"
+    stat = file_path.stat()
+
+    if sidecar.exists():
+        stored = json.loads(sidecar.read_text())
+        if (stored["size"] == stat.st_size
+                and stored["mtime_ns"] == stat.st_mtime_ns):
+            return stored
+
+    fingerprint = file_fingerprint(file_path)
+    sidecar.write_text(json.dumps(fingerprint))
+
+    return fingerprint
+
+
+def _remove_stale_entries(file_path: Path, sha256: str, cache_dir: Path):
+    """
+    Delete cached copies of older versions of the same raw file.
+    """
+    for cached in cache_dir.glob(f"{file_path.name}-*.parquet"):
+        if f"-{sha256[:16]}-" not in cached.name:
+            logger.info(f"Removing stale cache entry: {cached.name}")
+            cached.unlink()
+
+
+def read_with_cache(
+    file_path: Path,
+    reader: Callable[[Path], pd.DataFrame],
+    variant: str,
+    cache_dir: Path = None,
+) -> pd.DataFrame:
+    """
+    Return the raw file as a DataFrame, using a Parquet copy when one
+    exists for the same file contents.
+    On a miss the CSV is parsed with reader and the result is written to
+    the cache, so later runs skip CSV parsing entirely.
+    :param variant: Identifies how the file was read (e.g. full or
+    projected), so different read modes are cached separately.
+    """
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    fingerprint = _load_fingerprint(file_path, cache_dir)
+    sha256 = fingerprint["sha256"]
+    parquet_path = (
+        cache_dir / f"{file_path.name}-{sha256[:16]}-{variant}.parquet"
+    )
+
+    if parquet_path.exists():
+        logger.info(f"Cache hit for {file_path.name}: {parquet_path.name}")
+        return pd.read_parquet(parquet_path)
+
+    logger.info(f"Cache miss for {file_path.name}, parsing CSV")
+    df = reader(file_path)
+
+    # Write to a temporary file first so a crash never leaves a
+    # half-written file that looks like a valid cache entry
+    tmp_path = parquet_path.with_suffix(".tmp")
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+
+    _remove_stale_entries(file_path, sha256, cache_dir)
+
+    return df
@@ -0,0 +1,158 @@
+import timeit
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_utils import setup_logger
+from src.utils.memory_utils import peak_rss_mb
+from src.extract.extract_listings import open_raw_file
+
+logger = setup_logger(__name__, "extract_data.log")
+
+CALENDAR_CHUNK_SIZE = 1_000_000
+CALENDAR_COLUMNS = ["listing_id", "date", "available", "price"]
+
+# The calendar only says a night is unavailable, not why. Unavailable runs
+# at least this long are treated as blocked by the host, shorter ones as
+# bookings (stays rarely run for a month or more).
+BLOCKED_RUN_NIGHTS = 30
+
+
+def iter_calendar_chunks(
+    file_path: Path, chunksize: int = CALENDAR_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield calendar.csv as chunks of at most chunksize rows,
+    reading only the columns needed for the aggregates.
+    """
+    with open_raw_file(file_path) as source, pd.read_csv(
+        source,
+        usecols=CALENDAR_COLUMNS,
+        dtype={"available": "category", "price": "string"},
+        chunksize=chunksize,
+    ) as reader:
+        yield from reader
+
+
+def _calendar_partials(
+    block: pd.DataFrame, blocked_run_nights: int
+) -> pd.DataFrame:
+    """
+    Reduce a block of complete listings to per-listing partial sums.
+    Sums (rather than means) are returned so partials can be added up.
+    """
+    block = block.assign(
+        date=pd.to_datetime(block["date"], format="%Y-%m-%d"),
+        price=pd.to_numeric(
+            block["price"].str.replace(r"[$,]", "", regex=True),
+            errors="coerce",
+        ),
+    ).sort_values(["listing_id", "date"])
+
+    unavailable = (block["available"] == "f").to_numpy()
+    listing_id = block["listing_id"].to_numpy()
+    date = block["date"].to_numpy()
+
+    # A new run starts when the listing, the availability or the
+    # consecutive-day sequence changes
+    new_run = pd.Series(True, index=block.index)
+    new_run.iloc[1:] = (
+        (listing_id[1:] != listing_id[:-1])
+        | (unavailable[1:] != unavailable[:-1])
+        | ((date[1:] - date[:-1]) != np.timedelta64(1, "D"))
+    )
+    run_id = new_run.cumsum()
+    run_length = run_id.map(run_id.value_counts())
+
+    blocked = unavailable & (run_length >= blocked_run_nights).to_numpy()
+    booked = unavailable & ~blocked
+    price = block["price"]
+
+    partials = pd.DataFrame({
+        "listing_id": listing_id,
+        "calendar_nights": 1,
+        "booked_nights": booked.astype("int64"),
+        "blocked_nights": blocked.astype("int64"),
+        "price_count": price.notna().astype("int64").to_numpy(),
+        "price_sum": price.fillna(0).to_numpy(),
+        "price_sum_sq": (price ** 2).fillna(0).to_numpy(),
+    })
+
+    return partials.groupby("listing_id").sum()
+
+
+def aggregate_calendar_chunks(
+    chunks, blocked_run_nights: int = BLOCKED_RUN_NIGHTS
+) -> pd.DataFrame:
+    """
+    Reduce calendar chunks to one row per listing with booked nights,
+    blocked nights and the mean and variance of the nightly price.
+    Rows of the last listing in each chunk are held back until the next
+    chunk, so every unavailable run is measured over a whole listing.
+    Only one chunk plus one row per listing is held at a time.
+    """
+    partials = []
+    carry = None
+
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+
+        is_last_listing = chunk["listing_id"] == chunk["listing_id"].iloc[-1]
+        carry = chunk[is_last_listing]
+        complete = chunk[~is_last_listing]
+
+        if not complete.empty:
+            partials.append(_calendar_partials(complete, blocked_run_nights))
+
+    if carry is not None and not carry.empty:
+        partials.append(_calendar_partials(carry, blocked_run_nights))
+
+    if not partials:
+        raise ValueError("Calendar file contains no rows")
+
+    # A listing only appears in more than one partial if the file
+    # is not grouped by listing, in which case the sums still add up
+    totals = pd.concat(partials).groupby(level=0).sum()
+
+    price_mean = totals["price_sum"] / totals["price_count"]
+    price_var = (
+        (totals["price_sum_sq"] - totals["price_count"] * price_mean ** 2)
+        / (totals["price_count"] - 1)
+    )
+
+    return pd.DataFrame({
+        "calendar_nights": totals["calendar_nights"],
+        "booked_nights": totals["booked_nights"],
+        "blocked_nights": totals["blocked_nights"],
+        "calendar_price_mean": price_mean,
+        "calendar_price_var": price_var.clip(lower=0),
+    })
+
+
+def extract_calendar(
+    file_path: Path, chunksize: int = CALENDAR_CHUNK_SIZE
+) -> pd.DataFrame:
+    """
+    Stream calendar.csv (about 365 rows per listing) and return the
+    per-listing aggregates, indexed by listing_id.
+    """
+    try:
+        start_time = timeit.default_timer()
+
+        aggregates = aggregate_calendar_chunks(
+            iter_calendar_chunks(file_path, chunksize)
+        )
+
+        logger.info(
+            f"Aggregated calendar {file_path.name} to {len(aggregates)} "
+            f"listings in {timeit.default_timer() - start_time:.2f}s, "
+            f"peak RSS {peak_rss_mb():.1f} MB"
+        )
+
+        return aggregates
+
+    except Exception as e:
+        logger.error(f"Failed to extract calendar: {e}")
+        raise
@@ -1,25 +1,94 @@
 import os
+import json
 import timeit
+import hashlib
 from pathlib import Path
+from itertools import repeat
+from typing import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 import pandas as pd
+import pyarrow as pa
 
 from src.utils.logging_utils import setup_logger
+from src.utils.memory_utils import frame_memory_mb, peak_rss_mb
+from src.utils.dtype_utils import (
+    DEFAULT_DTYPE_BACKEND,
+    backend_dtype,
+    backend_dtypes,
+)
+from src.utils.column_utils import EXTRACT_COLUMNS
+from src.extract.extract_cache import read_with_cache
 
 # Configure logger (same as reference)
 logger = setup_logger(__name__, "extract_data.log")
 
 TYPE = "LISTINGS from local file"
 EXPECTED_IMPORT_RATE = 0.001
+CHUNK_SIZE = 50_000
 
+# Inside Airbnb publishes gzipped snapshots, these are decompressed while
+# they are parsed so the full CSV never has to be written to disk first.
+COMPRESSION_CODECS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".zst": "zstd",
+}
 
-def extract_listings() -> dict[str, pd.DataFrame]:
+# Per-night and per-review files are far too large to load as listings,
+# they are streamed and aggregated by their own extractors instead
+SEPARATE_DATASETS = ("calendar", "reviews")
+
+# Declared dtypes for the projected read. Low-cardinality text becomes
+# category, counts become nullable ints and free text stays string.
+# Anything not listed here (latitude, review scores...) is inferred as float.
+# With the pyarrow dtype backend these map to their Arrow equivalents.
+LISTINGS_DTYPES = {
+    "id": "Int64",
+    "property_type": "category",
+    "room_type": "category",
+    "neighbourhood_cleansed": "category",
+    "host_response_time": "category",
+    "accommodates": "Int64",
+    "number_of_reviews": "Int64",
+    "availability_365": "Int64",
+    "minimum_nights": "Int64",
+    "maximum_nights": "Int64",
+    "price": "string",
+    "host_response_rate": "string",
+    "host_acceptance_rate": "string",
+    "host_since": "string",
+    "last_scraped": "string",
+    "amenities": "string",
+    "host_is_superhost": "string",
+}
+
+
+def extract_listings(
+    projected: bool = False,
+    workers: int = 1,
+    use_cache: bool = False,
+    files: list[Path] = None,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> dict[str, pd.DataFrame]:
     """
     Extract listings data from local data/raw directory,
     with performance logging (matches reference pattern).
+    :param projected: Only read the columns kept by clean_listings and
+    the snapshot date (EXTRACT_COLUMNS), with the dtypes declared in
+    LISTINGS_DTYPES.
+    :param workers: Number of processes used to parse files concurrently.
+    :param use_cache: Load unchanged raw files from the Parquet cache.
+    :param files: Only extract these raw files instead of all of data/raw.
+    :param dtype_backend: "numpy_nullable" or "pyarrow" (see dtype_utils).
     """
     try:
         start_time = timeit.default_timer()
-        dfs = extract_listings_execution()
+        dfs = extract_listings_execution(
+            projected=projected, workers=workers, use_cache=use_cache,
+            files=files, dtype_backend=dtype_backend,
+        )
         extract_time = timeit.default_timer() - start_time
 
         logger.info(
@@ -36,10 +105,157 @@ def extract_listings() -> dict[str, pd.DataFrame]:
         raise
 
 
-def extract_listings_execution() -> dict[str, pd.DataFrame]:
+def is_csv_file(file_path: Path) -> bool:
     """
-    Actual extraction logic — no settings object required.
-    Everything is built internally just like in the reference.
+    True for .csv files and compressed ones such as .csv.gz or .csv.zst.
+    """
+    suffixes = [suffix.lower() for suffix in file_path.suffixes]
+
+    if suffixes and suffixes[-1] in COMPRESSION_CODECS:
+        suffixes = suffixes[:-1]
+
+    return bool(suffixes) and suffixes[-1] == ".csv"
+
+
+def dataset_name(file_path: Path) -> str:
+    """
+    Key used for a raw file, e.g. listings.csv.gz -> listings.
+    """
+    if file_path.suffix.lower() in COMPRESSION_CODECS:
+        return Path(file_path.stem).stem
+
+    return file_path.stem
+
+
+@contextmanager
+def open_raw_file(file_path: Path):
+    """
+    Yield something pd.read_csv can read. Compressed files are wrapped
+    in a pyarrow stream that decompresses as pandas reads from it.
+    """
+    codec = COMPRESSION_CODECS.get(file_path.suffix.lower())
+
+    if codec is None:
+        yield file_path
+        return
+
+    with pa.input_stream(str(file_path), compression=codec) as stream:
+        yield stream
+
+
+def _projection(
+    file_path: Path, dtype_backend: str = DEFAULT_DTYPE_BACKEND
+) -> tuple[list[str], dict[str, str]]:
+    """
+    Work out which insight columns the file has and their declared dtypes.
+    Only the header row is parsed.
+    """
+    with open_raw_file(file_path) as source:
+        header = pd.read_csv(source, nrows=0).columns
+
+    usecols = [col for col in EXTRACT_COLUMNS if col in header]
+    dtypes = {
+        col: dtype for col, dtype in LISTINGS_DTYPES.items() if col in usecols
+    }
+
+    return usecols, backend_dtypes(dtypes, dtype_backend)
+
+
+def _backend_option(dtype_backend: str) -> dict:
+    """
+    Keyword arguments for pd.read_csv. The default backend keeps pandas'
+    own inference (numpy floats and objects, then the declared dtypes).
+    """
+    if dtype_backend == DEFAULT_DTYPE_BACKEND:
+        return {}
+
+    return {"dtype_backend": dtype_backend}
+
+
+def read_listings_file(
+    file_path: Path,
+    projected: bool = False,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> pd.DataFrame:
+    """
+    Read a single raw file into a DataFrame.
+    In projected mode the column selection and dtypes are pushed into
+    the pyarrow CSV reader, so the unused columns are never parsed.
+    Files that share no columns with EXTRACT_COLUMNS are read in full.
+    Compressed files are decompressed in memory as they are parsed.
+    With dtype_backend="pyarrow" the columns stay in Arrow memory.
+    """
+    usecols, dtypes = (
+        _projection(file_path, dtype_backend) if projected else ([], {})
+    )
+
+    with open_raw_file(file_path) as source:
+        if not usecols:
+            return pd.read_csv(source, **_backend_option(dtype_backend))
+
+        return pd.read_csv(
+            source, engine="pyarrow", usecols=usecols, dtype=dtypes,
+            **_backend_option(dtype_backend),
+        )
+
+
+def _cache_variant(
+    projected: bool, dtype_backend: str = DEFAULT_DTYPE_BACKEND
+) -> str:
+    """
+    Name of the read mode for the cache. The projected variant includes a
+    hash of the column list and dtypes, so changing them invalidates it.
+    Arrow-backed reads are cached separately from the default ones.
+    """
+    suffix = "" if dtype_backend == DEFAULT_DTYPE_BACKEND else f"-{dtype_backend}"
+
+    if not projected:
+        return f"full{suffix}"
+
+    spec = json.dumps([EXTRACT_COLUMNS, LISTINGS_DTYPES], sort_keys=True)
+    return f"projected{hashlib.sha256(spec.encode()).hexdigest()[:8]}{suffix}"
+
+
+def _read_listings_file_timed(
+    file_path: Path,
+    projected: bool,
+    use_cache: bool = False,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> tuple:
+    """
+    Read one file and time it. Kept at module level so it can be
+    pickled and run inside a worker process.
+    Returns the DataFrame, the parse time and the reader's peak RSS.
+    """
+    start_time = timeit.default_timer()
+
+    if use_cache:
+        df = read_with_cache(
+            file_path,
+            partial(
+                read_listings_file,
+                projected=projected, dtype_backend=dtype_backend,
+            ),
+            _cache_variant(projected, dtype_backend),
+        )
+        # Parquet does not record the string storage, so it is set again
+        string_cols = df.select_dtypes(include="string").columns
+        df = df.astype({
+            col: backend_dtype("string", dtype_backend) for col in string_cols
+        })
+    else:
+        df = read_listings_file(
+            file_path, projected=projected, dtype_backend=dtype_backend
+        )
+
+    parse_time = timeit.default_timer() - start_time
+
+    return df, parse_time, peak_rss_mb()
+
+
+def list_raw_csv_files() -> list[Path]:
+    """
+    Return the CSV files inside data/raw, warning about anything else.
     """
 
     # Build raw folder path manually
@@ -56,19 +272,147 @@ def extract_listings_execution() -> dict[str, pd.DataFrame]:
 
     logger.info(f"Reading all CSV files inside: {raw_dir}")
 
-    raw_dfs = {}
+    csv_files = []
 
     for file_path in raw_files:
-        if file_path.suffix.lower() != ".csv":
+        if not is_csv_file(file_path):
             logger.warning(f"Skipping unsupported filetype: {file_path}")
             continue
 
-        df = pd.read_csv(file_path)
-        name = file_path.stem
+        codec = COMPRESSION_CODECS.get(file_path.suffix.lower())
+        if codec:
+            size_mb = file_path.stat().st_size / 1024 ** 2
+            logger.info(
+                f"{file_path.name} will be streamed through {codec} "
+                f"decompression ({size_mb:.1f} MB on disk)"
+            )
+
+        csv_files.append(file_path)
+
+    return csv_files
+
+
+def _listings_only(csv_files: list[Path]) -> list[Path]:
+    """
+    Drop the files that are handled by their own extractors.
+    """
+    listings_files = []
+
+    for file_path in csv_files:
+        if dataset_name(file_path) in SEPARATE_DATASETS:
+            logger.info(f"Leaving {file_path.name} to its own extractor")
+            continue
+
+        listings_files.append(file_path)
+
+    return listings_files
+
+
+def extract_listings_execution(
+    projected: bool = False,
+    workers: int = 1,
+    use_cache: bool = False,
+    files: list[Path] = None,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> dict[str, pd.DataFrame]:
+    """
+    Actual extraction logic — no settings object required.
+    Everything is built internally just like in the reference.
+    :param projected: Only read the columns in EXTRACT_COLUMNS.
+    :param workers: Number of processes used to parse files concurrently.
+    1 keeps everything in the current process.
+    :param use_cache: Load unchanged raw files from the Parquet cache.
+    :param files: Only extract these raw files instead of all of data/raw.
+    :param dtype_backend: "numpy_nullable" or "pyarrow" (see dtype_utils).
+    """
+    csv_files = _listings_only(
+        list_raw_csv_files() if files is None else files
+    )
+
+    if workers > 1 and len(csv_files) > 1:
+        logger.info(
+            f"Parsing {len(csv_files)} files with {workers} worker processes"
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                _read_listings_file_timed, csv_files,
+                repeat(projected), repeat(use_cache), repeat(dtype_backend)
+            ))
+    else:
+        results = (
+            _read_listings_file_timed(
+                file_path, projected, use_cache, dtype_backend
+            )
+            for file_path in csv_files
+        )
+
+    raw_dfs = {}
+
+    for file_path, (df, parse_time, peak_rss) in zip(csv_files, results):
+        name = dataset_name(file_path)
         raw_dfs[name] = df
         logger.info(f"Loaded file: {file_path.name} with key '{name}'")
+        logger.info(
+            f"Parsed '{name}' in {parse_time:.2f}s "
+            f"(projected={projected}): {frame_memory_mb(df):.1f} MB in memory, "
+            f"peak RSS {peak_rss:.1f} MB"
+        )
 
         if not raw_dfs:
             raise ValueError(f"No CSV files found in the raw folder")
 
     return raw_dfs
+
+
+def iter_listings_chunks(
+    file_path: Path,
+    chunksize: int = CHUNK_SIZE,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield a raw listings file as DataFrames of at most chunksize rows,
+    holding only the projected columns with the declared dtypes.
+    Only one chunk is parsed at a time, so memory is bounded by
+    chunksize rather than by the size of the file.
+    """
+    usecols, dtypes = _projection(file_path, dtype_backend)
+
+    # The pyarrow engine cannot stream, so chunks use the C parser
+    with open_raw_file(file_path) as source, pd.read_csv(
+        source, usecols=usecols or None, dtype=dtypes, chunksize=chunksize,
+        **_backend_option(dtype_backend),
+    ) as reader:
+        for number, chunk in enumerate(reader):
+            logger.debug(
+                f"Read chunk {number} of {file_path.name}: {chunk.shape}"
+            )
+            yield chunk
+
+
+def extract_listings_chunked(
+    chunksize: int = CHUNK_SIZE,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+) -> dict[str, Iterator[pd.DataFrame]]:
+    """
+    Streaming counterpart of extract_listings.
+    Returns a lazy chunk iterator per raw file, keyed by file stem.
+    Nothing is parsed until the iterators are consumed.
+    """
+    try:
+        csv_files = _listings_only(list_raw_csv_files())
+
+        logger.info(
+            f"Streaming {len(csv_files)} datasets in chunks of "
+            f"{chunksize} rows ({TYPE})"
+        )
+
+        return {
+            dataset_name(file_path): iter_listings_chunks(
+                file_path, chunksize, dtype_backend
+            )
+            for file_path in csv_files
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to extract datasets: {e}")
+        raise
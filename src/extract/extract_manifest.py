@@ -0,0 +1,94 @@
+import os
+import json
+from pathlib import Path
+
+from src.utils.logging_utils import setup_logger
+from src.utils.file_utils import file_fingerprint
+
+logger = setup_logger("extract_data", "extract_data.log")
+
+# Lives next to data/raw and records every raw file already processed
+MANIFEST_PATH = (
+    Path(__file__).resolve().parents[2] / "data" / "raw_manifest.json"
+)
+
+
+def load_manifest(manifest_path: Path = None) -> dict:
+    """
+    Return the manifest as {file name: fingerprint}, empty on the first run.
+    """
+    manifest_path = Path(manifest_path or MANIFEST_PATH)
+
+    if not manifest_path.exists():
+        return {}
+
+    return json.loads(manifest_path.read_text())
+
+
+def diff_against_manifest(raw_files: list[Path], manifest: dict) -> dict:
+    """
+    Compare the raw files on disk with the manifest.
+    Files whose size and mtime match the manifest are not hashed again.
+    Returns a delta with the file names that are new, changed, unchanged
+    and removed, and the fingerprints to record once they are processed.
+    """
+    delta = {
+        "new": [],
+        "changed": [],
+        "unchanged": [],
+        "removed": [],
+        "fingerprints": {},
+    }
+
+    for file_path in raw_files:
+        name = file_path.name
+        stored = manifest.get(name)
+        stat = file_path.stat()
+
+        if (stored and stored["size"] == stat.st_size
+                and stored["mtime_ns"] == stat.st_mtime_ns):
+            delta["unchanged"].append(name)
+            delta["fingerprints"][name] = stored
+            continue
+
+        fingerprint = file_fingerprint(file_path)
+        delta["fingerprints"][name] = fingerprint
+
+        if stored is None:
+            delta["new"].append(name)
+        elif stored["sha256"] != fingerprint["sha256"]:
+            delta["changed"].append(name)
+        else:
+            # Touched but the contents are the same
+            delta["unchanged"].append(name)
+
+    on_disk = {file_path.name for file_path in raw_files}
+    delta["removed"] = sorted(name for name in manifest if name not in on_disk)
+
+    logger.info(
+        f"Manifest delta: {len(delta['new'])} new, "
+        f"{len(delta['changed'])} changed, "
+        f"{len(delta['unchanged'])} unchanged, "
+        f"{len(delta['removed'])} removed"
+    )
+
+    return delta
+
+
+def commit_manifest(delta: dict, manifest_path: Path = None) -> None:
+    """
+    Record the files in the delta as processed.
+    Call this only after the downstream stages have succeeded, so a
+    failed run is picked up again next time.
+    """
+    manifest_path = Path(manifest_path or MANIFEST_PATH)
+
+    manifest = dict(delta["fingerprints"])
+
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, manifest_path)
+
+    logger.info(
+        f"Manifest updated with {len(manifest)} files: {manifest_path}"
+    )
@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+from src.utils.logging_utils import setup_logger
+from src.extract.extract_listings import open_raw_file
+
+logger = setup_logger(__name__, "extract_data.log")
+
+REVIEWS_COLUMNS = ["listing_id", "date", "comments"]
+
+# Bytes of CSV parsed per record batch by the pyarrow streaming reader
+REVIEWS_BLOCK_SIZE = 16 * 1024 ** 2
+
+# Dates stay text, clean_reviews parses them with an explicit format
+REVIEWS_COLUMN_TYPES = {
+    "listing_id": pa.int64(),
+    "date": pa.string(),
+    "comments": pa.string(),
+}
+
+
+def iter_review_batches(
+    file_path: Path,
+    block_size: int = REVIEWS_BLOCK_SIZE,
+    columns: list[str] = ("listing_id", "comments"),
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yield the listing id and comment text of reviews.csv as pyarrow
+    record batches. The pyarrow reader parses on its own threads and the
+    batches never become Python strings, which is much faster than
+    reading the comments with pandas.
+    :param columns: Columns to read, any of REVIEWS_COLUMNS.
+    """
+    with open_raw_file(file_path) as source:
+        reader = pv.open_csv(
+            str(source) if isinstance(source, Path) else source,
+            read_options=pv.ReadOptions(block_size=block_size),
+            # Comments regularly span several lines
+            parse_options=pv.ParseOptions(newlines_in_values=True),
+            convert_options=pv.ConvertOptions(
+                include_columns=list(columns),
+                column_types={
+                    col: REVIEWS_COLUMN_TYPES[col] for col in columns
+                },
+            ),
+        )
+
+        for number, batch in enumerate(reader):
+            logger.debug(
+                f"Read batch {number} of {file_path.name}: "
+                f"{batch.num_rows} rows"
+            )
+            yield batch
+
+
+def review_batch_to_chunk(batch: pa.RecordBatch) -> pd.DataFrame:
+    """
+    Turn a record batch into the DataFrame chunk add_review_chunk expects.
+    Columns stay Arrow-backed, so the comments never become Python strings.
+    """
+    return batch.to_pandas(types_mapper=pd.ArrowDtype)
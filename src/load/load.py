@@ -1,5 +1,60 @@
 import pandas as pd
+from pathlib import Path
+
+from src.transform.category_vocabulary import load_vocabulary, category_dtypes
+from src.transform.clean_listings import HOST_SINCE_FORMAT
+from src.transform.listing_groups import load_group_index
+from src.transform.listing_aggregates import load_aggregates
 
 
 def load_csv(name_of_file: str):
     return pd.read_csv(name_of_file)
+
+
+def load_cleaned_listings(
+    processed_dir: str = "data/processed",
+) -> pd.DataFrame:
+    """
+    Load the transformed listings with their categorical and date columns.
+    The Parquet copy already holds the dtypes, the CSV gets the categories
+    back from the saved category vocabulary and the dates re-parsed.
+    """
+    processed_dir = Path(processed_dir)
+    parquet_path = processed_dir / "cleaned_listings.parquet"
+
+    if parquet_path.exists():
+        return pd.read_parquet(parquet_path)
+
+    vocabulary = load_vocabulary(processed_dir / "category_vocabulary.json")
+
+    df = pd.read_csv(
+        processed_dir / "cleaned_listings.csv",
+        dtype=category_dtypes(vocabulary),
+    )
+
+    if "host_since" in df.columns:
+        df["host_since"] = pd.to_datetime(
+            df["host_since"], format=HOST_SINCE_FORMAT, errors="coerce")
+    if "host_cohort_quarter" in df.columns:
+        df["host_cohort_quarter"] = df["host_since"].dt.to_period("Q")
+
+    return df
+
+
+def load_listing_groups(processed_dir: str = "data/processed") -> pd.DataFrame:
+    """
+    Load the listing group index saved with the transformed listings.
+    Maps each listing_group code to its neighbourhood and property type.
+    """
+    return load_group_index(Path(processed_dir) / "listing_groups.csv")
+
+
+def load_listing_aggregates(
+    processed_dir: str = "data/processed",
+) -> pd.DataFrame:
+    """
+    Load the listing metrics aggregated by neighbourhood, room type and
+    property type.
+    Pick one grouping with listing_aggregates.select_grouping_set.
+    """
+    return load_aggregates(Path(processed_dir) / "listing_aggregates.csv")
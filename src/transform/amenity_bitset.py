@@ -0,0 +1,167 @@
+# Amenities are a list of names per listing. Besides the list column, the
+# transform stage encodes them against a global amenity vocabulary as a packed
+# multi-hot bitset: one row per listing, one bit per amenity (np.packbits
+# order), so 100 amenities take 13 bytes per listing. "Listings with amenity X
+# and Y" is then a bitwise AND over the whole matrix. The bitset is saved next
+# to the cleaned output. Names are normalised the same way as in the amenity
+# index, so both agree on what counts as one amenity.
+
+import re
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pathlib import Path
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("transform_listings", "transform_listings.log")
+
+AMENITY_BITSET_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "processed" / "amenities.npz"
+)
+
+# Every amenity name with the row it belongs to, from either the raw amenities
+# text ('["Wifi", "TV"]') or the cleaned list column. Arrow kernels do the
+# whole column at once: brackets and quotes removed, split on commas, items
+# stripped, empty ones dropped.
+
+
+def amenity_items(amenities):
+    values = pa.array(amenities, from_pandas=True)
+
+    if pa.types.is_list(values.type) or pa.types.is_large_list(values.type):
+        values = values.cast(pa.large_list(pa.large_string()))
+        parents = pc.list_parent_indices(values).to_numpy()
+        return pc.list_flatten(values), parents
+
+    text = values.cast(pa.large_string())
+    text = pc.replace_substring_regex(text.fill_null(""), r"[\[\]\"']", "")
+    items = pc.split_pattern(text, ",")
+
+    flat = pc.utf8_trim_whitespace(pc.list_flatten(items))
+    parents = pc.list_parent_indices(items)
+    keep = pc.greater(pc.utf8_length(flat), 0)
+
+    return flat.filter(keep), parents.filter(keep).to_numpy()
+
+# Lower case, no outer spaces and single spaces inside, so "Self  check-in" and
+# "self check-in" are the same amenity
+
+
+def normalise_amenity(name):
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+# Same normalisation for a whole Arrow array of names
+
+
+def normalise_amenities(names):
+    names = pc.utf8_lower(names)
+
+    return pc.utf8_trim_whitespace(
+        pc.replace_substring_regex(names, r"\s+", " "))
+
+# amenity_items with the names normalised. Only the distinct spellings are
+# normalised, then taken back out to the rows.
+
+
+def normalised_amenity_items(amenities):
+    flat, parents = amenity_items(amenities)
+    encoded = pc.dictionary_encode(flat)
+    names = normalise_amenities(encoded.dictionary)
+
+    return pc.take(names, encoded.indices), parents
+
+# Returns the packed bitset (uint8, one row per listing) and the vocabulary its
+# bits refer to. With a given vocabulary, amenities outside it are left out.
+
+
+def encode_amenities(amenities, vocabulary=None):
+    flat, parents = normalised_amenity_items(amenities)
+    if vocabulary is None:
+        # Sorted so the bit positions do not depend on row order
+        vocabulary = sorted(pc.unique(flat).to_pylist())
+    else:
+        vocabulary = [normalise_amenity(name) for name in vocabulary]
+
+    codes = pc.index_in(flat, pa.array(vocabulary, type=pa.large_string()))
+    known = pc.is_valid(codes)
+    codes = codes.filter(known).to_numpy().astype(np.int64)
+    parents = parents[known.to_numpy(zero_copy_only=False)]
+
+    width = (len(vocabulary) + 7) // 8
+    bits = np.zeros((len(amenities), width), dtype=np.uint8)
+    np.bitwise_or.at(
+        bits, (parents, codes >> 3), (0x80 >> (codes & 7)).astype(np.uint8))
+
+    return bits, vocabulary
+
+# The bit pattern of a set of amenities, the same width as a bitset row
+
+
+def amenity_mask(vocabulary, names):
+    positions = {name: position for position, name in enumerate(vocabulary)}
+    names = [normalise_amenity(name) for name in names]
+    missing = [name for name in names if name not in positions]
+    if missing:
+        raise KeyError(f"Amenities not in the vocabulary: {missing}")
+
+    one_hot = np.zeros(len(vocabulary), dtype=bool)
+    one_hot[[positions[name] for name in names]] = True
+
+    return np.packbits(one_hot)
+
+# Boolean mask of the listings that have all of (or any of) the given amenities
+
+
+def has_amenities(bits, vocabulary, names, match="all"):
+    mask = amenity_mask(vocabulary, names)
+    overlap = bits & mask
+
+    if match == "any":
+        return overlap.any(axis=1)
+
+    return (overlap == mask).all(axis=1)
+
+# Back to one list of names per listing
+
+
+def decode_amenities(bits, vocabulary):
+    one_hot = np.unpackbits(bits, axis=1, count=len(vocabulary)).astype(bool)
+    names = np.array(vocabulary, dtype=object)
+
+    return [list(names[row]) for row in one_hot]
+
+
+def save_amenity_bitset(data, bitset_path=None):
+    if "amenities" not in data.columns:
+        return
+
+    bitset_path = Path(bitset_path or AMENITY_BITSET_PATH)
+    bitset_path.parent.mkdir(parents=True, exist_ok=True)
+
+    bits, vocabulary = encode_amenities(data["amenities"])
+    np.savez_compressed(
+        bitset_path,
+        id=data["id"].to_numpy(dtype="int64"),
+        bits=bits,
+        vocabulary=np.array(vocabulary, dtype=str),
+    )
+
+    logger.info(
+        f"Amenity bitset saved: {bitset_path} "
+        f"({len(vocabulary)} amenities, {bits.nbytes / 1024 ** 2:.2f} MB)"
+    )
+
+# Returns {"id": listing ids, "bits": bitset rows in the same order,
+# "vocabulary": names}
+
+
+def load_amenity_bitset(bitset_path=None):
+    bitset_path = Path(bitset_path or AMENITY_BITSET_PATH)
+
+    with np.load(bitset_path) as saved:
+        return {
+            "id": saved["id"],
+            "bits": saved["bits"],
+            "vocabulary": saved["vocabulary"].tolist(),
+        }
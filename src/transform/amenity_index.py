@@ -0,0 +1,165 @@
+# Inverted index from each amenity to the listings that have it. Amenity names
+# are normalised (lower case, single spaces) and every name keeps a sorted
+# postings list of row positions in the cleaned output, stored CSR style: all
+# postings end to end in one array, with offsets marking where each amenity's
+# list starts. A query intersects the postings of the amenities asked for,
+# shortest first, and only applies the column filters to the rows left over.
+
+import numpy as np
+import pyarrow.compute as pc
+from pathlib import Path
+from src.transform.amenity_bitset import (
+    amenity_items,
+    normalise_amenity,
+    normalise_amenities,
+)
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("transform_listings", "transform_listings.log")
+
+AMENITY_INDEX_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "processed" / "amenity_index.npz"
+)
+
+# Builds {"vocabulary": normalised names (sorted), "offsets": where each
+# name's postings start, "positions": the row positions}, with one posting per
+# listing and amenity
+
+
+def build_amenity_index(amenities):
+    flat, parents = amenity_items(amenities)
+
+    # Only the distinct spellings are normalised, then mapped onto the names
+    encoded = pc.dictionary_encode(flat)
+    normalised = normalise_amenities(encoded.dictionary)
+    vocabulary, spelling_codes = np.unique(
+        normalised.to_numpy(zero_copy_only=False).astype(str),
+        return_inverse=True)
+    vocabulary = vocabulary.tolist()
+
+    # Narrow codes so the stable sort can use a radix sort
+    narrow = len(vocabulary) <= np.iinfo(np.int16).max
+    code_dtype = np.int16 if narrow else np.int32
+    codes = spelling_codes.astype(code_dtype)[encoded.indices.to_numpy()]
+
+    # parents are already ascending, a stable sort by amenity keeps them so
+    order = np.argsort(codes, kind="stable")
+    codes, positions = codes[order], parents[order]
+
+    # A listing that names an amenity twice is posted once
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])
+    codes, positions = codes[first], positions[first]
+
+    counts = np.bincount(codes, minlength=len(vocabulary))
+
+    return {
+        "vocabulary": vocabulary,
+        "offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        "positions": positions.astype(np.int32),
+    }
+
+# Row positions of the listings with this amenity (empty when nobody has it)
+
+
+def postings(index, name):
+    vocabulary = index["vocabulary"]
+    name = normalise_amenity(name)
+    code = np.searchsorted(vocabulary, name)
+
+    if code == len(vocabulary) or vocabulary[code] != name:
+        return np.empty(0, dtype=np.int32)
+
+    start, end = index["offsets"][code], index["offsets"][code + 1]
+
+    return index["positions"][start:end]
+
+# Rows that have every one of the amenities, intersected shortest list first
+
+
+def intersect_postings(index, names):
+    lists = sorted((postings(index, name) for name in names), key=len)
+
+    rows = lists[0]
+    for other in lists[1:]:
+        if len(rows) == 0:
+            break
+        rows = np.intersect1d(rows, other, assume_unique=True)
+
+    return rows
+
+# Keeps the rows matching every filter. A filter is either a value (equality),
+# a list of values (any of them) or a (low, high) range where None means open.
+
+
+def filter_rows(df, rows, filters):
+    keep = np.ones(len(rows), dtype=bool)
+
+    for col, wanted in filters.items():
+        values = df[col].iloc[rows]
+
+        if isinstance(wanted, tuple):
+            low, high = wanted
+            if low is not None:
+                keep &= (values >= low).fillna(False).to_numpy(dtype=bool)
+            if high is not None:
+                keep &= (values <= high).fillna(False).to_numpy(dtype=bool)
+        elif isinstance(wanted, list):
+            keep &= values.isin(wanted).to_numpy(dtype=bool)
+        else:
+            keep &= (values == wanted).fillna(False).to_numpy(dtype=bool)
+
+    return rows[keep]
+
+# The listings with all of the given amenities that also pass the filters, e.g.
+# query_listings(df, index, ["Dishwasher", "Self check-in"],
+#                neighbourhood_cleansed="Hackney", price=(None, 120))
+# df is the cleaned output the index was built from (same row order).
+
+
+def query_listings(df, index, amenities=(), **filters):
+    rows = (
+        intersect_postings(index, amenities) if amenities
+        else np.arange(len(df), dtype=np.int32)
+    )
+    rows = filter_rows(df, rows, filters)
+
+    return df.iloc[rows]
+
+
+# index is the amenity index of data, built here when not given
+
+
+def save_amenity_index(data, index_path=None, index=None):
+    if "amenities" not in data.columns:
+        return
+
+    index_path = Path(index_path or AMENITY_INDEX_PATH)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if index is None:
+        index = build_amenity_index(data["amenities"])
+    np.savez_compressed(
+        index_path,
+        vocabulary=np.array(index["vocabulary"], dtype=str),
+        offsets=index["offsets"],
+        positions=index["positions"],
+    )
+
+    logger.info(
+        f"Amenity index saved: {index_path} "
+        f"({len(index['vocabulary'])} amenities, "
+        f"{len(index['positions'])} postings)"
+    )
+
+
+def load_amenity_index(index_path=None):
+    index_path = Path(index_path or AMENITY_INDEX_PATH)
+
+    with np.load(index_path) as saved:
+        return {
+            "vocabulary": saved["vocabulary"].tolist(),
+            "offsets": saved["offsets"],
+            "positions": saved["positions"],
+        }
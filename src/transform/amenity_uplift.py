@@ -0,0 +1,129 @@
+# Which amenities go with higher revenue in each neighbourhood. The amenity
+# index is a sparse listing x amenity matrix (postings per amenity), so the
+# revenue sum and listing count of every (amenity, neighbourhood) cell come
+# from weighted bincounts over the postings, a block of amenities at a time,
+# rather than a groupby per amenity. Listings without the amenity are the
+# neighbourhood total minus those with it.
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.transform.amenity_index import build_amenity_index
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("transform_listings", "transform_listings.log")
+
+AMENITY_UPLIFT_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "processed" / "amenity_uplift.csv"
+)
+
+# Both sides of a comparison need this many listings, so a couple of listings
+# with an unusual amenity do not top the table
+MIN_LISTINGS = 10
+
+# Amenities per block of bincounts, the cells of a block are amenities x groups
+BATCH_SIZE = 64
+
+# Revenue sums and listing counts per (amenity, group) cell, one block of
+# amenities at a time. groups are codes 0..n_groups-1, rows to leave out have
+# code n_groups.
+
+
+def amenity_group_totals(
+    index, groups, values, n_groups, batch_size=BATCH_SIZE
+):
+    offsets, positions = index["offsets"], index["positions"]
+    n_amenities = len(index["vocabulary"])
+    width = n_groups + 1
+
+    sums = np.zeros((n_amenities, width))
+    counts = np.zeros((n_amenities, width), dtype=np.int64)
+
+    for start in range(0, n_amenities, batch_size):
+        stop = min(start + batch_size, n_amenities)
+        rows = positions[offsets[start]:offsets[stop]]
+        amenity = np.repeat(
+            np.arange(stop - start), np.diff(offsets[start:stop + 1]))
+
+        cells = amenity * width + groups[rows]
+        size = (stop - start) * width
+        sums[start:stop] = np.bincount(
+            cells, weights=values[rows], minlength=size).reshape(-1, width)
+        counts[start:stop] = np.bincount(
+            cells, minlength=size).reshape(-1, width)
+
+    return sums[:, :n_groups], counts[:, :n_groups]
+
+# Mean revenue of the listings with each amenity against the listings without
+# it, per neighbourhood, ranked from the biggest uplift down within each
+# neighbourhood. index is the amenity index of df (same row order), built
+# here when not given.
+
+
+def amenity_uplift(
+    df,
+    index=None,
+    value="estimated_revenue_l365d",
+    by="neighbourhood_cleansed",
+    min_listings=MIN_LISTINGS,
+    batch_size=BATCH_SIZE,
+):
+    if index is None:
+        index = build_amenity_index(df["amenities"])
+
+    codes, names = pd.factorize(df[by], sort=True)
+    values = df[value].to_numpy(dtype="float64", na_value=np.nan)
+
+    # Rows without a neighbourhood or a revenue go to the extra group n_groups
+    n_groups = len(names)
+    keep = (codes >= 0) & ~np.isnan(values)
+    groups = np.where(keep, codes, n_groups)
+    values = np.where(keep, values, 0.0)
+
+    group_sums = np.bincount(
+        groups, weights=values, minlength=n_groups + 1)[:n_groups]
+    group_counts = np.bincount(groups, minlength=n_groups + 1)[:n_groups]
+
+    with_sums, with_counts = amenity_group_totals(
+        index, groups, values, n_groups, batch_size)
+    without_sums = group_sums - with_sums
+    without_counts = group_counts - with_counts
+
+    amenity, group = np.nonzero(
+        (with_counts >= min_listings) & (without_counts >= min_listings))
+    cells = (amenity, group)
+    mean_with = with_sums[cells] / with_counts[cells]
+    mean_without = without_sums[cells] / without_counts[cells]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        uplift_pct = (mean_with / mean_without - 1) * 100
+
+    uplift = pd.DataFrame({
+        by: np.asarray(names)[group],
+        "amenity": np.asarray(index["vocabulary"], dtype=object)[amenity],
+        "listings_with": with_counts[amenity, group],
+        "listings_without": without_counts[amenity, group],
+        "mean_revenue_with": mean_with,
+        "mean_revenue_without": mean_without,
+        "uplift": mean_with - mean_without,
+        "uplift_pct": uplift_pct,
+    })
+    uplift = uplift.sort_values(
+        [by, "uplift"], ascending=[True, False], ignore_index=True)
+    uplift["rank"] = uplift.groupby(by).cumcount() + 1
+
+    return uplift
+
+
+# index is the amenity index of data, built here when not given
+
+
+def save_amenity_uplift(data, uplift_path=None, index=None):
+    if not {"amenities", "estimated_revenue_l365d"} <= set(data.columns):
+        return
+
+    uplift_path = Path(uplift_path or AMENITY_UPLIFT_PATH)
+    uplift_path.parent.mkdir(parents=True, exist_ok=True)
+    amenity_uplift(data, index).to_csv(uplift_path, index=False)
+
+    logger.info(f"Amenity uplift table saved: {uplift_path}")
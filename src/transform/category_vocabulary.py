@@ -0,0 +1,106 @@
+# Low-cardinality text columns are stored as categoricals. Their categories
+# come from a vocabulary that is saved next to the cleaned output and only
+# ever grows: known values keep their position (and so their code), new
+# values are appended. Every run, chunk and output file therefore agrees on
+# the codes, and pandas never falls back to object columns when concatenating.
+
+import os
+import json
+from pathlib import Path
+import pandas as pd
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("clean_listings", "clean_listings.log")
+
+CATEGORY_COLUMNS = [
+    "property_type", "room_type", "neighbourhood_cleansed",
+    "host_response_time",
+]
+
+VOCABULARY_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "processed" / "category_vocabulary.json"
+)
+
+# Reads the saved vocabulary as {column: [categories]}, empty on the first run
+
+
+def load_vocabulary(vocabulary_path=None):
+    vocabulary_path = Path(vocabulary_path or VOCABULARY_PATH)
+
+    if not vocabulary_path.exists():
+        return {}
+
+    return json.loads(vocabulary_path.read_text())
+
+# Writes through a temporary file so a crash never leaves half a vocabulary
+
+
+def save_vocabulary(vocabulary, vocabulary_path=None):
+    vocabulary_path = Path(vocabulary_path or VOCABULARY_PATH)
+    vocabulary_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = vocabulary_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(vocabulary, indent=2))
+    os.replace(tmp_path, vocabulary_path)
+
+    logger.info(f"Category vocabulary saved: {vocabulary_path}")
+
+# Only the values seen in the data, without hashing every row when it is
+# already categorical
+
+
+def observed_values(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.remove_unused_categories().cat.categories
+
+    return column.dropna().unique()
+
+# Appends values that are not in the vocabulary yet (sorted, so the result
+# does not depend on row order). Updates the vocabulary in place and returns
+# it.
+
+
+def update_vocabulary(vocabulary, df):
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns:
+            continue
+
+        known = vocabulary.setdefault(col, [])
+        known_set = set(known)
+        new_values = sorted(
+            str(value) for value in observed_values(df[col])
+            if str(value) not in known_set
+        )
+
+        if new_values:
+            logger.info(f"{len(new_values)} new categories for {col}")
+            known.extend(new_values)
+
+    return vocabulary
+
+
+def category_dtypes(vocabulary):
+    return {
+        col: pd.CategoricalDtype(categories)
+        for col, categories in vocabulary.items()
+    }
+
+# Casts the category columns to the vocabulary's categories
+
+
+def apply_vocabulary(df, vocabulary):
+    dtypes = {
+        col: dtype for col, dtype in category_dtypes(vocabulary).items()
+        if col in df.columns
+    }
+
+    return df.astype(dtypes)
+
+# Concatenates chunks that were encoded while the vocabulary was still growing.
+# Earlier chunks hold a prefix of the final categories, so they are cast to the
+# final vocabulary first and the categorical columns survive the concat.
+
+
+def concat_with_vocabulary(frames, vocabulary):
+    return pd.concat([apply_vocabulary(frame, vocabulary) for frame in frames])
@@ -6,6 +6,11 @@
 import pandas as pd
 import numpy as np
 from src.utils.logging_utils import setup_logger
+from src.utils.dtype_utils import DEFAULT_DTYPE_BACKEND, backend_dtype
+from src.utils.column_utils import COL_FOR_INSIGHTS
+from src.transform.category_vocabulary import (
+    update_vocabulary, apply_vocabulary
+)
 
 logger = setup_logger("clean_listings", "clean_listings.log")
 
@@ -13,94 +18,176 @@ logger = setup_logger("clean_listings", "clean_listings.log")
 
 
 def filter_columns(df):
-    col_for_insights = [
-        'id', 'property_type', 'room_type',
-        'price', 'estimated_revenue_l365d',
-        'accommodates', 'beds', 'bedrooms', 'bathrooms',
-        'review_scores_rating', 'number_of_reviews', 'reviews_per_month',
-        'availability_365', 'host_response_rate', 'host_response_time', 'host_since',
-        'amenities', 'minimum_nights', 'maximum_nights',
-        'latitude', 'longitude', 'neighbourhood_cleansed',
-        'host_total_listings_count', 'host_is_superhost',
-        'review_scores_cleanliness', 'review_scores_value', 'host_acceptance_rate'
-    ]
-
-    filtered_df = df[col_for_insights]
+    filtered_df = df[COL_FOR_INSIGHTS]
 
     return filtered_df
 
-# Converts object dtype columns to string dtype
+# Converts object dtype columns to string dtype (string[pyarrow] with the
+# pyarrow backend)
 
 
-def convert_objects_to_string(df):
+def convert_objects_to_string(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
     obj_cols = df.select_dtypes(include="object").columns
-    df[obj_cols] = df[obj_cols].astype("string")
+    if dtype_backend != DEFAULT_DTYPE_BACKEND:
+        # Strings that were read into python memory are moved to Arrow too
+        obj_cols = obj_cols.union(
+            df.select_dtypes(include="string").columns, sort=False)
+    df[obj_cols] = df[obj_cols].astype(backend_dtype("string", dtype_backend))
 
     return df
 
-# Converts price column to integer
+# Moves the numeric columns to Arrow memory, only used with the pyarrow backend
 
 
-def convert_price_to_int(df):
-    if "price" in df.columns:
-        df["price"] = pd.to_numeric(
-            df["price"].astype("string")
-            .str.replace(r"[^\d.]", "", regex=True),
-            errors="coerce").astype("Int64")
+def convert_numbers_to_backend(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    if dtype_backend == DEFAULT_DTYPE_BACKEND:
+        return df
 
-    return df
+    for col in df.select_dtypes(include="number").columns:
+        if isinstance(df[col].dtype, pd.ArrowDtype):
+            continue
+        kind = "int" if pd.api.types.is_integer_dtype(df[col]) else "float"
+        df[col] = df[col].astype(backend_dtype(kind, dtype_backend))
 
-# Converts beds and bedrooms into integer
+    return df
 
 
-def convert_bed_columns_to_int(df):
-    for col in ["beds", "bedrooms"]:
+# How each numeric column is parsed: the characters removed first
+# ("$1,234.00" -> "1234.00", "97%" -> "97"), whether unparseable values become
+# NA, and whether fractions are cut off. Prices are kept in whole currency
+# units, beds and rates have to be whole numbers already.
+NUMERIC_COLUMNS = {
+    "price": {"strip": r"[^\d.]", "errors": "coerce", "truncate": True},
+    "host_response_rate": {"strip": "%"},
+    "host_acceptance_rate": {"strip": "%"},
+    "beds": {},
+    "bedrooms": {},
+}
+
+# Parses a text (or already numeric) column into numbers in one pass.
+# Like the boolean flags, these columns repeat a small set of values, so only
+# the distinct values are cleaned and cast, and the rows are filled from them
+# by code. Filling the rows allocates the result array, everything before it
+# is the size of the uniques.
+
+
+def parse_numeric_column(
+    series, strip=None, dtype="Int64", errors="raise", truncate=False
+):
+    codes, uniques = series.factorize()
+    values = pd.Series(uniques)
+
+    if not pd.api.types.is_numeric_dtype(values):
+        text = values.astype("string")
+        if strip:
+            text = text.str.replace(strip, "", regex=True)
+        values = pd.to_numeric(
+            text.replace("", np.nan), errors=errors).astype("float64")
+
+    if truncate:
+        values = np.trunc(values)
+
+    # The integer cast refuses fractions (1.5 beds is an error, not 1).
+    # Missing values (code -1) pick the extra NA slot at the end, like
+    # parse_bool_column.
+    values = values.astype(dtype)
+    values = values.reindex(range(len(values) + 1))
+    result = values.iloc[codes].array
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+# Parses every numeric column that is present. dtypes overrides the output
+# dtype per column, by default they are integers of the dtype backend.
+
+
+def convert_numeric_columns(
+    df, dtype_backend=DEFAULT_DTYPE_BACKEND, dtypes=None
+):
+    dtypes = dtypes or {}
+    default_dtype = backend_dtype("int", dtype_backend)
+
+    for col, options in NUMERIC_COLUMNS.items():
         if col in df.columns:
-            df[col] = (
-                df[col].astype("string").replace("", np.nan)
-                .astype("float").astype("Int64")
-            )
+            df[col] = parse_numeric_column(
+                df[col], dtype=dtypes.get(col, default_dtype), **options)
 
     return df
 
-# Converts host response & acceptance rate to integer from string percentage "97%"
 
+# Inside Airbnb writes host_since as a plain date
+HOST_SINCE_FORMAT = "%Y-%m-%d"
 
-def convert_rates_to_int(df):
-    for col in ["host_response_rate", "host_acceptance_rate"]:
-        if col in df.columns:
-            df[col] = (
-                df[col].astype("string")
-                .str.replace("%", "", regex=False)
-                .replace("", np.nan).astype("float").astype("Int64")
-            )
+# Converts host_since column into datetime. It stays datetime64 with either
+# dtype backend, it is already 8 bytes per row and Arrow timestamps do not
+# support all of the date arithmetic the tenure features need.
+
+
+def convert_host_since(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    if "host_since" in df.columns:
+        df["host_since"] = pd.to_datetime(
+            df["host_since"], format=HOST_SINCE_FORMAT, errors="coerce")
 
     return df
 
-# Converts host_since column into datetime
 
+# Inside Airbnb writes its flags as t/f, older snapshots and other sources use
+# true/yes/y etc.
+TRUE_VALUES = ["t", "true", "yes", "y"]
+FALSE_VALUES = ["f", "false", "no", "n"]
 
-def convert_host_since(df):
-    if "host_since" in df.columns:
-        df["host_since"] = (
-            pd.to_datetime(df["host_since"], errors="coerce")
-            .dt.strftime("%Y-%m-%d")    # remove time component
-        )
-    return df
+# Boolean flag columns parsed by convert_bool_flags, the flags kept by
+# COL_FOR_INSIGHTS
+BOOL_COLUMNS = ["host_is_superhost"]
+
+# Parses a column of t/f (or any other way of specifying) into booleans,
+# anything else becomes NA. A flag column only has a handful of distinct
+# values, so each of them is parsed once and the results are spread back to
+# the rows by their factorize codes.
+
+
+def parse_bool_column(series, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    # Mixed objects are compared as text, else 1 and True would share a code
+    if series.dtype == object and (
+        pd.api.types.infer_dtype(series) not in ("string", "empty")
+    ):
+        series = series.astype(str)
+
+    codes, uniques = pd.factorize(series)
+    normalised = pd.Index(uniques).astype(str).str.strip().str.lower()
 
-# Checks each indiividual value to see if it has t or f (or any other way of specifying)
+    # 1 = true, 0 = false, -1 = not a boolean. Missing values (code -1) pick
+    # the last slot
+    parsed = np.select(
+        [normalised.isin(TRUE_VALUES), normalised.isin(FALSE_VALUES)],
+        [1, 0], -1)
+    values = np.append(parsed, -1)[codes]
 
+    result = pd.arrays.BooleanArray(values == 1, values == -1)
 
-def convert_superhost_to_bool(df):
-    if "host_is_superhost" in df.columns:
-        df["host_is_superhost"] = df["host_is_superhost"].apply(
-            lambda x: True if str(x).strip().lower() in ["t", "true", "yes", "y"]
-            else False if str(x).strip().lower() in ["f", "false", "no", "n"]
-            else pd.NA
-        ).astype("boolean")
+    return pd.Series(result, index=series.index, name=series.name).astype(
+        backend_dtype("bool", dtype_backend))
+
+# Converts the boolean flag columns that are present
+
+
+def convert_bool_flags(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    for col in BOOL_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_bool_column(df[col], dtype_backend)
 
     return df
 
+# Encodes property_type, room_type, neighbourhood_cleansed and
+# host_response_time as categoricals. Without a vocabulary the categories come
+# from this data only.
+
+
+def convert_to_categories(df, vocabulary=None):
+    vocabulary = update_vocabulary(
+        {} if vocabulary is None else vocabulary, df)
+
+    return apply_vocabulary(df, vocabulary)
+
 
 OUTPUT_DIR = "data/processed"
 FILE_NAME = "cleaned_listings.csv"
@@ -112,22 +199,33 @@ def drop_missing_superhost(df):
     return df.dropna(subset=["host_is_superhost"])
 
 # here we apply all the transformations in one go using a wrapper function.
-
-
-def clean_listings(df: pd.DataFrame) -> pd.DataFrame:
-    clean_df = df.copy()
-
+# dtype_backend="pyarrow" gives Arrow-backed strings, ints and booleans
+# throughout.
+# vocabulary is the persisted category vocabulary (see category_vocabulary),
+# new values are added to it.
+# copy=False projects first instead of copying the whole raw frame, meant to
+# run under copy_on_write (see memory_utils) so the untouched columns share
+# memory with df.
+
+
+def clean_listings(
+    df: pd.DataFrame,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+    vocabulary: dict = None,
+    copy: bool = True,
+) -> pd.DataFrame:
     logger.info("Started Cleaning...")
-    logger.info(f"Data Types (Before Cleaning): {clean_df.dtypes}\n")
-    logger.info(f"Shape (Before Cleaning): {clean_df.shape}")
-
-    clean_df = filter_columns(clean_df)
-    clean_df = convert_objects_to_string(clean_df)
-    clean_df = convert_price_to_int(clean_df)
-    clean_df = convert_bed_columns_to_int(clean_df)
-    clean_df = convert_rates_to_int(clean_df)
-    clean_df = convert_host_since(clean_df)
-    clean_df = convert_superhost_to_bool(clean_df)
+    logger.info(f"Data Types (Before Cleaning): {df.dtypes}\n")
+    logger.info(f"Shape (Before Cleaning): {df.shape}")
+
+    clean_df = filter_columns(df.copy() if copy else df)
+    # Encoded first so these columns skip the string conversion
+    clean_df = convert_to_categories(clean_df, vocabulary)
+    clean_df = convert_objects_to_string(clean_df, dtype_backend)
+    clean_df = convert_numbers_to_backend(clean_df, dtype_backend)
+    clean_df = convert_numeric_columns(clean_df, dtype_backend)
+    clean_df = convert_host_since(clean_df, dtype_backend)
+    clean_df = convert_bool_flags(clean_df, dtype_backend)
 
     clean_df = drop_missing_superhost(clean_df)
 
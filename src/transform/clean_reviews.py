@@ -0,0 +1,172 @@
+# The reviews file has one row per review, millions for a city like London.
+# It is never loaded in one go: every chunk is reduced to per-listing totals
+# which are merged into a running result, so memory depends on the number
+# of listings and not on the number of reviews.
+
+import numpy as np
+import pandas as pd
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("clean_reviews", "clean_reviews.log")
+
+# Only the most recent months of per-month counts are kept per listing
+VELOCITY_MONTHS = 12
+
+# How each per-listing total is merged across chunks
+LISTING_TOTALS = {
+    "reviews_total": "sum",
+    "first_review": "min",
+    "last_review": "max",
+    "length_sum": "sum",
+    "length_sum_sq": "sum",
+    "comment_length_max": "max",
+}
+
+# Months are numbered (year * 12 + month) so they can be compared as integers
+
+
+def month_number(dates):
+    return dates.dt.year * 12 + dates.dt.month - 1
+
+# Reduces one chunk of reviews to per-listing totals and per-listing monthly
+# counts
+
+
+def review_partials(chunk):
+    dates = pd.to_datetime(
+        chunk["date"], format="%Y-%m-%d", errors="coerce")
+    length = chunk["comments"].fillna("").str.len().astype("int64")
+
+    frame = pd.DataFrame({
+        "listing_id": chunk["listing_id"].to_numpy(),
+        "reviews_total": 1,
+        "first_review": dates.to_numpy(),
+        "last_review": dates.to_numpy(),
+        "length_sum": length.to_numpy(),
+        "length_sum_sq": (length ** 2).to_numpy(),
+        "comment_length_max": length.to_numpy(),
+        "month": month_number(dates).to_numpy(),
+    })
+
+    totals = frame.groupby("listing_id").agg(LISTING_TOTALS)
+
+    monthly = (
+        frame.dropna(subset=["month"])
+        .astype({"month": "int64"})
+        .groupby(["listing_id", "month"]).size()
+        .rename("reviews")
+    )
+
+    return totals, monthly
+
+# Adds a chunk's partials to the running totals (None for the first chunk)
+# and drops monthly counts too old to ever fall inside the trailing window
+# ending at window_end
+
+
+def merge_review_partials(merged, partials, window_end):
+    if merged is None:
+        totals, monthly = partials
+    else:
+        totals = (
+            pd.concat([merged[0], partials[0]])
+            .groupby(level=0).agg(LISTING_TOTALS)
+        )
+        monthly = (
+            pd.concat([merged[1], partials[1]])
+            .groupby(level=[0, 1]).sum()
+        )
+
+    months = monthly.index.get_level_values("month")
+    monthly = monthly[months > window_end - VELOCITY_MONTHS]
+
+    return totals, monthly
+
+# Turns the merged totals into the features joined onto the listings
+
+
+def summarise_reviews(totals, monthly, as_of):
+    as_of_month = as_of.year * 12 + as_of.month - 1
+    first_month = month_number(totals["first_review"])
+
+    months = monthly.index.get_level_values("month")
+    in_window = (
+        (months > as_of_month - VELOCITY_MONTHS) & (months <= as_of_month)
+    )
+    last_12m = (
+        monthly[in_window].groupby(level="listing_id").sum()
+        .reindex(totals.index, fill_value=0)
+    )
+
+    # Reviews per month since the first review, counting the current month
+    active_months = (as_of_month - first_month + 1).clip(lower=1)
+
+    length_mean = totals["length_sum"] / totals["reviews_total"]
+    length_var = (
+        totals["length_sum_sq"] / totals["reviews_total"] - length_mean ** 2
+    )
+
+    return pd.DataFrame({
+        "reviews_total": totals["reviews_total"],
+        "reviews_last_12m": last_12m,
+        "review_velocity": (
+            totals["reviews_total"] / active_months
+        ).round(3),
+        "days_since_last_review": (as_of - totals["last_review"]).dt.days,
+        "comment_length_mean": length_mean.round(1),
+        "comment_length_std": np.sqrt(length_var.clip(lower=0)).round(1),
+        "comment_length_max": totals["comment_length_max"],
+    })
+
+# Running state of the review aggregation: the merged partials, the latest
+# review month seen so far and the number of reviews read. Kept in a dict so
+# chunks can be added one at a time while the same stream feeds something
+# else (see extract.extract_aggregates, which scores sentiment from the same
+# batches).
+
+
+def new_review_totals():
+    return {"merged": None, "latest_month": None, "rows": 0}
+
+# Adds one chunk of reviews to the running totals
+
+
+def add_review_chunk(totals, chunk, as_of=None):
+    totals["rows"] += len(chunk)
+    partials = review_partials(chunk)
+
+    chunk_latest = partials[0]["last_review"].max()
+    if pd.notna(chunk_latest):
+        chunk_month = chunk_latest.year * 12 + chunk_latest.month - 1
+        totals["latest_month"] = max(
+            totals["latest_month"] or chunk_month, chunk_month)
+
+    if as_of is not None:
+        as_of = pd.Timestamp(as_of)
+        window_end = as_of.year * 12 + as_of.month - 1
+    else:
+        window_end = totals["latest_month"] or 0
+
+    totals["merged"] = merge_review_partials(
+        totals["merged"], partials, window_end)
+
+# Turns the running totals into the per-listing review features
+
+
+def finish_reviews(totals, as_of=None) -> pd.DataFrame:
+    if totals["merged"] is None:
+        raise ValueError("Reviews file contains no rows")
+
+    listing_totals, monthly = totals["merged"]
+    as_of = (
+        pd.Timestamp(as_of) if as_of is not None
+        else listing_totals["last_review"].max()
+    )
+
+    reviews = summarise_reviews(listing_totals, monthly, as_of)
+    logger.info(
+        f"Aggregated {totals['rows']} reviews into {len(reviews)} listings "
+        f"(as of {as_of.date()})"
+    )
+
+    return reviews
@@ -0,0 +1,116 @@
+# Most numeric listing columns are small counts, percentages and scores stored
+# as 64-bit numbers. This optional stage runs after clean_listings and moves
+# each of them to the smallest dtype that still holds every observed value.
+
+import numpy as np
+import pandas as pd
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("downcast_listings", "downcast_listings.log")
+
+# Identifiers are joined against the calendar and reviews aggregates, they
+# stay int64
+DOWNCAST_EXCLUDE = ["id"]
+
+INT_CANDIDATES = ["int8", "int16", "int32"]
+
+# A float column only moves to float32 when no value changes by more than this
+FLOAT_TOLERANCE = 1e-4
+
+# Keeps the column's kind of dtype: numpy stays numpy, Int64 becomes Int16,
+# int64[pyarrow] becomes int16[pyarrow]
+
+
+def same_family_dtype(dtype, name):
+    if isinstance(dtype, pd.ArrowDtype):
+        return f"{name}[pyarrow]"
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return name.capitalize()
+
+    return name
+
+# The smallest integer dtype whose range is at least twice the observed range,
+# so the transformations can still add one column to another (or 1 to a value)
+# safely
+
+
+def smallest_int_dtype(series):
+    low, high = series.min(), series.max()
+    if pd.isna(low):
+        return None
+
+    for name in INT_CANDIDATES:
+        limits = np.iinfo(name)
+        if limits.min // 2 <= low and high <= limits.max // 2:
+            return same_family_dtype(series.dtype, name)
+
+    return None
+
+# float32 when every value survives the round trip within FLOAT_TOLERANCE
+
+
+def smallest_float_dtype(series, tolerance=FLOAT_TOLERANCE):
+    values = series.dropna().to_numpy(dtype="float64")
+    if len(values) == 0:
+        return None
+
+    with np.errstate(over="ignore"):
+        error = np.abs(values.astype("float32").astype("float64") - values)
+    if not np.all(error <= tolerance):
+        return None
+
+    return same_family_dtype(series.dtype, "float32")
+
+
+def smallest_dtype(series, tolerance=FLOAT_TOLERANCE):
+    if pd.api.types.is_integer_dtype(series):
+        return smallest_int_dtype(series)
+
+    return smallest_float_dtype(series, tolerance)
+
+# One row per downcast column with its dtype and memory before and after
+
+
+def memory_report(before, after):
+    columns = [
+        col for col in after.columns
+        if col in before.columns and before[col].dtype != after[col].dtype
+    ]
+
+    report = pd.DataFrame({
+        "dtype_before": before[columns].dtypes.astype(str),
+        "dtype_after": after[columns].dtypes.astype(str),
+        "mb_before": before[columns].memory_usage(index=False) / 1024 ** 2,
+        "mb_after": after[columns].memory_usage(index=False) / 1024 ** 2,
+    })
+    report.loc["total"] = [
+        "", "", report["mb_before"].sum(), report["mb_after"].sum()]
+
+    return report
+
+# Downcasts every numeric column (bool flags and DOWNCAST_EXCLUDE are left
+# alone) and logs the memory table
+
+
+def downcast_numeric_columns(df, tolerance=FLOAT_TOLERANCE):
+    numeric = [
+        col for col in df.select_dtypes(include="number").columns
+        if col not in DOWNCAST_EXCLUDE
+        and not pd.api.types.is_bool_dtype(df[col])
+    ]
+
+    dtypes = {}
+    for col in numeric:
+        dtype = smallest_dtype(df[col], tolerance)
+        if dtype is not None:
+            dtypes[col] = dtype
+
+    downcast_df = df.astype(dtypes)
+
+    report = memory_report(df, downcast_df)
+    logger.info(
+        f"Downcast {len(dtypes)} numeric columns:\n"
+        f"{report.to_string(float_format='{:.3f}'.format)}"
+    )
+
+    return downcast_df
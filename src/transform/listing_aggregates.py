@@ -0,0 +1,227 @@
+# The dashboard shows the same listing metrics (mean price, revenue, beds,
+# review score, superhost share, competitiveness, occupancy and the listing
+# count) by neighbourhood, by room type, by property type and by neighbourhood
+# x room type. This builds all of those groupings (grouping sets, as in SQL) in
+# one pass: every row gets one code for its finest cell (from the sorted codes
+# of each dimension), the metrics are summed per cell, and every coarser
+# grouping is added up from those cell sums. Means are kept as sums and counts
+# until the end, so cells merge without going back to the rows.
+
+import itertools
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("transform_listings", "transform_listings.log")
+
+AGGREGATES_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "processed" / "listing_aggregates.csv"
+)
+
+DIMENSIONS = ["neighbourhood_cleansed", "room_type", "property_type"]
+
+# The groupings the dashboard pages use, () is the whole city
+GROUPING_SETS = [
+    (),
+    ("neighbourhood_cleansed",),
+    ("room_type",),
+    ("property_type",),
+    ("neighbourhood_cleansed", "room_type"),
+]
+
+# Averaged per group (host_is_superhost averages to the superhost share)
+METRICS = [
+    "price",
+    "estimated_revenue_l365d",
+    "minimum_beds",
+    "bedrooms",
+    "bathrooms",
+    "review_scores_rating",
+    "host_is_superhost",
+    "price_competitiveness (100%)",
+    "occupancy_potential",
+]
+
+GROUPING_SET_COLUMN = "grouping_set"
+
+# Grouping sets of a rollup: (a, b, c), (a, b), (a,) and ()
+
+
+def rollup(dimensions):
+    return [
+        tuple(dimensions[:size]) for size in range(len(dimensions), -1, -1)
+    ]
+
+# Grouping sets of a cube: every subset of the dimensions
+
+
+def cube(dimensions):
+    return [
+        combination
+        for size in range(len(dimensions), -1, -1)
+        for combination in itertools.combinations(dimensions, size)
+    ]
+
+# How a grouping set is named in the table: its dimensions joined by "+" or
+# "all"
+
+
+def grouping_set_name(grouping_set):
+    return "+".join(grouping_set) or "all"
+
+# Adds up the rows of values (and how many rows there were) per key, in one
+# pass over the keys in sorted order. Returns the distinct keys, the sums and
+# the row counts. Used to roll the cells up into the coarser groupings.
+
+
+def sum_by_sorted_key(keys, values):
+    if len(keys) == 0:
+        sums = np.zeros((0, values.shape[1]))
+        return keys, sums, np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+    sums = np.add.reduceat(values[order], starts, axis=0)
+    sizes = np.diff(np.r_[starts, len(keys)])
+
+    return keys[starts], sums, sizes
+
+# Sums and non-missing counts of each metric per finest cell, one weighted
+# bincount per column. When there are more possible cells than rows, only the
+# observed cells are numbered. Returns the occupied cells (sorted), their sums
+# then counts, and sizes.
+
+
+def cell_totals(df, cells, n_cells, metrics):
+    if n_cells > len(df):
+        observed, cells = np.unique(cells, return_inverse=True)
+    else:
+        observed = np.arange(n_cells)
+
+    n_observed = len(observed)
+    sizes = np.bincount(cells, minlength=n_observed)
+    sums, counts = [], []
+    for col in metrics:
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        present = ~np.isnan(values)
+        sums.append(np.bincount(
+            cells, weights=np.where(present, values, 0.0),
+            minlength=n_observed))
+        counts.append(
+            np.bincount(cells, weights=present, minlength=n_observed))
+
+    occupied = sizes > 0
+    totals = (
+        np.column_stack(sums + counts) if metrics
+        else np.zeros((n_observed, 0))
+    )
+
+    return observed[occupied], totals[occupied], sizes[occupied]
+
+# One row per group of every grouping set with its listing count and metric
+# means. A dimension a grouping set does not use is left empty. As with
+# groupby, rows with a missing value in a dimension are left out of the groups
+# of that dimension (but still count towards the groupings that do not use it).
+
+
+def grouping_sets_aggregate(
+    df,
+    grouping_sets=GROUPING_SETS,
+    dimensions=DIMENSIONS,
+    metrics=METRICS,
+):
+    metrics = [col for col in metrics if col in df.columns]
+
+    # Sorted codes per dimension, the last code of each is "missing"
+    codes, levels = [], []
+    for dim in dimensions:
+        dim_codes, dim_levels = pd.factorize(df[dim], sort=True)
+        codes.append(np.where(dim_codes < 0, len(dim_levels), dim_codes))
+        levels.append(np.asarray(dim_levels, dtype=object))
+    shape = tuple(len(dim_levels) + 1 for dim_levels in levels)
+
+    # The pass over the rows: sums and non-missing counts per finest cell
+    cells = (
+        np.ravel_multi_index(codes, shape) if dimensions
+        else np.zeros(len(df), dtype=np.int64)
+    )
+    cells, cell_values, cell_listings = cell_totals(
+        df, cells, int(np.prod(shape)), metrics)
+    cell_codes = np.unravel_index(cells, shape) if dimensions else ()
+
+    tables = []
+    for grouping_set in grouping_sets:
+        used = [dimensions.index(dim) for dim in grouping_set]
+
+        keep = np.ones(len(cells), dtype=bool)
+        for position in used:
+            keep &= cell_codes[position] < len(levels[position])
+
+        used_shape = [shape[position] for position in used]
+        keys = (
+            np.ravel_multi_index(
+                [cell_codes[position][keep] for position in used], used_shape)
+            if used else np.zeros(keep.sum(), dtype=np.int64)
+        )
+        keys, sums, _ = sum_by_sorted_key(
+            keys, np.column_stack([cell_values[keep], cell_listings[keep]]))
+        key_codes = np.unravel_index(keys, used_shape) if used else ()
+
+        n_metrics = len(metrics)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = sums[:, :n_metrics] / sums[:, n_metrics:2 * n_metrics]
+
+        table = pd.DataFrame(
+            {GROUPING_SET_COLUMN: grouping_set_name(grouping_set)},
+            index=range(len(keys)))
+        for dim_position, dim in enumerate(dimensions):
+            table[dim] = (
+                levels[dim_position][key_codes[used.index(dim_position)]]
+                if dim_position in used else None
+            )
+        table["listings"] = sums[:, -1].astype(np.int64)
+        for metric_position, col in enumerate(metrics):
+            table[col] = means[:, metric_position]
+
+        tables.append(table)
+
+    return pd.concat(tables, ignore_index=True)
+
+# The rows of one grouping set, with just its dimensions as columns
+
+
+def select_grouping_set(aggregates, dimensions=()):
+    name = grouping_set_name(tuple(dimensions))
+    rows = aggregates[aggregates[GROUPING_SET_COLUMN] == name]
+    unused = [
+        dim for dim in DIMENSIONS
+        if dim not in dimensions and dim in rows.columns
+    ]
+    rows = rows.drop(columns=[GROUPING_SET_COLUMN] + unused)
+
+    return rows.reset_index(drop=True)
+
+
+def load_aggregates(aggregates_path=None):
+    aggregates_path = Path(aggregates_path or AGGREGATES_PATH)
+
+    return pd.read_csv(aggregates_path)
+
+
+def save_listing_aggregates(data, aggregates_path=None):
+    if not set(DIMENSIONS) <= set(data.columns):
+        return
+
+    aggregates_path = Path(aggregates_path or AGGREGATES_PATH)
+    aggregates_path.parent.mkdir(parents=True, exist_ok=True)
+
+    aggregates = grouping_sets_aggregate(data)
+    aggregates.to_csv(aggregates_path, index=False)
+
+    logger.info(
+        f"Listing aggregates saved: {aggregates_path} "
+        f"({len(aggregates)} groups)")
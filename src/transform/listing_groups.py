@@ -0,0 +1,65 @@
+# Several features compare a listing with the others of the same neighbourhood
+# and property type. The transform stage numbers those groups once
+# (listing_group) and every grouped feature groups by that integer column
+# instead of hashing the two text keys again. The group table is saved next to
+# the cleaned output so the dashboard can map a listing_group back to its
+# neighbourhood and property type.
+
+import pandas as pd
+from pathlib import Path
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("transform_listings", "transform_listings.log")
+
+GROUP_KEYS = ["neighbourhood_cleansed", "property_type"]
+GROUP_COLUMN = "listing_group"
+
+GROUP_INDEX_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "processed" / "listing_groups.csv"
+)
+
+# Numbers every observed (neighbourhood, property type) pair. With categorical
+# keys this works on the category codes. Rows with a missing key get no group.
+
+
+def add_group_codes(df):
+    codes = df.groupby(GROUP_KEYS, observed=True, sort=True).ngroup()
+    df[GROUP_COLUMN] = codes.where(codes >= 0).astype("Int32")
+
+    return df
+
+# What grouped features group by: the shared codes when they were added, the
+# key columns otherwise (so the features also work on their own)
+
+
+def group_keys(df):
+    return GROUP_COLUMN if GROUP_COLUMN in df.columns else GROUP_KEYS
+
+# One row per group with its keys and how many listings it has
+
+
+def group_index(df):
+    return (
+        df.groupby(GROUP_COLUMN, observed=True)
+        .agg(**{key: (key, "first") for key in GROUP_KEYS},
+             listings=(GROUP_KEYS[0], "size"))
+        .reset_index()
+    )
+
+
+def load_group_index(group_index_path=None):
+    group_index_path = Path(group_index_path or GROUP_INDEX_PATH)
+
+    return pd.read_csv(group_index_path, dtype={GROUP_COLUMN: "Int32"})
+
+
+def save_group_index(data, group_index_path=None):
+    if GROUP_COLUMN not in data.columns:
+        return
+
+    group_index_path = Path(group_index_path or GROUP_INDEX_PATH)
+    group_index_path.parent.mkdir(parents=True, exist_ok=True)
+    group_index(data).to_csv(group_index_path, index=False)
+
+    logger.info(f"Listing group index saved: {group_index_path}")
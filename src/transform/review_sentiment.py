@@ -0,0 +1,176 @@
+# Scores every review comment against a local word lexicon and reduces the
+# scores to a per-listing mean and standard deviation.
+# Comments are tokenised a whole batch at a time with pyarrow compute kernels,
+# and batches are scored in worker processes. Every batch is reduced to
+# per-listing sums, so the results can be merged in any order.
+
+import timeit
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.utils.logging_utils import setup_logger
+
+logger = setup_logger("review_sentiment", "review_sentiment.log")
+
+# Tab separated word and score (-3 to 3), read from disk so no network is
+# needed
+LEXICON_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "data" / "lexicon" / "sentiment_lexicon.tsv"
+)
+
+# Anything that is not a letter or an apostrophe separates two words
+TOKEN_SEPARATOR = r"[^a-z']+"
+
+# A lexicon word straight after one of these counts with the opposite sign
+NEGATIONS = ["not", "no", "never", "nothing", "isn't", "wasn't",
+             "aren't", "weren't", "don't", "didn't", "doesn't", "couldn't"]
+
+SENTIMENT_COLUMNS = ["review_sentiment_mean", "review_sentiment_std"]
+
+# Lexicon held by each worker process, set once by _init_worker
+_worker_lexicon = None
+
+# Reads the lexicon as a Series of scores indexed by word.
+
+
+def load_lexicon(lexicon_path=None):
+    lexicon_path = Path(lexicon_path or LEXICON_PATH)
+
+    lexicon = pd.read_csv(
+        lexicon_path, sep="\t", dtype={"word": "string", "score": "float64"}
+    )
+
+    return lexicon.set_index("word")["score"]
+
+# Returns one score per comment: the mean score of the lexicon words in it,
+# NaN when it has none (or no text at all).
+
+
+def score_comments(comments, lexicon):
+    comments = pa.array(comments, type=pa.string(), from_pandas=True)
+
+    # Curly apostrophes are common in reviews typed on phones
+    text = pc.replace_substring(pc.utf8_lower(comments), "’", "'")
+    tokens = pc.split_pattern_regex(text, TOKEN_SEPARATOR)
+
+    words = pc.list_flatten(tokens)
+    comment_of_word = pc.list_parent_indices(tokens).to_numpy()
+
+    position = pc.index_in(words, value_set=pa.array(lexicon.index))
+    in_lexicon = position.is_valid().to_numpy(zero_copy_only=False)
+    position = position.fill_null(0).to_numpy()
+
+    scores = lexicon.to_numpy()[position]
+
+    # Flip the word after a negation, as long as it is in the same comment
+    negation = pc.is_in(words, value_set=pa.array(NEGATIONS))
+    negation = negation.to_numpy(zero_copy_only=False)
+    negated = np.zeros(len(words), dtype=bool)
+    negated[1:] = negation[:-1] & (comment_of_word[1:] == comment_of_word[:-1])
+    scores = np.where(negated, -scores, scores)
+
+    matched = comment_of_word[in_lexicon]
+    score_sum = np.bincount(
+        matched, weights=scores[in_lexicon], minlength=len(comments)
+    )
+    word_count = np.bincount(matched, minlength=len(comments))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(word_count > 0, score_sum / word_count, np.nan)
+
+# Reduces one batch to per-listing sums of the comment scores.
+# Sums (rather than means) are returned so batches can be added up.
+
+
+def sentiment_partials(listing_ids, comments, lexicon):
+    scores = score_comments(comments, lexicon)
+    scored = ~np.isnan(scores)
+
+    frame = pd.DataFrame({
+        "listing_id": np.asarray(listing_ids)[scored],
+        "scored_reviews": 1,
+        "sentiment_sum": scores[scored],
+        "sentiment_sum_sq": scores[scored] ** 2,
+    })
+
+    return frame.groupby("listing_id").sum()
+
+
+def _init_worker(lexicon):
+    global _worker_lexicon
+    _worker_lexicon = lexicon
+
+# Runs inside a worker process. Record batches pickle as a few flat buffers,
+# so sending one to a worker is cheap compared to scoring it.
+
+
+def _score_batch(batch, lexicon=None):
+    return sentiment_partials(
+        batch.column("listing_id").to_numpy(),
+        batch.column("comments"),
+        _worker_lexicon if lexicon is None else lexicon,
+    )
+
+# Turns the merged sums into the mean and sample standard deviation per
+# listing.
+
+
+def summarise_sentiment(totals):
+    count = totals["scored_reviews"]
+    mean = totals["sentiment_sum"] / count
+    var = (totals["sentiment_sum_sq"] - count * mean ** 2) / (count - 1)
+
+    return pd.DataFrame({
+        "review_sentiment_mean": mean.round(3),
+        "review_sentiment_std": np.sqrt(var.clip(lower=0)).round(3),
+    })
+
+# Scores review batches (see extract_reviews.iter_review_batches) and returns
+# the sentiment per listing, indexed by listing_id.
+# With workers > 1 batches are scored in a process pool. At most two batches
+# per worker are in flight, so the file is still never fully in memory.
+
+
+def review_sentiment(batches, workers=1, lexicon_path=None):
+    start_time = timeit.default_timer()
+    lexicon = load_lexicon(lexicon_path)
+    partials = []
+    reviews = 0
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(lexicon,)
+        ) as executor:
+            pending = set()
+
+            for batch in batches:
+                reviews += batch.num_rows
+                pending.add(executor.submit(_score_batch, batch))
+
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    partials += [future.result() for future in done]
+
+            partials += [future.result() for future in pending]
+    else:
+        for batch in batches:
+            reviews += batch.num_rows
+            partials.append(_score_batch(batch, lexicon))
+
+    if not partials:
+        raise ValueError("Reviews file contains no rows")
+
+    sentiment = summarise_sentiment(pd.concat(partials).groupby(level=0).sum())
+
+    elapsed = timeit.default_timer() - start_time
+    logger.info(
+        f"Scored {reviews} reviews for {len(sentiment)} listings in "
+        f"{elapsed:.2f}s with {workers} workers "
+        f"({reviews / max(elapsed, 1e-9):,.0f} reviews/s)"
+    )
+
+    return sentiment
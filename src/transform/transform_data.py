@@ -1,24 +1,169 @@
 import pandas as pd
+from typing import Iterable
 from src.transform.clean_listings import clean_listings
+from src.transform.downcast_listings import downcast_numeric_columns
+from src.transform.listing_groups import save_group_index
+from src.transform.amenity_bitset import save_amenity_bitset
+from src.transform.amenity_index import build_amenity_index, save_amenity_index
+from src.transform.amenity_uplift import save_amenity_uplift
+from src.transform.listing_aggregates import save_listing_aggregates
 from src.utils.logging_utils import setup_logger
-from src.utils.file_utils import save_dataframe_to_csv
-from src.transform.transform_listings import transform_listings
+from src.utils.file_utils import (
+    save_dataframe_to_csv, save_dataframe_to_parquet
+)
+from src.utils.memory_utils import peak_rss_mb, copy_on_write
+from src.utils.dtype_utils import DEFAULT_DTYPE_BACKEND
+from src.transform.category_vocabulary import (
+    load_vocabulary,
+    save_vocabulary,
+    concat_with_vocabulary,
+)
+from src.transform.transform_listings import (
+    transform_listings,
+    transform_listings_rows,
+    transform_listings_groups,
+    snapshot_date,
+)
 
 logger = setup_logger("transform_data", "transform_data.log")
 
 OUTPUT_DIR = "data/processed"
 FILE_NAME = "cleaned_listings.csv"
+PARQUET_FILE_NAME = "cleaned_listings.parquet"
 
 
-def transform_data(data) -> pd.DataFrame:
+# The CSV is kept for existing consumers, the Parquet copy keeps the dtypes
+# and the categories. The vocabulary, the listing group index and the amenity
+# bitset are only saved once both files are written. The amenity index is built
+# once and shared by the index and the uplift table.
+def save_transformed_data(data, vocabulary):
+    save_dataframe_to_csv(data, OUTPUT_DIR, FILE_NAME)
+    save_dataframe_to_parquet(data, OUTPUT_DIR, PARQUET_FILE_NAME)
+    save_vocabulary(vocabulary)
+    save_group_index(data)
+    save_amenity_bitset(data)
+    amenity_index = (
+        build_amenity_index(data["amenities"])
+        if "amenities" in data.columns else None
+    )
+    save_amenity_index(data, index=amenity_index)
+    save_amenity_uplift(data, index=amenity_index)
+    save_listing_aggregates(data)
+
+
+# Logs the peak RSS of the process once a stage has finished, the growth since
+# the previous stage is how much that stage raised the peak.
+def log_stage_memory(stage, previous_peak):
+    peak = peak_rss_mb()
+    logger.info(
+        f"{stage}: peak RSS {peak:.1f} MB (+{peak - previous_peak:.1f} MB)")
+
+    return peak
+
+
+# copy_free=True runs the stages under pandas copy-on-write, projects the raw
+# columns before anything is copied and drops the defensive full-frame copies.
+# downcast=True moves the cleaned numeric columns to their smallest safe
+# dtypes.
+# median_compression takes the group medians from quantile sketches of that
+# compression instead of exact medians (None).
+# as_of defaults to the snapshot date of the raw listings (see snapshot_date).
+def transform_data(
+    data, calendar=None, reviews=None, dtype_backend=DEFAULT_DTYPE_BACKEND,
+    as_of=None, copy_free=False, downcast=False, median_compression=None,
+) -> pd.DataFrame:
     try:
         # here we clean the airbnb listings dataset
-        logger.info("Starting data transformation process:")
-        data = clean_listings(data)
-        data = transform_listings(data)
+        logger.info(
+            f"Starting data transformation process ({dtype_backend} dtypes"
+            f"{', copy-free' if copy_free else ''}):")
+        peak = peak_rss_mb()
+        logger.info(f"Peak RSS before cleaning: {peak:.1f} MB")
+
+        # Read before cleaning, which drops the snapshot date column
+        if as_of is None:
+            as_of = snapshot_date(data)
+
+        with copy_on_write(copy_free):
+            vocabulary = load_vocabulary()
+            data = clean_listings(
+                data, dtype_backend, vocabulary, copy=not copy_free)
+            if downcast:
+                data = downcast_numeric_columns(data)
+            peak = log_stage_memory("Cleaning", peak)
+
+            data = transform_listings(
+                data, calendar=calendar, reviews=reviews,
+                dtype_backend=dtype_backend, as_of=as_of, copy=not copy_free,
+                median_compression=median_compression)
+            peak = log_stage_memory("Transformations", peak)
+        logger.info("Transaction data successfully cleaned.")
+
+        save_transformed_data(data, vocabulary)
+
+        return data
+
+    except Exception as e:
+        logger.error(f"Data transformation failed: {str(e)}")
+        raise
+
+
+def transform_data_chunked(
+    chunks: Iterable[pd.DataFrame],
+    calendar=None,
+    reviews=None,
+    dtype_backend=DEFAULT_DTYPE_BACKEND,
+    as_of=None,
+    copy_free=False,
+    downcast=False,
+    median_compression=None,
+) -> pd.DataFrame:
+    # Same output as transform_data, but the raw listings arrive in chunks.
+    # Cleaning and the row-level transformations run per chunk, so only the
+    # much smaller cleaned rows are kept before the grouped steps run.
+    try:
+        logger.info(
+            f"Starting chunked data transformation process"
+            f"{' (copy-free)' if copy_free else ''}:")
+
+        # Shared by every chunk so they all use the same category codes
+        vocabulary = load_vocabulary()
+        peak = peak_rss_mb()
+        logger.info(f"Peak RSS before cleaning: {peak:.1f} MB")
+
+        with copy_on_write(copy_free):
+            cleaned_chunks = []
+            snapshot_dates = []
+            for number, chunk in enumerate(chunks):
+                snapshot_dates.append(snapshot_date(chunk))
+                chunk = clean_listings(
+                    chunk, dtype_backend, vocabulary, copy=not copy_free)
+                chunk = transform_listings_rows(chunk, dtype_backend)
+                cleaned_chunks.append(chunk)
+                logger.info(
+                    f"Chunk {number} transformed: {chunk.shape}, "
+                    f"peak RSS {peak_rss_mb():.1f} MB"
+                )
+
+            data = concat_with_vocabulary(cleaned_chunks, vocabulary)
+            if as_of is None:
+                as_of = max(
+                    (date for date in snapshot_dates if date is not None),
+                    default=None)
+            # After the concat, so every chunk ends up with the same dtypes
+            if downcast:
+                data = downcast_numeric_columns(data)
+            peak = log_stage_memory("Cleaning", peak)
+
+            data = transform_listings_groups(
+                data, calendar=calendar, reviews=reviews,
+                dtype_backend=dtype_backend, as_of=as_of,
+                median_compression=median_compression,
+            )
+            log_stage_memory("Transformations", peak)
         logger.info("Transaction data successfully cleaned.")
 
-        save_dataframe_to_csv(data, OUTPUT_DIR, FILE_NAME)
+        save_transformed_data(data, vocabulary)
 
         return data
 
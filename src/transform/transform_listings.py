@@ -1,8 +1,18 @@
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from src.utils.logging_utils import setup_logger
-import math
+from src.utils.dtype_utils import DEFAULT_DTYPE_BACKEND, backend_dtype
+from src.utils.column_utils import SNAPSHOT_DATE_COLUMN
+from src.transform.review_sentiment import SENTIMENT_COLUMNS
+from src.transform.listing_groups import (
+    GROUP_COLUMN,
+    add_group_codes,
+    group_keys,
+)
+from src.transform.amenity_bitset import amenity_items
+from src.transform.quantile_sketch import group_quantile
 
 
 logger = setup_logger("transform_listings", "transform_listings.log")
@@ -10,10 +20,13 @@ logger = setup_logger("transform_listings", "transform_listings.log")
 
 # This drops rows where the percentage of missing values exceeds the given threshold.
 # The default threshold is 0.40 means rows with more  than 40% missing values are removed.
-def drop_rows_with_missing_threshold(df, threshold=0.40):
+# Columns in exclude (e.g. derived ones) are left out of the count.
+def drop_rows_with_missing_threshold(df, threshold=0.40, exclude=()):
 
     # Calculates fraction of missing values per row
-    missing_fraction = df.isna().mean(axis=1)
+    missing = df.isna()
+    missing_fraction = missing.drop(
+        columns=[col for col in exclude if col in missing.columns]).mean(axis=1)
 
     # Identifies rows to drop
     rows_to_drop = missing_fraction[missing_fraction > threshold].index
@@ -24,9 +37,13 @@ def drop_rows_with_missing_threshold(df, threshold=0.40):
     return df_cleaned
 
 # Cleans the amenities column by removing brackets/quotes and converting into a list of strings.
+# With the pyarrow backend the same is done with Arrow kernels and kept as a list<string> column.
 
 
-def clean_amenities_column(df):
+def clean_amenities_column(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    if dtype_backend != DEFAULT_DTYPE_BACKEND:
+        df["amenities"] = split_amenities_arrow(df["amenities"])
+        return df
 
     df["amenities"] = df["amenities"].apply(  # Applies a transformation to every value
         # If empty just return an empty list
@@ -44,13 +61,27 @@ def clean_amenities_column(df):
     return df
 
 
-def add_price_competitiveness(df):
-    # Measures how competitively priced a listing is relative to its neighborhood & property type.
+# Arrow version of the amenities clean up, one kernel call per step for the whole column
+
+
+def split_amenities_arrow(amenities):
+    flat, parents = amenity_items(amenities)
+
+    counts = np.bincount(parents, minlength=len(amenities))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    lists = pa.LargeListArray.from_arrays(pa.array(offsets, type=pa.int64()), flat)
+
+    return pd.Series(
+        pd.arrays.ArrowExtensionArray(lists), index=amenities.index)
 
-    group_median = df.groupby(
-        ["neighbourhood_cleansed", "property_type"])["price"].median().rename("group_median_price")
 
-    df = df.join(group_median, on=["neighbourhood_cleansed", "property_type"])
+def add_price_competitiveness(df, compression=None):
+    # Measures how competitively priced a listing is relative to its neighborhood & property type.
+
+    # Median price of the listing's group, broadcast straight back to the rows.
+    # With a compression the median comes from a quantile sketch (see quantile_sketch).
+    df["group_median_price"] = group_quantile(
+        df, "price", group_keys(df), 0.5, compression)
 
     # (price - median) / median price
     # If its below 0 it's underpriced and overpriced over 0
@@ -73,17 +104,41 @@ def add_price_competitiveness(df):
     return df
 
 
-def impute_price_column(df):
-    # Flags rows where price or revenue was originally missing
-    df["price"] = df["price"].astype(float)
+# Flags rows where price or revenue was originally missing.
+# Safe to call again before imputing, since it only looks at the current row.
+
+
+def flag_price_imputation(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    df["price"] = df["price"].astype(backend_dtype("float", dtype_backend))
 
     df["was_price_imputed"] = (
         df["price"].isna() | df["estimated_revenue_l365d"].isna()
     )
+    df = backend_flags(df, ["was_price_imputed"], dtype_backend)
+
+    return df
+
+
+# Fills missing values of a column with a statistic of its group ("median", "mean",
+# or any other built-in groupby aggregation). The statistic is computed for every group
+# in one pass and broadcast back to the rows, no Python function runs per group.
+# Groups without a single value stay missing, as do rows with a missing key.
+def impute_group_statistic(df, column, by, stat="median"):
+    group_stat = df.groupby(by, observed=True)[column].transform(stat)
+    df[column] = df[column].fillna(group_stat)
+
+    return df
+
+
+def impute_price_column(df, dtype_backend=DEFAULT_DTYPE_BACKEND, compression=None):
+    df = flag_price_imputation(df, dtype_backend)
 
     # Impute price by neighbourhood + property_type median
-    df["price"] = df.groupby(["neighbourhood_cleansed", "property_type"]
-                             )["price"].transform(lambda x: x.fillna(x.median()))
+    if compression is None:
+        df = impute_group_statistic(df, "price", group_keys(df), "median")
+    else:
+        df["price"] = df["price"].fillna(
+            group_quantile(df, "price", group_keys(df), 0.5, compression))
 
     return df
 
@@ -131,7 +186,92 @@ def add_occupancy_potential(df):
     return df
 
 
-def impute_minimum_beds(df):
+# The day the snapshot was scraped (the latest last_scraped date of the raw
+# listings), or None when the listings do not say.
+def snapshot_date(df):
+    if SNAPSHOT_DATE_COLUMN not in df.columns:
+        return None
+
+    dates = pd.to_datetime(
+        df[SNAPSHOT_DATE_COLUMN], format="%Y-%m-%d", errors="coerce")
+    latest = dates.max()
+
+    return None if pd.isna(latest) else latest
+
+
+# Adds how long each host has been hosting (in days, as of the given date) and
+# the quarter they joined in, straight from the host_since datetime column.
+# as_of is usually the snapshot date (see snapshot_date). Without one it is the
+# latest host_since of the snapshot, never the day of the run, so the same
+# snapshot always gives the same tenure.
+def add_host_tenure(df, as_of=None, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    if "host_since" not in df.columns:
+        return df
+
+    if as_of is None:
+        as_of = df["host_since"].max()
+        logger.info(
+            f"No snapshot date, host tenure is measured from the latest "
+            f"host_since ({as_of})")
+    as_of = pd.Timestamp(as_of)
+
+    df["host_tenure_days"] = (
+        (as_of - df["host_since"]).dt.days.astype(backend_dtype("int", dtype_backend))
+    )
+    df["host_cohort_quarter"] = df["host_since"].dt.to_period("Q")
+
+    return df
+
+
+# Joins per-listing aggregates (indexed by listing_id) onto the listings by id.
+
+
+def join_listing_aggregates(df, aggregates):
+    return df.join(aggregates, on="id")
+
+# Real occupancy from the calendar: booked nights out of the nights the host
+# actually offered (blocked nights are not bookable).
+
+
+def add_calendar_occupancy(df):
+    bookable_nights = df["calendar_nights"] - df["blocked_nights"]
+
+    df["calendar_occupancy_rate"] = (
+        df["booked_nights"] / bookable_nights.where(bookable_nights > 0)
+    ).round(2)
+
+    return df
+
+
+# Moves the review sentiment columns next to review_scores_rating,
+# so the guest rating and the sentiment of the comments sit side by side.
+
+
+def place_review_sentiment(df):
+    sentiment = [col for col in SENTIMENT_COLUMNS if col in df.columns]
+    if not sentiment or "review_scores_rating" not in df.columns:
+        return df
+
+    columns = [col for col in df.columns if col not in sentiment]
+    position = columns.index("review_scores_rating") + 1
+    columns[position:position] = sentiment
+
+    return df[columns]
+
+
+# The imputation flags are plain numpy bools, the pyarrow backend keeps them as bool[pyarrow]
+
+
+def backend_flags(df, flags, dtype_backend=DEFAULT_DTYPE_BACKEND):
+    if dtype_backend != DEFAULT_DTYPE_BACKEND:
+        df[flags] = df[flags].astype(backend_dtype("bool", dtype_backend))
+
+    return df
+
+
+# Fills missing bed counts from bedrooms and makes sure there are at least as many
+# beds as bedrooms. fmax skips a missing side, so both rules are one column-wise max.
+def impute_minimum_beds(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
     # Rename column once (safe if already renamed)
     if "beds" in df.columns:
         df = df.rename(columns={"beds": "minimum_beds"})
@@ -139,74 +279,123 @@ def impute_minimum_beds(df):
     # Flag: only rows where minimum_beds was missing
     df["was_beds_imputed"] = df["minimum_beds"].isna()
 
-    # Fill missing minimum_beds using bedrooms
-    df["minimum_beds"] = df.apply(
-        lambda row: row["bedrooms"] if (pd.isna(row["minimum_beds"]) and not pd.isna(row["bedrooms"]))
-        else row["minimum_beds"],
-        axis=1
-    )
-
-    # Enforce logical rule: minimum_beds ≥ bedrooms
-    df["minimum_beds"] = df[["minimum_beds", "bedrooms"]].max(axis=1)
+    beds = df["minimum_beds"].to_numpy(dtype="float64", na_value=np.nan)
+    bedrooms = df["bedrooms"].to_numpy(dtype="float64", na_value=np.nan)
 
-    # to fix error
-    df["minimum_beds"] = pd.to_numeric(
-        df["minimum_beds"], errors="coerce").astype("Int64")
+    df["minimum_beds"] = pd.Series(np.fmax(beds, bedrooms), index=df.index).astype(
+        backend_dtype("int", dtype_backend))
+    df = backend_flags(df, ["was_beds_imputed"], dtype_backend)
 
     return df
 
 
-def impute_bathrooms(df):
+# Estimates bathrooms from bedrooms: 1 up to 2 bedrooms, 2 for 3 bedrooms, and
+# above that the general guideline of 2 bathrooms per 3 bedrooms (rounded up).
+# Works on a whole column at once, missing bedrooms give NaN.
+def estimate_bathrooms(bedrooms):
+    bedrooms = pd.Series(bedrooms).to_numpy(dtype="float64", na_value=np.nan)
+
+    return np.select(
+        [bedrooms <= 2, bedrooms == 3],
+        [1.0, 2.0],
+        np.ceil((bedrooms / 3) * 2),
+    )
+
+
+def impute_bathrooms(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
     # Flag only missing bathroom values
     df["was_bathrooms_imputed"] = df["bathrooms"].isna()
 
-    # Helper function
-    def estimate_bathrooms(bedrooms):
-        if pd.isna(bedrooms):
-            return None
-        if bedrooms <= 2:
-            return 1
-        if bedrooms == 3:
-            return 2
-        # general guideline: 2 bathrooms per 3 bedrooms
-        return math.ceil((bedrooms / 3) * 2)
-
-    df["bathrooms"] = df.apply(
-        lambda row: estimate_bathrooms(row["bedrooms"])
-        if pd.isna(row["bathrooms"])
-        else row["bathrooms"],
-        axis=1
+    bathrooms = df["bathrooms"].to_numpy(dtype="float64", na_value=np.nan)
+    df["bathrooms"] = pd.Series(
+        np.where(np.isnan(bathrooms), estimate_bathrooms(df["bedrooms"]), bathrooms),
+        index=df.index,
     )
 
-    return df
+    if dtype_backend != DEFAULT_DTYPE_BACKEND:
+        df["bathrooms"] = df["bathrooms"].astype(backend_dtype("float", dtype_backend))
+    df = backend_flags(df, ["was_bathrooms_imputed"], dtype_backend)
 
+    return df
 
-# Here we apply all the transformations in one go using a wrapper function.
-def transform_listings(starting_df: pd.DataFrame) -> pd.DataFrame:
-    df = starting_df.copy()
-
-    logger.info("Started Transformations...")
-    logger.info(f"Data Types (Before Transformations): {df.dtypes}")
-    logger.info(f"Shape (Before Transformations): {df.shape}\n")
 
+# These steps only look at one row at a time, so they can run chunk by chunk.
+def transform_listings_rows(df, dtype_backend=DEFAULT_DTYPE_BACKEND):
     # Most of these impute a lot of critical values
-    df = impute_price_column(df)
+    df = flag_price_imputation(df, dtype_backend)
     df = fix_review_columns(df)
-    df = impute_minimum_beds(df)
-    df = impute_bathrooms(df)
+    df = impute_minimum_beds(df, dtype_backend)
+    df = impute_bathrooms(df, dtype_backend)
+
+    return df
+
 
-    # These drop rows with excessive missigness
-    df = drop_rows_with_missing_threshold(df, threshold=0.22)
+# These steps need the whole dataset (group medians, max-normalisation).
+# calendar and reviews hold the per-listing aggregates from extract_calendar
+# and clean_reviews, if any.
+# median_compression switches the group medians to quantile sketches of that
+# compression (None keeps them exact).
+def transform_listings_groups(
+    df, calendar=None, reviews=None, dtype_backend=DEFAULT_DTYPE_BACKEND, as_of=None,
+    median_compression=None,
+):
+    # Numbered once, the grouped features below all group by these codes
+    df = add_group_codes(df)
+    df = impute_price_column(df, dtype_backend, median_compression)
+
+    # These drop rows with excessive missigness. The group codes are derived from
+    # the two key columns, so a missing key is not counted twice.
+    df = drop_rows_with_missing_threshold(
+        df, threshold=0.22, exclude=[GROUP_COLUMN])
 
     # This cleans the amenities values
-    df = clean_amenities_column(df)
+    df = clean_amenities_column(df, dtype_backend)
 
     # Feature engineering
-    df = add_price_competitiveness(df)
+    df = add_price_competitiveness(df, median_compression)
     df = add_occupancy_potential(df)
+    # Added after the missingness drop so they do not count towards it
+    df = add_host_tenure(df, as_of, dtype_backend)
+
+    if calendar is not None:
+        df = join_listing_aggregates(df, calendar)
+        df = add_calendar_occupancy(df)
+
+    if reviews is not None:
+        df = join_listing_aggregates(df, reviews)
+        df = place_review_sentiment(df)
 
     df = df.reset_index(drop=True)
 
+    return df
+
+
+# Here we apply all the transformations in one go using a wrapper function.
+# dtype_backend="pyarrow" keeps the Arrow dtypes from clean_listings(..., "pyarrow").
+# as_of is the date host tenure is measured from (see add_host_tenure).
+# copy=False works on starting_df directly, under copy_on_write (see memory_utils)
+# the caller's frame is still left as it was.
+# median_compression uses approximate group medians (see transform_listings_groups).
+def transform_listings(
+    starting_df: pd.DataFrame,
+    calendar=None,
+    reviews=None,
+    dtype_backend: str = DEFAULT_DTYPE_BACKEND,
+    as_of=None,
+    copy: bool = True,
+    median_compression=None,
+) -> pd.DataFrame:
+    df = starting_df.copy() if copy else starting_df
+
+    logger.info("Started Transformations...")
+    logger.info(f"Data Types (Before Transformations): {df.dtypes}")
+    logger.info(f"Shape (Before Transformations): {df.shape}\n")
+
+    df = transform_listings_rows(df, dtype_backend)
+    df = transform_listings_groups(
+        df, calendar=calendar, reviews=reviews, dtype_backend=dtype_backend,
+        as_of=as_of, median_compression=median_compression)
+
     logger.info("Finished Transformations")
     logger.info(f"Data Types (After Transformations): {df.dtypes}")
     logger.info(f"Shape (After Transformations): {df.shape}\n")
@@ -0,0 +1,20 @@
+# The listings columns kept for insights. Shared by both stages: the extract
+# stage reads only these when projecting and clean_listings filters to them.
+COL_FOR_INSIGHTS = [
+    'id', 'property_type', 'room_type',
+    'price', 'estimated_revenue_l365d',
+    'accommodates', 'beds', 'bedrooms', 'bathrooms',
+    'review_scores_rating', 'number_of_reviews', 'reviews_per_month',
+    'availability_365', 'host_response_rate', 'host_response_time',
+    'host_since', 'amenities', 'minimum_nights', 'maximum_nights',
+    'latitude', 'longitude', 'neighbourhood_cleansed',
+    'host_total_listings_count', 'host_is_superhost',
+    'review_scores_cleanliness', 'review_scores_value', 'host_acceptance_rate'
+]
+
+# The day the snapshot was scraped. Not an insight itself, the transform stage
+# measures host tenure from it so a snapshot always gives the same output.
+SNAPSHOT_DATE_COLUMN = "last_scraped"
+
+# Every listings column the extract stage reads when projecting
+EXTRACT_COLUMNS = COL_FOR_INSIGHTS + [SNAPSHOT_DATE_COLUMN]
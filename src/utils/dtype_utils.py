@@ -0,0 +1,61 @@
+import pandas as pd
+import pyarrow as pa
+
+# The pandas dtype used for each kind of column under each dtype backend.
+# numpy_nullable is the default used throughout, pyarrow keeps every column
+# in Arrow memory so string operations run in Arrow compute kernels.
+BACKEND_DTYPES = {
+    "numpy_nullable": {
+        "string": "string",
+        "int": "Int64",
+        "float": "float64",
+        "bool": "boolean",
+    },
+    "pyarrow": {
+        "string": "string[pyarrow]",
+        "int": "int64[pyarrow]",
+        "float": "double[pyarrow]",
+        "bool": "bool[pyarrow]",
+    },
+}
+
+DEFAULT_DTYPE_BACKEND = "numpy_nullable"
+
+
+def backend_dtype(
+    kind: str, dtype_backend: str = DEFAULT_DTYPE_BACKEND
+) -> str:
+    """Return the dtype name for a kind of column ("string", "int", ...)."""
+    if dtype_backend not in BACKEND_DTYPES:
+        raise ValueError(
+            f"Unknown dtype backend '{dtype_backend}', "
+            f"expected one of {list(BACKEND_DTYPES)}"
+        )
+
+    return BACKEND_DTYPES[dtype_backend][kind]
+
+
+def backend_dtypes(
+    dtypes: dict[str, str], dtype_backend: str = DEFAULT_DTYPE_BACKEND
+) -> dict[str, str]:
+    """
+    Translate a {column: numpy_nullable dtype} map to another backend.
+    Dtypes without an equivalent (e.g. category) are kept as they are.
+    """
+    default = BACKEND_DTYPES[DEFAULT_DTYPE_BACKEND]
+    kinds = {dtype: kind for kind, dtype in default.items()}
+
+    return {
+        col: backend_dtype(kinds[dtype], dtype_backend) if dtype in kinds
+        else dtype
+        for col, dtype in dtypes.items()
+    }
+
+
+def is_arrow_list(series: pd.Series) -> bool:
+    """True for Arrow-backed list columns (e.g. amenities in pyarrow mode)."""
+    return (
+        isinstance(series.dtype, pd.ArrowDtype)
+        and (pa.types.is_list(series.dtype.pyarrow_dtype)
+             or pa.types.is_large_list(series.dtype.pyarrow_dtype))
+    )
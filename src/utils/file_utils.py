@@ -1,5 +1,8 @@
 import os
+import hashlib
 import pandas as pd
+import pyarrow as pa
+from src.utils.dtype_utils import is_arrow_list
 
 # R
 
@@ -30,7 +33,48 @@ def save_dataframe_to_csv(df: pd.DataFrame, relative_dir: str, filename: str) ->
     output_path = os.path.join(ROOT_DIR, relative_dir)
     os.makedirs(output_path, exist_ok=True)
 
+    # Arrow list columns (amenities with the pyarrow backend) are written
+    # as python lists, the same as the default backend writes them
+    list_cols = [col for col in df.columns if is_arrow_list(df[col])]
+    if list_cols:
+        df = df.assign(**{
+            col: pd.Series(
+                pa.array(df[col]).to_pylist(), index=df.index, dtype=object)
+            for col in list_cols
+        })
+
     file_path = os.path.join(output_path, filename)
     df.to_csv(file_path, index=False)
 
     print(f"Data saved to {file_path}")
+
+
+def save_dataframe_to_parquet(df: pd.DataFrame, relative_dir: str, filename: str) -> None:
+    """
+    Save a DataFrame to a Parquet file inside the project directory.
+    Unlike CSV, Parquet keeps the dtypes, including categorical categories.
+    """
+    output_path = os.path.join(ROOT_DIR, relative_dir)
+    os.makedirs(output_path, exist_ok=True)
+
+    file_path = os.path.join(output_path, filename)
+    df.to_parquet(file_path, index=False)
+
+    print(f"Data saved to {file_path}")
+
+
+def file_fingerprint(file_path, block_size: int = 1024 * 1024) -> dict:
+    """Return the size, modification time and sha256 of a file.
+    The file is hashed in blocks so it never has to fit in memory."""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
@@ -0,0 +1,42 @@
+import sys
+from contextlib import nullcontext
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # resource is not available on Windows
+    resource = None
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Return the in-memory size of a DataFrame in MB (including strings)."""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident memory of this process so far in MB."""
+    if resource is None:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, Linux reports kilobytes
+    if sys.platform == "darwin":
+        return peak / 1024 ** 2
+
+    return peak / 1024
+
+
+def copy_on_write(enabled: bool = True):
+    """
+    Context manager that turns on pandas copy-on-write while it is open.
+    Frames derived from another one then share its memory until a column
+    is modified, so steps that replace columns no longer need defensive copies.
+
+    :param enabled: when False nothing changes (the default pandas behaviour)
+    """
+    if not enabled:
+        return nullcontext()
+
+    return pd.option_context("mode.copy_on_write", True)
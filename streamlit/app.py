@@ -1,12 +1,13 @@
 import streamlit as st
-import pandas as pd
+from src.load.load import load_cleaned_listings
 
 st.set_page_config(page_title="Airbnb Insights", layout="wide")
 
 
 @st.cache_data
 def load_data():
-    df = pd.read_csv("data/processed/cleaned_listings.csv")
+    # Categorical columns keep their saved categories
+    df = load_cleaned_listings("data/processed")
     return df
 
 
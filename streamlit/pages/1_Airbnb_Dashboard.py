@@ -5,7 +5,7 @@ import altair as alt
 import plotly.express as px
 import json
 
-from src.load.load import load_csv
+from src.load.load import load_cleaned_listings
 
 # Page Setup
 st.set_page_config(
@@ -75,7 +75,7 @@ st.markdown("""
 
 # ------------------------------------
 # Load Data
-df = load_csv("data/processed/cleaned_listings.csv")
+df = load_cleaned_listings("data/processed")
 
 with open("data/output/neighbourhoods.geojson") as f:
     london_geo = json.load(f)
@@ -120,7 +120,7 @@ CUSTOM_SCALE = ["#161925", "#23395B", "#FF385C"]
 # I got the geojson location, which helped me etch out the corners of each
 # borough
 
-df_group = df_filtered.groupby("neighbourhood").agg(
+df_group = df_filtered.groupby("neighbourhood", observed=True).agg(
     average_price=("price", "mean"),
     count_listings=("id", "count"),
     estimated_revenue_l365d=("estimated_revenue_l365d", "mean"),
@@ -162,7 +162,7 @@ def make_choropleth(df_group, metric):
 def make_barchart(df_filtered):
 
     df_mean = (
-        df_filtered.groupby("neighbourhood")["price"]
+        df_filtered.groupby("neighbourhood", observed=True)["price"]
         .mean()
         .reset_index()
     )
@@ -216,7 +216,7 @@ def make_barchart(df_filtered):
 # I believe there is an error in this one
 
 type_counts = (
-    df.groupby("room_type")
+    df.groupby("room_type", observed=True)
     .size()
     .reset_index(name="listing_count")
 )
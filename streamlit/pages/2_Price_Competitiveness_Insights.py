@@ -88,7 +88,7 @@ st.success("Listings that are more competitively priced tend to earn *HIGHER rev
 st.subheader("Competitiveness based on each 'Neighbourhood' (Borough)")
 
 neigh = (
-    df.groupby("neighbourhood_cleansed")["competitiveness"]
+    df.groupby("neighbourhood_cleansed", observed=True)["competitiveness"]
     .mean()
     .sort_values(ascending=False)
     .reset_index()
@@ -120,7 +120,7 @@ tend to be **overpriced** relative to similar homes. Luckily, my own borough is
 st.subheader("Property Type Comparison")
 
 ptype = (
-    df.groupby("property_type")["competitiveness"]
+    df.groupby("property_type", observed=True)["competitiveness"]
     .mean()
     .sort_values()
     .reset_index()
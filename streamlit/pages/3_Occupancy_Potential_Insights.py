@@ -61,7 +61,7 @@ with col2:
 st.subheader("Average Occupancy Potential by 'Neighbourhood' (Borough)")
 
 neigh = (
-    df.groupby("neighbourhood_cleansed")["occupancy_potential"]
+    df.groupby("neighbourhood_cleansed", observed=True)["occupancy_potential"]
     .mean()
     .sort_values(ascending=False)
     .reset_index()
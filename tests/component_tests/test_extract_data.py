@@ -1,7 +1,20 @@
+import gzip
 import pandas as pd
 import pytest
 from unittest.mock import patch
-from src.extract.extract import extract_data
+from src.extract.extract import (
+    extract_data,
+    extract_data_incremental,
+    extract_aggregates,
+)
+from src.extract import extract, extract_cache, extract_reviews
+from src.extract.extract_reviews import REVIEWS_COLUMNS
+from src.extract.extract_manifest import commit_manifest
+from src.transform.clean_reviews import (
+    new_review_totals,
+    add_review_chunk,
+    finish_reviews,
+)
 
 
 # I wrote these component tests so that extract_data() is checked as a full integration step.
@@ -75,3 +88,194 @@ def test_extract_data_handles_multiple_datasets(mock_extract_listings):
     }
 
     assert isinstance(result["review_data"], pd.DataFrame)
+
+
+# I wrote this test so that a second incremental run only returns the snapshot that changed.
+def test_extract_data_incremental_returns_only_changed_files(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "london.csv").write_text("id\n1\n")
+    (raw / "paris.csv").write_text("id\n2\n")
+    manifest_path = tmp_path / "raw_manifest.json"
+
+    with patch(
+        "src.extract.extract.list_raw_csv_files",
+        side_effect=lambda: sorted(raw.iterdir())
+    ):
+        first, delta = extract_data_incremental(manifest_path=manifest_path)
+        commit_manifest(delta, manifest_path)
+
+        (raw / "paris.csv").write_text("id\n2\n5\n")
+        second, delta = extract_data_incremental(manifest_path=manifest_path)
+
+    assert set(first.keys()) == {"london", "paris"}
+    assert list(second.keys()) == ["paris"]
+    assert delta["changed"] == ["paris.csv"]
+    assert delta["unchanged"] == ["london.csv"]
+
+
+# I wrote this test so a run where only the calendar changed still returns the
+# listings, otherwise the transform is skipped and the new calendar is never joined.
+def test_extract_data_incremental_reextracts_listings_when_calendar_changed(
+    tmp_path
+):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "listings.csv").write_text("id\n1\n")
+    (raw / "calendar.csv").write_text(
+        "listing_id,date,available,price\n"
+        "1,2025-01-01,f,$50.00\n"
+    )
+    manifest_path = tmp_path / "raw_manifest.json"
+
+    with patch(
+        "src.extract.extract.list_raw_csv_files",
+        side_effect=lambda: sorted(raw.iterdir())
+    ):
+        _, delta = extract_data_incremental(manifest_path=manifest_path)
+        commit_manifest(delta, manifest_path)
+
+        (raw / "calendar.csv").write_text(
+            "listing_id,date,available,price\n"
+            "1,2025-01-01,f,$50.00\n"
+            "1,2025-01-02,f,$50.00\n"
+        )
+        result, delta = extract_data_incremental(manifest_path=manifest_path)
+
+    assert delta["changed"] == ["calendar.csv"]
+    assert set(result.keys()) == {"listings", "calendar"}
+    assert result["calendar"].loc[1, "booked_nights"] == 2
+
+
+# I added this test so the calendar and reviews are only streamed when there are
+# listings to join them onto.
+@patch("src.extract.extract.extract_aggregates")
+@patch("src.extract.extract.extract_listings", return_value={})
+def test_extract_data_incremental_skips_aggregates_without_listings(
+    mock_extract_listings, mock_extract_aggregates, tmp_path
+):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "london.csv").write_text("id\n1\n")
+
+    with patch(
+        "src.extract.extract.list_raw_csv_files",
+        side_effect=lambda: sorted(raw.iterdir())
+    ):
+        result, _ = extract_data_incremental(
+            manifest_path=tmp_path / "raw_manifest.json")
+
+    assert result == {}
+    mock_extract_aggregates.assert_not_called()
+
+
+# I added this test to make sure nothing is parsed when no snapshot has changed.
+@patch("src.extract.extract.extract_listings")
+def test_extract_data_incremental_skips_extraction_when_nothing_changed(
+    mock_extract_listings, tmp_path
+):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "london.csv").write_text("id\n1\n")
+    manifest_path = tmp_path / "raw_manifest.json"
+
+    with patch(
+        "src.extract.extract.list_raw_csv_files",
+        side_effect=lambda: sorted(raw.iterdir())
+    ):
+        _, delta = extract_data_incremental(manifest_path=manifest_path)
+        commit_manifest(delta, manifest_path)
+        mock_extract_listings.reset_mock()
+
+        result, delta = extract_data_incremental(manifest_path=manifest_path)
+
+    assert result == {}
+    assert delta["unchanged"] == ["london.csv"]
+    mock_extract_listings.assert_not_called()
+
+
+# I wrote this test so that the calendar is reduced to one row per listing rather than loaded raw.
+def test_extract_aggregates_reduces_calendar(tmp_path):
+    calendar = tmp_path / "calendar.csv"
+    calendar.write_text(
+        "listing_id,date,available,price\n"
+        "1,2025-01-01,f,$50.00\n"
+        "1,2025-01-02,t,$50.00\n"
+        "2,2025-01-01,t,$80.00\n"
+    )
+    listings = tmp_path / "listings.csv"
+    listings.write_text("id\n1\n2\n")
+
+    result = extract_aggregates([listings, calendar])
+
+    assert list(result.keys()) == ["calendar"]
+    assert result["calendar"]["booked_nights"].to_dict() == {1: 1, 2: 0}
+
+
+# I added this test so an unchanged calendar is only streamed once when the
+# cache is on, and the cached aggregates keep listing_id as their index.
+def test_extract_aggregates_reuses_cached_aggregates(tmp_path):
+    calendar = tmp_path / "calendar.csv"
+    calendar.write_text(
+        "listing_id,date,available,price\n"
+        "1,2025-01-01,f,$50.00\n"
+        "1,2025-01-02,t,$50.00\n"
+        "2,2025-01-01,t,$80.00\n"
+    )
+    expected = extract_aggregates([calendar])["calendar"]
+
+    with patch.object(extract_cache, "CACHE_DIR", tmp_path / "cache"), \
+            patch.object(
+                extract, "extract_calendar", wraps=extract.extract_calendar
+            ) as mock_calendar:
+        first = extract_aggregates([calendar], use_cache=True)
+        second = extract_aggregates([calendar], use_cache=True)
+
+    assert mock_calendar.call_count == 1
+    pd.testing.assert_frame_equal(first["calendar"], expected)
+    pd.testing.assert_frame_equal(second["calendar"], expected)
+
+
+# I added this test so that reviews are aggregated per listing too.
+def test_extract_aggregates_reduces_reviews(tmp_path):
+    reviews = tmp_path / "reviews.csv.gz"
+    with gzip.open(reviews, "wt") as f:
+        f.write(
+            "listing_id,id,date,reviewer_id,reviewer_name,comments\n"
+            "1,10,2024-01-01,5,Sam,Great\n"
+            "1,11,2024-02-01,6,Alex,Lovely\n"
+        )
+
+    result = extract_aggregates([reviews])
+
+    assert list(result.keys()) == ["reviews"]
+    assert result["reviews"].loc[1, "reviews_total"] == 2
+    assert result["reviews"].loc[1, "review_sentiment_mean"] > 0
+
+
+# I added this test so reviews.csv is only parsed once, and the totals from the
+# shared pass still match a plain pandas read of the file.
+def test_extract_aggregates_reads_reviews_once(tmp_path):
+    reviews = tmp_path / "reviews.csv"
+    reviews.write_text(
+        "listing_id,id,date,reviewer_id,reviewer_name,comments\n"
+        '1,10,2024-01-01,5,Sam,"Great place\nwould stay again"\n'
+        "1,11,2024-02-01,6,Alex,\n"
+        "2,12,2024-03-01,7,Jo,Lovely\n"
+    )
+    totals = new_review_totals()
+    add_review_chunk(totals, pd.read_csv(
+        reviews, usecols=REVIEWS_COLUMNS, dtype={"comments": "string"}
+    ))
+    expected = finish_reviews(totals)
+
+    with patch.object(
+        extract_reviews, "open_raw_file", wraps=extract_reviews.open_raw_file
+    ) as mock_open:
+        result = extract_aggregates([reviews])
+
+    assert mock_open.call_count == 1
+    pd.testing.assert_frame_equal(
+        result["reviews"][expected.columns], expected
+    )
+    assert result["reviews"]["review_sentiment_mean"].notna().all()
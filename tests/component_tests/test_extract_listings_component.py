@@ -7,6 +7,9 @@ from unittest.mock import patch
 from src.extract.extract_listings import (
     extract_listings,
     extract_listings_execution,
+    read_listings_file,
+    is_csv_file,
+    dataset_name,
     EXPECTED_IMPORT_RATE,
 )
 
@@ -19,11 +22,12 @@ from src.extract.extract_listings import (
 @pytest.fixture
 def expected_raw_data():
     raw_dir = Path("data/raw")
-    csv_files = list(raw_dir.glob("*.csv"))
+    csv_files = [fp for fp in raw_dir.iterdir() if is_csv_file(fp)]
 
     expected = {}
     for fp in csv_files:
-        expected[fp.stem] = pd.read_csv(fp)
+        # compressed snapshots (.csv.gz) are read through the same helper
+        expected[dataset_name(fp)] = read_listings_file(fp)
 
     return expected
 
@@ -2,7 +2,11 @@ import pandas as pd
 import ast
 import pytest
 from unittest.mock import patch
-from src.transform.transform_data import transform_data
+from src.transform.transform_data import (
+    transform_data,
+    transform_data_chunked,
+    save_transformed_data,
+)
 
 
 # I added this helper so I can avoid failing tests due to differences between None and NA.
@@ -85,6 +89,13 @@ def test_transform_data_fails_fast_does_not_continue(
 
 
 # I added this test to make sure the final dataset is saved when everything succeeds.
+@patch("src.transform.transform_data.save_listing_aggregates")
+@patch("src.transform.transform_data.save_amenity_uplift")
+@patch("src.transform.transform_data.save_amenity_index")
+@patch("src.transform.transform_data.save_amenity_bitset")
+@patch("src.transform.transform_data.save_group_index")
+@patch("src.transform.transform_data.save_vocabulary")
+@patch("src.transform.transform_data.save_dataframe_to_parquet")
 @patch("src.transform.transform_data.save_dataframe_to_csv")
 @patch("src.transform.transform_data.transform_listings")
 @patch("src.transform.transform_data.clean_listings")
@@ -92,6 +103,13 @@ def test_transform_data_saves_output(
     mock_clean_listings,
     mock_transform_listings,
     mock_save,
+    mock_save_parquet,
+    mock_save_vocabulary,
+    mock_save_group_index,
+    mock_save_amenity_bitset,
+    mock_save_amenity_index,
+    mock_save_amenity_uplift,
+    mock_save_listing_aggregates,
 ):
     mock_clean_listings.return_value = pd.DataFrame({"id": [1]})
     mock_transform_listings.return_value = pd.DataFrame({"id": [1]})
@@ -99,3 +117,98 @@ def test_transform_data_saves_output(
     transform_data(pd.DataFrame())
 
     mock_save.assert_called_once()
+    mock_save_parquet.assert_called_once()
+    mock_save_vocabulary.assert_called_once()
+    mock_save_group_index.assert_called_once()
+    mock_save_amenity_bitset.assert_called_once()
+    mock_save_amenity_index.assert_called_once()
+    mock_save_amenity_uplift.assert_called_once()
+    mock_save_listing_aggregates.assert_called_once()
+
+
+# I added this test so the chunked pipeline gives the same output as the normal one
+@patch("src.transform.transform_data.save_listing_aggregates")
+@patch("src.transform.transform_data.save_amenity_uplift")
+@patch("src.transform.transform_data.save_amenity_index")
+@patch("src.transform.transform_data.save_amenity_bitset")
+@patch("src.transform.transform_data.save_group_index")
+@patch("src.transform.transform_data.save_vocabulary")
+@patch("src.transform.transform_data.save_dataframe_to_parquet")
+@patch("src.transform.transform_data.load_vocabulary", return_value={})
+@patch("src.transform.transform_data.save_dataframe_to_csv")
+def test_transform_data_chunked_matches_transform_data(mock_save, *_):
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "property_type": ["House", "House", "Apartment", "House"],
+        "room_type": ["Entire home"] * 4,
+        "price": ["$100.00", None, "$80.00", "$1,300.00"],
+        "estimated_revenue_l365d": [5000, 4000, 3000, None],
+        "accommodates": [4, 2, 2, 6],
+        "beds": [None, 2, 1, None],
+        "bedrooms": [2, 2, None, 4],
+        "bathrooms": [None, 1, 1, None],
+        "review_scores_rating": [4.8, 4.5, None, 4.9],
+        "number_of_reviews": [10, 3, 0, 8],
+        "reviews_per_month": [0.5, 0.2, None, 0.7],
+        "availability_365": [200, 100, 50, 300],
+        "host_response_rate": ["95%", "100%", None, "80%"],
+        "host_response_time": ["within an hour"] * 4,
+        "host_since": ["2020-01-01", "2019-05-02", "2021-07-08", "2018-03-04"],
+        "amenities": ["['Wifi']", "['TV']", "[]", "['Wifi','TV']"],
+        "minimum_nights": [2, 1, 3, 2],
+        "maximum_nights": [365, 30, 60, 90],
+        "latitude": [51.52, 51.5, 51.49, 51.51],
+        "longitude": [-0.1, -0.12, -0.11, -0.13],
+        "neighbourhood_cleansed": ["Camden"] * 4,
+        "host_total_listings_count": [3, 1, 1, 2],
+        "host_is_superhost": ["t", "f", "t", "f"],
+        "review_scores_cleanliness": [4.7, 4.5, None, 4.9],
+        "review_scores_value": [4.6, 4.5, None, 4.9],
+        "host_acceptance_rate": ["90%", "85%", None, "99%"],
+        "last_scraped": ["2024-06-10", "2024-06-10", "2024-06-11", "2024-06-11"],
+    })
+
+    expected = transform_data(df)
+    result = transform_data_chunked([df.iloc[:2], df.iloc[2:]])
+
+    pd.testing.assert_frame_equal(result, expected)
+    # I check the tenure is measured from the snapshot, not from the day of the run
+    assert expected["host_tenure_days"].tolist() == [
+        (pd.Timestamp("2024-06-11") - pd.Timestamp(day)).days
+        for day in ["2020-01-01", "2019-05-02", "2021-07-08", "2018-03-04"]
+    ]
+    assert mock_save.call_count == 2
+    # Both runs share the vocabulary like two runs sharing the saved file would,
+    # and although the chunks saw different property types the column stays categorical
+    assert isinstance(result["property_type"].dtype, pd.CategoricalDtype)
+
+
+# I added this test so the amenity index is built once for both of its savers.
+@patch("src.transform.transform_data.save_listing_aggregates")
+@patch("src.transform.transform_data.save_amenity_uplift")
+@patch("src.transform.transform_data.save_amenity_index")
+@patch("src.transform.transform_data.build_amenity_index")
+@patch("src.transform.transform_data.save_amenity_bitset")
+@patch("src.transform.transform_data.save_group_index")
+@patch("src.transform.transform_data.save_vocabulary")
+@patch("src.transform.transform_data.save_dataframe_to_parquet")
+@patch("src.transform.transform_data.save_dataframe_to_csv")
+def test_save_transformed_data_shares_one_amenity_index(
+    mock_save,
+    mock_save_parquet,
+    mock_save_vocabulary,
+    mock_save_group_index,
+    mock_save_amenity_bitset,
+    mock_build_amenity_index,
+    mock_save_amenity_index,
+    mock_save_amenity_uplift,
+    mock_save_listing_aggregates,
+):
+    data = pd.DataFrame({"id": [1], "amenities": [["Wifi"]]})
+
+    save_transformed_data(data, {})
+
+    mock_build_amenity_index.assert_called_once()
+    index = mock_build_amenity_index.return_value
+    assert mock_save_amenity_index.call_args.kwargs["index"] is index
+    assert mock_save_amenity_uplift.call_args.kwargs["index"] is index
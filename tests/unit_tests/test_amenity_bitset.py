@@ -0,0 +1,98 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.amenity_bitset import (
+    amenity_items,
+    encode_amenities,
+    has_amenities,
+    decode_amenities,
+    save_amenity_bitset,
+    load_amenity_bitset,
+)
+from src.transform.amenity_index import build_amenity_index
+
+
+def test_amenity_items_reads_raw_text_and_cleaned_lists():
+    raw = pd.Series(['["Wifi", " TV "]', None, "[]", "['Oven',,'Wifi']"])
+    cleaned = pd.Series([["Wifi", "TV"], [], [], ["Oven", "Wifi"]])
+
+    # I expect the same items and rows whichever form the column is in
+    for amenities in [raw, cleaned]:
+        flat, parents = amenity_items(amenities)
+        assert flat.to_pylist() == ["Wifi", "TV", "Oven", "Wifi"]
+        assert parents.tolist() == [0, 0, 3, 3]
+
+
+def test_encode_amenities_packs_one_bit_per_amenity():
+    amenities = pd.Series([["Wifi", "TV"], [], ["Oven", "Wifi", "Wifi"]])
+
+    bits, vocabulary = encode_amenities(amenities)
+
+    assert vocabulary == ["oven", "tv", "wifi"]
+    assert bits.dtype == np.uint8 and bits.shape == (3, 1)
+    assert decode_amenities(bits, vocabulary) == [["tv", "wifi"], [], ["oven", "wifi"]]
+
+
+def test_encode_amenities_normalises_names_like_the_index():
+    amenities = pd.Series([["Self  check-in", "Wifi"], [" self check-in", "WIFI"]])
+
+    bits, vocabulary = encode_amenities(amenities)
+
+    # I expect different spellings of one amenity to share a bit
+    assert vocabulary == build_amenity_index(amenities)["vocabulary"]
+    assert vocabulary == ["self check-in", "wifi"]
+    assert has_amenities(bits, vocabulary, ["Self Check-in", "Wifi"]).tolist() == [
+        True, True]
+
+
+def test_encode_amenities_with_a_fixed_vocabulary_skips_unknown_names():
+    bits, vocabulary = encode_amenities(
+        pd.Series([["Wifi", "Sauna"]]), vocabulary=["TV", "Wifi"])
+
+    assert decode_amenities(bits, vocabulary) == [["wifi"]]
+
+
+def test_has_amenities_is_a_bitwise_and_or_or():
+    # Wider than one byte so the mask spans several bytes
+    names = [f"amenity {number:02d}" for number in range(12)]
+    amenities = pd.Series([names[:2], [names[0], names[11]], [names[11]], []])
+    bits, vocabulary = encode_amenities(amenities)
+
+    both = has_amenities(bits, vocabulary, [names[0], names[11]])
+    either = has_amenities(bits, vocabulary, [names[0], names[11]], match="any")
+
+    assert both.tolist() == [False, True, False, False]
+    assert either.tolist() == [True, True, True, False]
+    with pytest.raises(KeyError):
+        has_amenities(bits, vocabulary, ["Sauna"])
+
+
+def test_bitset_is_an_order_of_magnitude_smaller_than_lists():
+    rng = np.random.default_rng(0)
+    vocabulary = [f"amenity {number}" for number in range(60)]
+    amenities = pd.Series([
+        list(rng.choice(vocabulary, size=25, replace=False)) for _ in range(1000)])
+
+    bits, _ = encode_amenities(amenities)
+    list_bytes = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(name) for name in row)
+        for row in amenities)
+
+    assert bits.nbytes * 10 < list_bytes
+
+
+def test_save_and_load_amenity_bitset_round_trip(tmp_path):
+    data = pd.DataFrame({
+        "id": pd.array([7, 9], dtype="Int64"),
+        "amenities": [["Wifi"], ["TV", "Wifi"]],
+    })
+    path = tmp_path / "amenities.npz"
+
+    save_amenity_bitset(data, path)
+    saved = load_amenity_bitset(path)
+
+    assert saved["id"].tolist() == [7, 9]
+    assert saved["vocabulary"] == ["tv", "wifi"]
+    assert decode_amenities(saved["bits"], saved["vocabulary"]) == [["wifi"], ["tv", "wifi"]]
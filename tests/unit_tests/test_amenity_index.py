@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from src.transform.amenity_index import (
+    build_amenity_index,
+    postings,
+    intersect_postings,
+    query_listings,
+    save_amenity_index,
+    load_amenity_index,
+)
+
+
+def listings():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "neighbourhood_cleansed": ["Hackney", "Hackney", "Camden", "Hackney", None],
+        "property_type": ["Entire rental unit"] * 5,
+        "price": pd.array([100, 150, 90, None, 80], dtype="Int64"),
+        "amenities": [
+            ["Dishwasher", "Self check-in", "Wifi"],
+            ["dishwasher", "Self  check-in"],
+            ["Dishwasher", "Self check-in"],
+            ["Dishwasher", "Self check-in"],
+            ["Wifi", "wifi"],
+        ],
+    })
+
+
+def test_build_amenity_index_normalises_names_and_posts_each_listing_once():
+    index = build_amenity_index(listings()["amenities"])
+
+    assert index["vocabulary"] == ["dishwasher", "self check-in", "wifi"]
+    assert index["offsets"].tolist() == [0, 4, 8, 10]
+    # I expect listing 4 once under wifi although it names it twice
+    assert postings(index, "WiFi").tolist() == [0, 4]
+    assert postings(index, "Sauna").tolist() == []
+
+
+def test_intersect_postings_keeps_rows_with_every_amenity():
+    index = build_amenity_index(listings()["amenities"])
+
+    assert intersect_postings(index, ["Dishwasher", "Self check-in"]).tolist() == [0, 1, 2, 3]
+    assert intersect_postings(index, ["Dishwasher", "Wifi"]).tolist() == [0]
+    assert intersect_postings(index, ["Dishwasher", "Sauna"]).tolist() == []
+
+
+def test_query_listings_combines_amenities_with_column_filters():
+    df = listings()
+    index = build_amenity_index(df["amenities"])
+
+    result = query_listings(
+        df, index, ["Dishwasher", "Self check-in"],
+        neighbourhood_cleansed="Hackney", price=(None, 120))
+
+    # Listing 4 has no price so it cannot be under the limit
+    assert result["id"].tolist() == [1]
+    assert query_listings(df, index, neighbourhood_cleansed=["Camden", "Hackney"],
+                          price=(90, None))["id"].tolist() == [1, 2, 3]
+
+
+def test_query_listings_matches_a_scan_of_the_lists():
+    rng = np.random.default_rng(0)
+    names = [f"Amenity {number}" for number in range(30)]
+    df = pd.DataFrame({
+        "price": rng.integers(20, 300, size=2000),
+        "amenities": [list(rng.choice(names, size=10, replace=False)) for _ in range(2000)],
+    })
+    index = build_amenity_index(df["amenities"])
+    wanted = names[:3]
+
+    expected = df[
+        df["amenities"].map(lambda row: all(name in row for name in wanted))
+        & (df["price"] <= 120)
+    ]
+
+    pd.testing.assert_frame_equal(
+        query_listings(df, index, wanted, price=(None, 120)), expected)
+
+
+def test_save_and_load_amenity_index_round_trip(tmp_path):
+    data = listings()
+    path = tmp_path / "amenity_index.npz"
+
+    save_amenity_index(data, path)
+    saved = load_amenity_index(path)
+    index = build_amenity_index(data["amenities"])
+
+    assert saved["vocabulary"] == index["vocabulary"]
+    np.testing.assert_array_equal(saved["offsets"], index["offsets"])
+    np.testing.assert_array_equal(saved["positions"], index["positions"])
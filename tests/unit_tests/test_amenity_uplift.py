@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.amenity_index import build_amenity_index
+from src.transform.amenity_uplift import amenity_uplift, save_amenity_uplift
+
+
+def listings():
+    return pd.DataFrame({
+        "neighbourhood_cleansed": ["Hackney"] * 4 + ["Camden"] * 3 + [None],
+        "estimated_revenue_l365d": [
+            9000.0, 7000.0, 3000.0, 1000.0, 2000.0, 4000.0, np.nan, 50000.0],
+        "amenities": [
+            ["Pool", "Wifi"], ["Pool"], ["Wifi"], [],
+            ["Pool"], ["Wifi"], ["Pool", "Wifi"], ["Pool"],
+        ],
+    })
+
+
+# The per-amenity groupby loop this replaces, used as the reference
+def uplift_by_loop(df, min_listings):
+    rows = []
+    has = df["amenities"].map(lambda names: {name.lower() for name in names})
+    for amenity in sorted(set().union(*has)):
+        with_amenity = has.map(lambda names: amenity in names)
+        for neighbourhood, group in df.groupby("neighbourhood_cleansed"):
+            revenue = group["estimated_revenue_l365d"]
+            present = revenue[with_amenity[group.index]].dropna()
+            absent = revenue[~with_amenity[group.index]].dropna()
+            if len(present) >= min_listings and len(absent) >= min_listings:
+                rows.append((neighbourhood, amenity, present.mean() - absent.mean()))
+
+    return sorted(rows)
+
+
+def test_amenity_uplift_compares_means_within_each_neighbourhood():
+    result = amenity_uplift(listings(), min_listings=1)
+
+    hackney = result[result["neighbourhood_cleansed"] == "Hackney"]
+    assert hackney["amenity"].tolist() == ["pool", "wifi"]
+    assert hackney["uplift"].tolist() == [6000.0, 2000.0]
+    assert hackney["rank"].tolist() == [1, 2]
+
+    # The Camden listing without a revenue and the listing without a neighbourhood are left out
+    camden = result[result["neighbourhood_cleansed"] == "Camden"].set_index("amenity")
+    assert camden.loc["wifi", "uplift"] == 2000.0
+    assert camden.loc["pool", "listings_with"] == 1
+    assert camden.loc["pool", "listings_without"] == 1
+
+
+def test_amenity_uplift_needs_min_listings_on_both_sides():
+    result = amenity_uplift(listings(), min_listings=2)
+
+    assert result["neighbourhood_cleansed"].tolist() == ["Hackney", "Hackney"]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 64])
+def test_amenity_uplift_matches_a_groupby_loop(batch_size):
+    rng = np.random.default_rng(0)
+    names = [f"Amenity {number}" for number in range(12)]
+    df = pd.DataFrame({
+        "neighbourhood_cleansed": rng.choice(["Hackney", "Camden", "Brent"], size=600),
+        "estimated_revenue_l365d": rng.gamma(2.0, 3000.0, size=600),
+        "amenities": [list(rng.choice(names, size=5, replace=False)) for _ in range(600)],
+    })
+
+    result = amenity_uplift(
+        df, build_amenity_index(df["amenities"]), min_listings=10, batch_size=batch_size)
+    expected = uplift_by_loop(df, min_listings=10)
+
+    actual = sorted(zip(result["neighbourhood_cleansed"], result["amenity"], result["uplift"]))
+    assert [row[:2] for row in actual] == [row[:2] for row in expected]
+    np.testing.assert_allclose([row[2] for row in actual], [row[2] for row in expected])
+
+
+def test_save_amenity_uplift_writes_the_table(tmp_path):
+    path = tmp_path / "amenity_uplift.csv"
+
+    save_amenity_uplift(listings(), path)
+
+    saved = pd.read_csv(path)
+    assert {"neighbourhood_cleansed", "amenity", "uplift", "rank"} <= set(saved.columns)
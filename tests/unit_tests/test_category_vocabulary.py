@@ -0,0 +1,55 @@
+import pandas as pd
+
+from src.transform.category_vocabulary import (
+    load_vocabulary,
+    save_vocabulary,
+    update_vocabulary,
+    apply_vocabulary,
+    concat_with_vocabulary,
+)
+
+
+def test_update_vocabulary_only_appends_new_values():
+    # I start from a saved vocabulary so I can check known values keep their position
+    vocabulary = {"room_type": ["Private room", "Entire home/apt"]}
+    df = pd.DataFrame({
+        "room_type": ["Shared room", "Private room", "Hotel room", None],
+        "property_type": ["House", "Flat", "House", "Flat"],
+    })
+
+    update_vocabulary(vocabulary, df)
+
+    assert vocabulary["room_type"] == [
+        "Private room", "Entire home/apt", "Hotel room", "Shared room"
+    ]
+    assert vocabulary["property_type"] == ["Flat", "House"]
+
+
+def test_update_vocabulary_reads_categoricals_without_unused_categories():
+    df = pd.DataFrame({"room_type": pd.Categorical(
+        ["Private room"], categories=["Private room", "Unused"])})
+
+    assert update_vocabulary({}, df) == {"room_type": ["Private room"]}
+
+
+def test_save_and_load_vocabulary_round_trip(tmp_path):
+    path = tmp_path / "vocabulary.json"
+    vocabulary = {"room_type": ["Private room", "Entire home/apt"]}
+
+    save_vocabulary(vocabulary, path)
+
+    assert load_vocabulary(path) == vocabulary
+    assert load_vocabulary(tmp_path / "missing.json") == {}
+
+
+def test_concat_with_vocabulary_keeps_categorical_dtype():
+    # The first chunk was encoded before "Flat" was added to the vocabulary
+    vocabulary = {"property_type": ["House"]}
+    first = apply_vocabulary(pd.DataFrame({"property_type": ["House"]}), vocabulary)
+    vocabulary["property_type"].append("Flat")
+    second = apply_vocabulary(pd.DataFrame({"property_type": ["Flat"]}), vocabulary)
+
+    result = concat_with_vocabulary([first, second], vocabulary)
+
+    assert list(result["property_type"].cat.categories) == ["House", "Flat"]
+    assert result["property_type"].tolist() == ["House", "Flat"]
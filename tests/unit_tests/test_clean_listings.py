@@ -1,15 +1,19 @@
+import pytest
 import pandas as pd
 from unittest.mock import patch
 from src.transform.clean_listings import (
     filter_columns,
     convert_objects_to_string,
-    convert_price_to_int,
-    convert_bed_columns_to_int,
-    convert_rates_to_int,
+    parse_numeric_column,
+    convert_numeric_columns,
     convert_host_since,
-    convert_superhost_to_bool,
+    parse_bool_column,
+    convert_bool_flags,
+    BOOL_COLUMNS,
     clean_listings,
+    COL_FOR_INSIGHTS,
 )
+from src.utils.memory_utils import copy_on_write
 
 
 class TestFilterColumns:
@@ -81,51 +85,94 @@ class TestConvertObjectsToString:
         assert result["col2"].dtype != "string"
 
 
-class TestConvertPriceToInt:
-    def test_convert_price_to_int_parses_currency(self):
+class TestParseNumericColumn:
+    def test_parse_numeric_column_strips_and_keeps_missing(self):
+        series = pd.Series(["$1,234.00", "", None, "$1,234.00", "$12"], index=[4, 5, 6, 7, 8])
+
+        result = parse_numeric_column(series, r"[^\d.]")
+
+        # I expect repeated values to parse the same and blanks to become missing
+        assert result.index.tolist() == [4, 5, 6, 7, 8]
+        assert result.tolist() == [1234, pd.NA, pd.NA, 1234, 12]
+
+    def test_parse_numeric_column_uses_the_requested_dtype(self):
+        result = parse_numeric_column(pd.Series(["97%", "5%"]), "%", dtype="float32")
+
+        assert result.dtype == "float32"
+        assert result.tolist() == [97.0, 5.0]
+
+    def test_parse_numeric_column_refuses_fractions_unless_truncating(self):
+        series = pd.Series(["1.5", "2"])
+
+        # I make sure half a bed is an error rather than silently becoming 1
+        with pytest.raises(TypeError):
+            parse_numeric_column(series)
+
+        assert parse_numeric_column(series, truncate=True).tolist() == [1, 2]
+
+    def test_parse_numeric_column_accepts_numeric_input(self):
+        result = parse_numeric_column(pd.Series([2.0, None, 3.0]), dtype="int64[pyarrow]")
+
+        assert result.dtype == "int64[pyarrow]"
+        assert result.tolist() == [2, pd.NA, 3]
+
+
+class TestConvertNumericColumns:
+    def test_convert_numeric_columns_parses_all_columns_present(self):
+        df = pd.DataFrame({
+            "price": ["$1,200", "abc"],
+            "host_response_rate": ["95%", ""],
+            "beds": [2.0, None],
+        })
+
+        result = convert_numeric_columns(df, dtypes={"beds": "Int8"})
+
+        # I check each column gets its own clean up, and that the dtype can be overridden
+        assert result["price"].tolist() == [1200, pd.NA]
+        assert result["host_response_rate"].tolist() == [95, pd.NA]
+        assert result["host_response_rate"].dtype == "Int64"
+        assert result["beds"].dtype == "Int8"
+
+    def test_convert_numeric_columns_parses_currency(self):
         df = pd.DataFrame({
             "price": ["$1,200", "$85.5", "300"]
         })
 
-        result = convert_price_to_int(df)
+        result = convert_numeric_columns(df)
 
         # I expect the function to clean the values and convert them into integers
         assert result["price"].tolist() == [1200, 85, 300]
 
-    def test_convert_price_to_int_handles_invalid(self):
+    def test_convert_numeric_columns_handles_invalid_price(self):
         df = pd.DataFrame({
             "price": ["abc", None]
         })
 
-        result = convert_price_to_int(df)
+        result = convert_numeric_columns(df)
 
         # I check that invalid or empty values become missing values
         assert pd.isna(result["price"][0])
         assert pd.isna(result["price"][1])
 
-
-class TestConvertBedColumnsToInt:
-    def test_convert_bed_columns_to_int_changes_dtypes(self):
+    def test_convert_numeric_columns_changes_bed_dtypes(self):
         df = pd.DataFrame({
             "beds": ["2", "3"],
             "bedrooms": ["1", "4"]
         })
 
-        result = convert_bed_columns_to_int(df)
+        result = convert_numeric_columns(df)
 
         # I confirm that the new dtypes match the expected Int64 type
         assert str(result["beds"].dtype) == "Int64"
         assert str(result["bedrooms"].dtype) == "Int64"
 
-
-class TestConvertRatesToInt:
-    def test_convert_rates_to_int_removes_percent(self):
+    def test_convert_numeric_columns_removes_percent(self):
         df = pd.DataFrame({
             "host_response_rate": ["95%", "80%"],
             "host_acceptance_rate": ["100%", "50%"]
         })
 
-        result = convert_rates_to_int(df)
+        result = convert_numeric_columns(df)
 
         # I check that the percentages have been removed and converted into integers
         assert result["host_response_rate"].tolist() == [95, 80]
@@ -140,26 +187,86 @@ class TestConvertHostSince:
 
         result = convert_host_since(df)
 
-        # I compare string versions of the values since the function returns strings
-        assert str(result["host_since"][0]) == "2020-05-10"
+        # I expect a real datetime column now rather than formatted strings
+        assert result["host_since"].dtype == "datetime64[ns]"
+        assert result["host_since"][0] == pd.Timestamp("2020-05-10")
 
         # Invalid values should convert into a missing date representation
-        assert str(result["host_since"][1]) in ["NaT", "nan", "None"]
+        assert pd.isna(result["host_since"][1])
 
+    def test_convert_host_since_keeps_datetime_with_pyarrow_backend(self):
+        df = pd.DataFrame({
+            "host_since": pd.Series(["2020-05-10", None], dtype="string[pyarrow]")
+        })
 
-class TestConvertSuperhostToBool:
-    def test_convert_superhost_to_bool_converts_values(self):
+        result = convert_host_since(df, "pyarrow")
+
+        assert result["host_since"].dtype == "datetime64[ns]"
+        assert pd.isna(result["host_since"][1])
+
+
+class TestParseBoolColumn:
+    def test_parse_bool_column_handles_padding_case_and_missing(self):
+        series = pd.Series([" T ", "F", "Y", "n", None, "", "waffle", "t"])
+
+        result = parse_bool_column(series)
+
+        # I expect the same answers as the old per row apply, with NA for anything unknown
+        assert result.dtype == "boolean"
+        assert result.tolist() == [
+            True, False, True, False, pd.NA, pd.NA, pd.NA, True
+        ]
+
+    def test_parse_bool_column_accepts_string_and_category_dtypes(self):
+        values = ["t", "f", None, "t"]
+
+        for dtype in ["string", "category"]:
+            result = parse_bool_column(pd.Series(values, dtype=dtype))
+
+            assert result.tolist() == [True, False, pd.NA, True]
+
+    def test_parse_bool_column_does_not_treat_mixed_objects_as_equal(self):
+        # 1 and True hash the same, but str(1) was never a boolean value
+        series = pd.Series([True, 1, "f"], dtype=object)
+
+        assert parse_bool_column(series).tolist() == [True, pd.NA, False]
+
+    def test_parse_bool_column_uses_the_backend_dtype(self):
+        result = parse_bool_column(pd.Series(["t", "f"]), "pyarrow")
+
+        assert result.dtype == "bool[pyarrow]"
+        assert result.tolist() == [True, False]
+
+
+class TestConvertBoolFlags:
+    def test_convert_bool_flags_converts_superhost_values(self):
         df = pd.DataFrame({
             "host_is_superhost": ["t", "f", "yes", "no", "True", "False", "waffle"]
         })
 
-        result = convert_superhost_to_bool(df)
+        result = convert_bool_flags(df)
 
         # I check all possible variations of true or false and ensure invalid values become NA
         assert result["host_is_superhost"].tolist() == [
             True, False, True, False, True, False, pd.NA
         ]
 
+    def test_convert_bool_flags_converts_only_the_flag_columns(self):
+        df = pd.DataFrame({
+            "host_is_superhost": ["t", None],
+            "room_type": ["t", "f"],
+        })
+
+        result = convert_bool_flags(df)
+
+        # I only expect the flag columns to change, other columns are left alone
+        assert result["host_is_superhost"].tolist() == [True, pd.NA]
+        assert result["room_type"].tolist() == ["t", "f"]
+
+    def test_bool_columns_all_survive_the_projection(self):
+        # I make sure every flag reaches the stage instead of being filtered out first
+        assert set(BOOL_COLUMNS) <= set(COL_FOR_INSIGHTS)
+
 
 class TestCleanListings:
     @patch("src.transform.clean_listings.setup_logger")
@@ -238,3 +345,95 @@ class TestCleanListings:
 
         # I check that the number of expected columns stays consistent
         assert cleaned.shape[1] == 27
+
+    @patch("src.transform.clean_listings.setup_logger")
+    def test_clean_listings_pyarrow_backend_matches_default(self, mock_logger):
+        # I clean the same rows with both backends, only the dtypes should differ
+        df = pd.DataFrame({
+            "id": [1, 2],
+            "property_type": ["House", "Flat"],
+            "room_type": ["Private room", "Entire home"],
+            "price": ["$1,100", None],
+            "estimated_revenue_l365d": [20000.0, None],
+            "accommodates": [2, 4],
+            "beds": ["1", ""],
+            "bedrooms": ["1", "2"],
+            "bathrooms": [1.0, None],
+            "review_scores_rating": [4.5, 4.0],
+            "number_of_reviews": [30, 2],
+            "reviews_per_month": [0.5, 0.1],
+            "availability_365": [100, 20],
+            "host_response_rate": ["90%", None],
+            "host_response_time": ["within an hour", None],
+            "host_since": ["2020-01-01", "2019-05-03"],
+            "amenities": ["[Wifi]", "[TV, Oven]"],
+            "minimum_nights": [3, 1],
+            "maximum_nights": [30, 365],
+            "latitude": [51.6, 51.5],
+            "longitude": [-0.15, -0.1],
+            "neighbourhood_cleansed": ["Islington", "Camden"],
+            "host_total_listings_count": [1.0, 4.0],
+            "host_is_superhost": ["f", "t"],
+            "review_scores_cleanliness": [4.7, 4.1],
+            "review_scores_value": [4.6, 4.2],
+            "host_acceptance_rate": ["80%", "100%"]
+        })
+
+        default = clean_listings(df)
+        arrow = clean_listings(df, dtype_backend="pyarrow")
+
+        assert arrow["price"].dtype == "int64[pyarrow]"
+        assert arrow["amenities"].dtype == "string[pyarrow]"
+        assert arrow["host_is_superhost"].dtype == "bool[pyarrow]"
+        assert arrow["latitude"].dtype == "double[pyarrow]"
+        pd.testing.assert_frame_equal(
+            arrow.astype(object).where(arrow.notna(), None),
+            default.astype(object).where(default.notna(), None))
+
+    @patch("src.transform.clean_listings.setup_logger")
+    def test_clean_listings_copy_free_matches_and_leaves_input_alone(self, mock_logger):
+        df = pd.DataFrame({col: ["1", "2"] for col in COL_FOR_INSIGHTS}).assign(
+            price=["$1,100", "$90"],
+            host_since=["2020-01-01", "2019-05-03"],
+            host_is_superhost=["t", "f"],
+            host_response_rate=["90%", "80%"],
+            host_acceptance_rate=["80%", "100%"],
+            extra_column=["x", "y"],
+        )
+        original = df.copy()
+
+        expected = clean_listings(df)
+        with copy_on_write():
+            result = clean_listings(df, copy=False)
+
+        # I expect the same cleaned rows, and the raw frame should not have been modified
+        pd.testing.assert_frame_equal(result, expected)
+        pd.testing.assert_frame_equal(df, original)
+
+    @patch("src.transform.clean_listings.setup_logger")
+    def test_clean_listings_encodes_categories_from_vocabulary(self, mock_logger):
+        # I pass a saved vocabulary that is missing one of the room types in the data
+        df = pd.DataFrame({col: [None, None] for col in [
+            "id", "price", "estimated_revenue_l365d", "accommodates", "beds",
+            "bedrooms", "bathrooms", "review_scores_rating", "number_of_reviews",
+            "reviews_per_month", "availability_365", "host_response_rate",
+            "host_since", "amenities", "minimum_nights", "maximum_nights",
+            "latitude", "longitude", "host_total_listings_count",
+            "review_scores_cleanliness", "review_scores_value",
+            "host_acceptance_rate"]})
+        df = df.assign(
+            property_type=["House", "Flat"],
+            room_type=["Private room", "Hotel room"],
+            neighbourhood_cleansed=["Camden", "Camden"],
+            host_response_time=["within an hour", None],
+            host_is_superhost=["t", "f"],
+        )
+        vocabulary = {"room_type": ["Private room", "Entire home/apt"]}
+
+        cleaned = clean_listings(df, vocabulary=vocabulary)
+
+        assert cleaned["room_type"].dtype == pd.CategoricalDtype(
+            ["Private room", "Entire home/apt", "Hotel room"])
+        assert cleaned["host_response_time"].dtype.name == "category"
+        # The new room type was added to the vocabulary that was passed in
+        assert vocabulary["room_type"][-1] == "Hotel room"
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from src.transform.clean_reviews import (
+    month_number,
+    review_partials,
+    merge_review_partials,
+    new_review_totals,
+    add_review_chunk,
+    finish_reviews,
+)
+
+
+@pytest.fixture
+def reviews():
+    # Listing 1 has three reviews across two years, listing 2 has one recent review
+    return pd.DataFrame({
+        "listing_id": [1, 1, 2, 1],
+        "date": ["2023-01-15", "2024-11-02", "2024-12-20", "2024-12-01"],
+        "comments": pd.array(["Great", "Lovely flat", None, "Good"],
+                             dtype="string"),
+    })
+
+
+class TestReviewPartials:
+
+    def test_review_partials_totals_per_listing(self, reviews):
+        totals, monthly = review_partials(reviews)
+
+        assert totals.loc[1, "reviews_total"] == 3
+        assert totals.loc[1, "first_review"] == pd.Timestamp("2023-01-15")
+        assert totals.loc[1, "comment_length_max"] == len("Lovely flat")
+        # A missing comment counts as zero length
+        assert totals.loc[2, "length_sum"] == 0
+        assert monthly.sum() == 4
+
+    def test_merge_review_partials_drops_old_months(self, reviews):
+        first = review_partials(reviews.iloc[:2])
+        second = review_partials(reviews.iloc[2:])
+        window_end = month_number(pd.Series(pd.to_datetime(["2024-12-31"])))[0]
+
+        totals, monthly = merge_review_partials(
+            merge_review_partials(None, first, window_end), second, window_end
+        )
+
+        # The January 2023 month is outside the 12 month window so it is pruned,
+        # but it is still counted in the listing totals
+        assert totals.loc[1, "reviews_total"] == 3
+        assert monthly.loc[1].sum() == 2
+
+
+def aggregate_reviews(chunks, as_of=None):
+    # I run the chunks through the same steps extract_aggregates uses
+    totals = new_review_totals()
+    for chunk in chunks:
+        add_review_chunk(totals, chunk, as_of)
+
+    return finish_reviews(totals, as_of)
+
+
+class TestFinishReviews:
+
+    def test_finish_reviews_features(self, reviews):
+        result = aggregate_reviews([reviews])
+
+        assert result.loc[1, "reviews_total"] == 3
+        assert result.loc[1, "reviews_last_12m"] == 2
+        assert result.loc[2, "days_since_last_review"] == 0
+        assert result.loc[1, "days_since_last_review"] == 19
+        # 3 reviews from January 2023 to December 2024 is 24 months
+        assert result.loc[1, "review_velocity"] == round(3 / 24, 3)
+        assert result.loc[1, "comment_length_mean"] == round((5 + 11 + 4) / 3, 1)
+
+    def test_finish_reviews_same_result_for_any_chunking(self, reviews):
+        expected = aggregate_reviews([reviews])
+
+        # I feed one review at a time to mimic a very large file
+        chunks = [reviews.iloc[[i]] for i in range(len(reviews))]
+        pd.testing.assert_frame_equal(aggregate_reviews(chunks), expected)
+
+    def test_finish_reviews_uses_as_of_date(self, reviews):
+        result = aggregate_reviews([reviews], as_of="2025-12-31")
+
+        assert result.loc[2, "days_since_last_review"] == 376
+        assert result.loc[1, "reviews_last_12m"] == 0
+
+    def test_finish_reviews_raises_when_empty(self):
+        with pytest.raises(ValueError, match="no rows"):
+            finish_reviews(new_review_totals())
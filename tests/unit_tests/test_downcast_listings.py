@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from src.transform.downcast_listings import (
+    smallest_dtype,
+    memory_report,
+    downcast_numeric_columns,
+)
+from src.transform.transform_listings import transform_listings
+
+
+def cleaned_listings():
+    # Shaped like the output of clean_listings, with the nullable dtypes it produces
+    return pd.DataFrame({
+        "id": pd.array([1, 2, 3, 4], dtype="Int64"),
+        "property_type": ["House", "House", "Flat", "House"],
+        "price": pd.array([100, None, 80, 300], dtype="Int64"),
+        "estimated_revenue_l365d": [5000.0, 4000.0, 3000.0, 2500.5],
+        "accommodates": pd.array([2, 4, 2, 6], dtype="Int64"),
+        "beds": pd.array([None, 2, 1, 3], dtype="Int64"),
+        "bedrooms": pd.array([2, 2, 5, 3], dtype="Int64"),
+        "bathrooms": [None, 1.0, None, 2.0],
+        "review_scores_rating": [4.87, 4.5, 0.0, 4.13],
+        "review_scores_cleanliness": [4.71, 4.5, 0.0, 4.02],
+        "review_scores_value": [4.66, 4.5, 0.0, 3.91],
+        "number_of_reviews": pd.array([10, 3, 0, 7], dtype="Int64"),
+        "reviews_per_month": [0.53, 0.21, 1.0, 0.37],
+        "availability_365": pd.array([200, 100, 50, 30], dtype="Int64"),
+        "amenities": ["['Wifi']", "['TV', 'Oven']", None, "[]"],
+        "minimum_nights": pd.array([2, 1, 3, 7], dtype="Int64"),
+        "latitude": [51.5012345, 51.4987654, 51.52, 51.47],
+        "neighbourhood_cleansed": ["Camden"] * 4,
+        "host_is_superhost": pd.array([True, False, True, False], dtype="boolean"),
+    })
+
+
+def test_smallest_dtype_keeps_headroom_and_dtype_family():
+    # I expect twice the observed range to fit, so 100 needs int16 rather than int8
+    assert smallest_dtype(pd.Series([0, 60], dtype="Int64")) == "Int8"
+    assert smallest_dtype(pd.Series([0, 100], dtype="Int64")) == "Int16"
+    assert smallest_dtype(pd.Series([0, 100], dtype="int64")) == "int16"
+    assert smallest_dtype(pd.Series([0, 100], dtype="int64[pyarrow]")) == "int16[pyarrow]"
+    assert smallest_dtype(pd.Series([0, 2 ** 40], dtype="Int64")) is None
+
+
+def test_smallest_dtype_only_uses_float32_within_tolerance():
+    assert smallest_dtype(pd.Series([4.87, np.nan])) == "float32"
+    # Money with cents at this size would be off by more than the tolerance in float32
+    assert smallest_dtype(pd.Series([123456789.01])) is None
+    assert smallest_dtype(pd.Series([np.nan, np.nan])) is None
+
+
+def test_downcast_numeric_columns_skips_ids_and_flags():
+    result = downcast_numeric_columns(cleaned_listings())
+
+    assert result["id"].dtype == "Int64"
+    assert result["host_is_superhost"].dtype == "boolean"
+    assert result["accommodates"].dtype == "Int8"
+    assert result["review_scores_rating"].dtype == "float32"
+
+
+def test_memory_report_lists_downcast_columns_with_a_total():
+    before = cleaned_listings()
+    after = downcast_numeric_columns(before)
+
+    report = memory_report(before, after)
+
+    # I check the memory table only lists changed columns and that memory went down
+    assert "id" not in report.index
+    assert report.loc["accommodates", "dtype_after"] == "Int8"
+    assert report.loc["total", "mb_after"] < report.loc["total", "mb_before"]
+
+
+def test_transform_listings_matches_within_tolerance_after_downcasting():
+    # I run the same cleaned rows through the transformations with and without downcasting
+    expected = transform_listings(cleaned_listings(), as_of="2025-01-01")
+    result = transform_listings(
+        downcast_numeric_columns(cleaned_listings()), as_of="2025-01-01")
+
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(
+        result, expected, check_dtype=False, rtol=1e-6, atol=1e-4)
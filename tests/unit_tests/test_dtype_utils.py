@@ -0,0 +1,37 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.utils.dtype_utils import backend_dtype, backend_dtypes, is_arrow_list
+
+
+def test_backend_dtype_maps_each_backend():
+    assert backend_dtype("int") == "Int64"
+    assert backend_dtype("string", "pyarrow") == "string[pyarrow]"
+    assert backend_dtype("bool", "pyarrow") == "bool[pyarrow]"
+
+
+def test_backend_dtype_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        backend_dtype("int", "polars")
+
+
+def test_backend_dtypes_keeps_category():
+    # category has no Arrow equivalent in the map so it should be left alone
+    dtypes = {"id": "Int64", "room_type": "category", "price": "string"}
+
+    result = backend_dtypes(dtypes, "pyarrow")
+
+    assert result == {
+        "id": "int64[pyarrow]",
+        "room_type": "category",
+        "price": "string[pyarrow]",
+    }
+
+
+def test_is_arrow_list_only_for_arrow_lists():
+    arrow_lists = pd.Series([["Wifi"]], dtype=pd.ArrowDtype(pa.list_(pa.string())))
+
+    assert is_arrow_list(arrow_lists)
+    assert not is_arrow_list(pd.Series([["Wifi"]]))
+    assert not is_arrow_list(pd.Series(["Wifi"], dtype="string[pyarrow]"))
@@ -0,0 +1,67 @@
+import os
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+
+from src.extract.extract_cache import read_with_cache
+
+
+@pytest.fixture
+def raw_file(tmp_path):
+    raw = tmp_path / "listings.csv"
+    raw.write_text("id,price\n1,$70.00\n2,$85.00\n")
+    return raw
+
+
+@pytest.fixture
+def reader():
+    # I wrap pd.read_csv in a mock so I can count how often the CSV is actually parsed
+    return MagicMock(side_effect=lambda path: pd.read_csv(path))
+
+
+def test_read_with_cache_parses_once_then_hits(raw_file, reader, tmp_path):
+    cache_dir = tmp_path / "cache"
+
+    first = read_with_cache(raw_file, reader, "full", cache_dir)
+    second = read_with_cache(raw_file, reader, "full", cache_dir)
+
+    # The second read should come from parquet without touching the csv reader
+    assert reader.call_count == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+
+def test_read_with_cache_keeps_variants_separate(raw_file, reader, tmp_path):
+    cache_dir = tmp_path / "cache"
+
+    read_with_cache(raw_file, reader, "full", cache_dir)
+    read_with_cache(raw_file, reader, "projected", cache_dir)
+
+    assert reader.call_count == 2
+    assert len(list(cache_dir.glob("*.parquet"))) == 2
+
+
+def test_read_with_cache_misses_when_contents_change(raw_file, reader, tmp_path):
+    cache_dir = tmp_path / "cache"
+    read_with_cache(raw_file, reader, "full", cache_dir)
+
+    # I change the file so the size, mtime and hash all change
+    raw_file.write_text("id,price\n1,$70.00\n2,$85.00\n3,$99.00\n")
+    result = read_with_cache(raw_file, reader, "full", cache_dir)
+
+    assert reader.call_count == 2
+    assert len(result) == 3
+    # I check the cached copy of the old version was cleaned up
+    assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+
+def test_read_with_cache_hits_when_only_mtime_changes(raw_file, reader, tmp_path):
+    cache_dir = tmp_path / "cache"
+    read_with_cache(raw_file, reader, "full", cache_dir)
+
+    # Touching the file forces a re-hash, but the contents are the same
+    stat = raw_file.stat()
+    os.utime(raw_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    read_with_cache(raw_file, reader, "full", cache_dir)
+
+    assert reader.call_count == 1
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from src.extract.extract_calendar import (
+    iter_calendar_chunks,
+    aggregate_calendar_chunks,
+    extract_calendar,
+)
+
+
+@pytest.fixture
+def calendar_file(tmp_path):
+    # Listing 1 has a 3 night booking and a 40 night block,
+    # listing 2 is free every night except a 2 night booking
+    rows = []
+    dates = pd.date_range("2025-01-01", periods=50).strftime("%Y-%m-%d")
+    for i, date in enumerate(dates):
+        available = "f" if i < 3 or i >= 10 else "t"
+        rows.append(f"1,{date},{available},$100.00,,1,30")
+    for i, date in enumerate(dates):
+        available = "f" if i in (20, 21) else "t"
+        price = "$1,200.00" if i % 2 else "$1,000.00"
+        rows.append(f'2,{date},{available},"{price}",,1,30')
+
+    calendar = tmp_path / "calendar.csv"
+    calendar.write_text(
+        "listing_id,date,available,price,adjusted_price,"
+        "minimum_nights,maximum_nights\n" + "\n".join(rows) + "\n"
+    )
+    return calendar
+
+
+def test_iter_calendar_chunks_reads_needed_columns(calendar_file):
+    chunks = list(iter_calendar_chunks(calendar_file, chunksize=30))
+
+    assert sum(len(chunk) for chunk in chunks) == 100
+    assert list(chunks[0].columns) == ["listing_id", "date", "available", "price"]
+
+
+def test_extract_calendar_splits_booked_and_blocked_nights(calendar_file):
+    result = extract_calendar(calendar_file)
+
+    assert result.loc[1, "calendar_nights"] == 50
+    assert result.loc[1, "booked_nights"] == 3
+    assert result.loc[1, "blocked_nights"] == 40
+    assert result.loc[2, "booked_nights"] == 2
+    assert result.loc[2, "blocked_nights"] == 0
+
+
+def test_extract_calendar_price_mean_and_variance(calendar_file):
+    result = extract_calendar(calendar_file)
+
+    # I compare against pandas' own mean and variance of the same prices
+    prices = pd.Series([1000.0, 1200.0] * 25)
+    assert result.loc[1, "calendar_price_var"] == 0
+    assert result.loc[2, "calendar_price_mean"] == pytest.approx(prices.mean())
+    assert result.loc[2, "calendar_price_var"] == pytest.approx(prices.var())
+
+
+def test_extract_calendar_same_result_for_any_chunk_size(calendar_file):
+    # Chunk sizes that split listings and runs in different places should not change anything
+    expected = extract_calendar(calendar_file, chunksize=1000)
+
+    for chunksize in [1, 7, 30, 49, 51]:
+        pd.testing.assert_frame_equal(
+            extract_calendar(calendar_file, chunksize=chunksize), expected
+        )
+
+
+def test_aggregate_calendar_chunks_raises_when_empty():
+    with pytest.raises(ValueError, match="no rows"):
+        aggregate_calendar_chunks([])
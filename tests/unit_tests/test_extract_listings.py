@@ -1,11 +1,18 @@
 import os
 import pytest
+import gzip
 import pandas as pd
+import pyarrow as pa
 from pathlib import Path
 
 from src.extract.extract_listings import (
     extract_listings,
     extract_listings_execution,
+    read_listings_file,
+    iter_listings_chunks,
+    extract_listings_chunked,
+    is_csv_file,
+    dataset_name,
     TYPE,
     EXPECTED_IMPORT_RATE,
 )
@@ -153,3 +160,233 @@ def test_extract_listings_execution_read_csv_failure(mocker):
 
     with pytest.raises(Exception):
         extract_listings_execution()
+
+
+def test_read_listings_file_projected_keeps_only_insight_columns(tmp_path):
+    # I wrote a small csv with an extra column so I can check it never gets parsed
+    csv_file = tmp_path / "listings.csv"
+    csv_file.write_text(
+        "id,last_scraped,room_type,price,accommodates,waffle\n"
+        "1,2024-06-10,Private room,$70.00,2,abc\n"
+        "2,2024-06-10,Entire home/apt,,4,def\n"
+    )
+
+    result = read_listings_file(csv_file, projected=True)
+
+    # The snapshot date is kept too, the transform measures host tenure from it
+    assert list(result.columns) == [
+        "id", "room_type", "price", "accommodates", "last_scraped"]
+    assert result["last_scraped"].dtype.name == "string"
+    # I check the declared dtypes were applied by the reader
+    assert str(result["id"].dtype) == "Int64"
+    assert str(result["room_type"].dtype) == "category"
+    assert result["price"].dtype.name == "string"
+    assert pd.isna(result["price"][1])
+
+
+def test_read_listings_file_pyarrow_backend(tmp_path):
+    # I read the same small file with the Arrow backend to check the declared dtypes follow it
+    csv_file = tmp_path / "listings.csv"
+    csv_file.write_text(
+        "id,room_type,price,accommodates,latitude\n"
+        "1,Private room,$70.00,2,51.5\n"
+        "2,Entire home/apt,,4,51.6\n"
+    )
+
+    result = read_listings_file(csv_file, projected=True, dtype_backend="pyarrow")
+
+    assert str(result["id"].dtype) == "int64[pyarrow]"
+    assert str(result["room_type"].dtype) == "category"
+    assert result["price"].dtype == "string[pyarrow]"
+    assert str(result["latitude"].dtype) == "double[pyarrow]"
+    assert pd.isna(result["price"][1])
+
+
+def test_read_listings_file_projected_reads_other_files_in_full(tmp_path):
+    # A file with none of the listings columns should still load as normal
+    csv_file = tmp_path / "other.csv"
+    csv_file.write_text("a,b\n1,2\n")
+
+    result = read_listings_file(csv_file, projected=True)
+
+    assert list(result.columns) == ["a", "b"]
+
+
+def test_extract_listings_passes_projected_flag(mocker, mock_logger):
+    # I check the read mode is passed down to the execution function
+    mock_execution = mocker.patch(
+        "src.extract.extract_listings.extract_listings_execution",
+        return_value={},
+    )
+
+    extract_listings(projected=True)
+
+    mock_execution.assert_called_once_with(
+        projected=True, workers=1, use_cache=False, files=None,
+        dtype_backend="numpy_nullable"
+    )
+
+
+def test_extract_listings_execution_parallel_matches_sequential(mocker, tmp_path):
+    # I wrote three small csv files so the worker pool has more than one file to share out
+    files = []
+    for i in range(3):
+        csv_file = tmp_path / f"city{i}.csv"
+        csv_file.write_text(f"id,name\n{i},Listing {i}\n")
+        files.append(csv_file)
+
+    mocker.patch(
+        "src.extract.extract_listings.Path.iterdir", return_value=files
+    )
+    mocker.patch(
+        "src.extract.extract_listings.Path.exists", return_value=True
+    )
+
+    sequential = extract_listings_execution(workers=1)
+    parallel = extract_listings_execution(workers=2)
+
+    # I expect the same keys in the same order and the same content
+    assert list(parallel.keys()) == ["city0", "city1", "city2"]
+    assert list(parallel.keys()) == list(sequential.keys())
+    for name, df in sequential.items():
+        pd.testing.assert_frame_equal(parallel[name], df)
+
+
+def test_extract_listings_execution_logs_per_file_timings(mocker, mock_logger):
+    csv_file = Path("/fake/file1.csv")
+
+    mocker.patch(
+        "src.extract.extract_listings.Path.iterdir", return_value=[csv_file]
+    )
+    mocker.patch(
+        "src.extract.extract_listings.Path.exists", return_value=True
+    )
+    mocker.patch("src.extract.extract_listings.pd.read_csv",
+                 return_value=pd.DataFrame({"id": [1]}))
+
+    extract_listings_execution()
+
+    # I check one of the log lines mentions the parse time for the file
+    messages = [call.args[0] for call in mock_logger.info.call_args_list]
+    assert any(msg.startswith("Parsed 'file1' in") for msg in messages)
+
+
+def test_iter_listings_chunks_yields_fixed_size_projected_chunks(tmp_path):
+    # I wrote five rows so that a chunk size of 2 should give me 2, 2 and 1 rows
+    csv_file = tmp_path / "listings.csv"
+    rows = "\n".join(f"{i},Private room,${i}0.00,abc" for i in range(5))
+    csv_file.write_text("id,room_type,price,waffle\n" + rows + "\n")
+
+    chunks = list(iter_listings_chunks(csv_file, chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    # I check the unused column was never read and the dtypes were declared
+    for chunk in chunks:
+        assert list(chunk.columns) == ["id", "room_type", "price"]
+        assert str(chunk["id"].dtype) == "Int64"
+    # The index should carry on across chunks so rows stay unique
+    assert chunks[2].index.tolist() == [4]
+
+
+def test_extract_listings_chunked_is_lazy(mocker, tmp_path):
+    csv_file = tmp_path / "file1.csv"
+    csv_file.write_text("id\n1\n2\n")
+
+    mocker.patch(
+        "src.extract.extract_listings.Path.iterdir", return_value=[csv_file]
+    )
+    mocker.patch(
+        "src.extract.extract_listings.Path.exists", return_value=True
+    )
+    mock_read_csv = mocker.spy(pd, "read_csv")
+
+    result = extract_listings_chunked(chunksize=1)
+
+    # I check nothing is parsed until I start pulling chunks
+    assert list(result.keys()) == ["file1"]
+    mock_read_csv.assert_not_called()
+    assert sum(len(chunk) for chunk in result["file1"]) == 2
+
+
+def test_is_csv_file_accepts_compressed_snapshots():
+    # I check the Inside Airbnb style names are picked up but other files are not
+    assert is_csv_file(Path("listings.csv"))
+    assert is_csv_file(Path("listings.csv.gz"))
+    assert is_csv_file(Path("calendar.CSV.zst"))
+    assert not is_csv_file(Path("notes.txt"))
+    assert not is_csv_file(Path("archive.gz"))
+
+
+def test_dataset_name_strips_compression_suffix():
+    assert dataset_name(Path("listings.csv.gz")) == "listings"
+    assert dataset_name(Path("detailed_listings_data.csv")) == "detailed_listings_data"
+
+
+def test_read_listings_file_reads_gzip_and_zstd(tmp_path):
+    # I wrote the same data in both compressed formats so I can compare them to the plain csv
+    content = b"id,room_type,price\n1,Private room,$70.00\n2,Shared room,$20.00\n"
+
+    gz_file = tmp_path / "listings.csv.gz"
+    with gzip.open(gz_file, "wb") as f:
+        f.write(content)
+
+    zst_file = tmp_path / "listings.csv.zst"
+    with pa.output_stream(str(zst_file), compression="zstd") as f:
+        f.write(content)
+
+    csv_file = tmp_path / "listings.csv"
+    csv_file.write_bytes(content)
+    expected = read_listings_file(csv_file, projected=True)
+
+    for compressed in [gz_file, zst_file]:
+        pd.testing.assert_frame_equal(
+            read_listings_file(compressed, projected=True), expected
+        )
+        pd.testing.assert_frame_equal(
+            read_listings_file(compressed), read_listings_file(csv_file)
+        )
+
+
+def test_iter_listings_chunks_streams_gzip(tmp_path):
+    gz_file = tmp_path / "listings.csv.gz"
+    with gzip.open(gz_file, "wt") as f:
+        f.write("id,price\n" + "".join(f"{i},$1.00\n" for i in range(5)))
+
+    chunks = list(iter_listings_chunks(gz_file, chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+def test_extract_listings_execution_keys_compressed_files_by_dataset(mocker, tmp_path):
+    gz_file = tmp_path / "listings.csv.gz"
+    with gzip.open(gz_file, "wt") as f:
+        f.write("id\n1\n")
+
+    mocker.patch(
+        "src.extract.extract_listings.Path.iterdir", return_value=[gz_file]
+    )
+    mocker.patch(
+        "src.extract.extract_listings.Path.exists", return_value=True
+    )
+
+    result = extract_listings_execution()
+
+    assert list(result.keys()) == ["listings"]
+
+
+def test_extract_listings_execution_leaves_calendar_to_its_extractor(mocker):
+    # I include a calendar file to check it is not loaded as if it were listings
+    files = [Path("/fake/listings.csv"), Path("/fake/calendar.csv")]
+
+    mocker.patch(
+        "src.extract.extract_listings.Path.iterdir", return_value=files
+    )
+    mocker.patch(
+        "src.extract.extract_listings.Path.exists", return_value=True
+    )
+    mocker.patch("src.extract.extract_listings.pd.read_csv",
+                 return_value=pd.DataFrame({"id": [1]}))
+
+    result = extract_listings_execution()
+
+    assert list(result.keys()) == ["listings"]
@@ -0,0 +1,75 @@
+import os
+import pytest
+
+from src.extract.extract_manifest import (
+    load_manifest,
+    diff_against_manifest,
+    commit_manifest,
+)
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "london.csv").write_text("id\n1\n")
+    (raw / "paris.csv").write_text("id\n2\n")
+    return raw
+
+
+def test_load_manifest_is_empty_on_first_run(tmp_path):
+    assert load_manifest(tmp_path / "missing.json") == {}
+
+
+def test_diff_against_manifest_first_run_everything_is_new(raw_dir):
+    files = sorted(raw_dir.iterdir())
+
+    delta = diff_against_manifest(files, {})
+
+    assert delta["new"] == ["london.csv", "paris.csv"]
+    assert delta["changed"] == delta["unchanged"] == delta["removed"] == []
+
+
+def test_diff_against_manifest_detects_each_kind_of_change(raw_dir, tmp_path):
+    manifest_path = tmp_path / "raw_manifest.json"
+    files = sorted(raw_dir.iterdir())
+    commit_manifest(diff_against_manifest(files, {}), manifest_path)
+
+    # I change one file, add another and delete a third to cover every case
+    (raw_dir / "london.csv").write_text("id\n1\n3\n")
+    (raw_dir / "rome.csv").write_text("id\n4\n")
+    (raw_dir / "paris.csv").unlink()
+
+    files = sorted(raw_dir.iterdir())
+    delta = diff_against_manifest(files, load_manifest(manifest_path))
+
+    assert delta["new"] == ["rome.csv"]
+    assert delta["changed"] == ["london.csv"]
+    assert delta["unchanged"] == []
+    assert delta["removed"] == ["paris.csv"]
+
+
+def test_diff_against_manifest_touched_file_is_unchanged(raw_dir, tmp_path):
+    manifest_path = tmp_path / "raw_manifest.json"
+    files = sorted(raw_dir.iterdir())
+    commit_manifest(diff_against_manifest(files, {}), manifest_path)
+
+    # Only the mtime moves, so the hash should show the contents are the same
+    london = raw_dir / "london.csv"
+    stat = london.stat()
+    os.utime(london, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    delta = diff_against_manifest(files, load_manifest(manifest_path))
+
+    assert delta["unchanged"] == ["london.csv", "paris.csv"]
+
+
+def test_commit_manifest_records_files_on_disk(raw_dir, tmp_path):
+    manifest_path = tmp_path / "raw_manifest.json"
+    files = sorted(raw_dir.iterdir())
+
+    commit_manifest(diff_against_manifest(files, {}), manifest_path)
+    manifest = load_manifest(manifest_path)
+
+    assert set(manifest.keys()) == {"london.csv", "paris.csv"}
+    assert set(manifest["london.csv"].keys()) == {"size", "mtime_ns", "sha256"}
@@ -0,0 +1,19 @@
+from src.extract.extract_reviews import iter_review_batches
+
+
+def test_iter_review_batches_reads_multiline_comments(tmp_path):
+    # I put a line break inside a quoted comment, which is common in reviews
+    reviews = tmp_path / "reviews.csv"
+    reviews.write_text(
+        "listing_id,id,date,reviewer_id,reviewer_name,comments\n"
+        '1,10,2024-01-01,5,Sam,"Great place\nwould stay again"\n'
+        "2,12,2024-03-01,7,Jo,Lovely\n"
+    )
+
+    batches = list(iter_review_batches(reviews))
+
+    assert sum(batch.num_rows for batch in batches) == 2
+    assert batches[0].schema.names == ["listing_id", "comments"]
+    assert batches[0].column("comments")[0].as_py() == (
+        "Great place\nwould stay again"
+    )
@@ -0,0 +1,32 @@
+import hashlib
+import pandas as pd
+import pyarrow as pa
+
+from src.utils.file_utils import file_fingerprint, save_dataframe_to_csv
+
+
+def test_file_fingerprint_matches_size_and_hash(tmp_path):
+    # I use a block size smaller than the file so the hash is built over several reads
+    content = b"id,price\n1,$70.00\n" * 10
+    raw_file = tmp_path / "listings.csv"
+    raw_file.write_bytes(content)
+
+    fingerprint = file_fingerprint(raw_file, block_size=7)
+
+    assert fingerprint["size"] == len(content)
+    assert fingerprint["sha256"] == hashlib.sha256(content).hexdigest()
+    assert fingerprint["mtime_ns"] == raw_file.stat().st_mtime_ns
+
+
+def test_save_dataframe_to_csv_writes_arrow_lists_like_python_lists(tmp_path, mocker):
+    # I save the same amenities as an Arrow list column and as python lists
+    mocker.patch("src.utils.file_utils.ROOT_DIR", str(tmp_path))
+    amenities = [["Wifi", "TV"], []]
+    arrow = pd.DataFrame({"amenities": pd.Series(
+        amenities, dtype=pd.ArrowDtype(pa.list_(pa.string())))})
+
+    save_dataframe_to_csv(arrow, "out", "arrow.csv")
+    save_dataframe_to_csv(pd.DataFrame({"amenities": amenities}), "out", "py.csv")
+
+    assert (tmp_path / "out" / "arrow.csv").read_text() == (
+        tmp_path / "out" / "py.csv").read_text()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.listing_aggregates import (
+    DIMENSIONS,
+    rollup,
+    cube,
+    grouping_sets_aggregate,
+    select_grouping_set,
+    save_listing_aggregates,
+    load_aggregates,
+)
+
+
+def listings():
+    return pd.DataFrame({
+        "neighbourhood_cleansed": pd.Categorical(
+            ["Hackney", "Hackney", "Camden", "Camden", None, "Hackney"]),
+        "room_type": ["Entire home", "Private room", "Entire home",
+                      "Entire home", "Private room", "Entire home"],
+        "property_type": ["Flat", "Flat", "House", "Flat", "Flat", "House"],
+        "price": [100.0, 50.0, 200.0, np.nan, 80.0, 150.0],
+        "host_is_superhost": pd.array([True, False, True, None, False, False],
+                                      dtype="boolean"),
+    })
+
+
+def test_rollup_and_cube_list_their_grouping_sets():
+    assert rollup(["a", "b"]) == [("a", "b"), ("a",), ()]
+    assert cube(["a", "b"]) == [("a", "b"), ("a",), ("b",), ()]
+
+
+def test_grouping_sets_aggregate_totals_for_the_whole_city():
+    result = select_grouping_set(grouping_sets_aggregate(listings()))
+
+    # I expect means to skip missing values and the listing count to count every row
+    assert result["listings"].tolist() == [6]
+    assert result["price"].tolist() == [116.0]
+    assert result["host_is_superhost"].tolist() == [0.4]
+
+
+def test_grouping_sets_aggregate_leaves_out_missing_keys_like_groupby():
+    aggregates = grouping_sets_aggregate(listings())
+
+    result = select_grouping_set(aggregates, ["neighbourhood_cleansed"])
+
+    assert result["neighbourhood_cleansed"].tolist() == ["Camden", "Hackney"]
+    assert result["listings"].tolist() == [2, 3]
+    assert result["price"].tolist() == [200.0, 100.0]
+    assert list(result.columns) == [
+        "neighbourhood_cleansed", "listings", "price", "host_is_superhost"]
+
+
+@pytest.mark.parametrize("grouping_set", cube(DIMENSIONS)[:-1])
+def test_grouping_sets_aggregate_matches_groupby_means(grouping_set):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "neighbourhood_cleansed": rng.choice(["Hackney", "Camden", "Brent", None], size=500),
+        "room_type": rng.choice(["Entire home", "Private room"], size=500),
+        "property_type": rng.choice(["Flat", "House", "Loft"], size=500),
+        "price": np.where(rng.random(500) < 0.1, np.nan, rng.gamma(2.0, 60.0, size=500)),
+        "occupancy_potential": rng.random(500),
+    })
+
+    result = select_grouping_set(
+        grouping_sets_aggregate(df, grouping_sets=[grouping_set]), grouping_set)
+    expected = (
+        df.groupby(list(grouping_set))
+        .agg(listings=("price", "size"), price=("price", "mean"),
+             occupancy_potential=("occupancy_potential", "mean"))
+        .reset_index()
+    )
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_save_listing_aggregates_round_trip(tmp_path):
+    path = tmp_path / "listing_aggregates.csv"
+
+    save_listing_aggregates(listings(), path)
+
+    saved = load_aggregates(path)
+    assert saved["grouping_set"].unique().tolist() == [
+        "all", "neighbourhood_cleansed", "room_type", "property_type",
+        "neighbourhood_cleansed+room_type"]
+    assert select_grouping_set(saved, ["room_type"])["listings"].tolist() == [4, 2]
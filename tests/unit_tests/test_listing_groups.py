@@ -0,0 +1,56 @@
+import pandas as pd
+
+from src.transform.listing_groups import (
+    add_group_codes,
+    group_keys,
+    group_index,
+    save_group_index,
+    load_group_index,
+)
+
+
+def listings():
+    return pd.DataFrame({
+        "neighbourhood_cleansed": pd.Categorical(
+            ["Camden", "Camden", "Barnet", None, "Camden"]),
+        "property_type": pd.Categorical(
+            ["Flat", "House", "Flat", "Flat", "Flat"]),
+        "price": [100.0, 200.0, 50.0, 75.0, 120.0],
+    })
+
+
+def test_add_group_codes_numbers_each_pair_once():
+    result = add_group_codes(listings())
+
+    # I expect the same pair to share a code and a missing key to have no group
+    assert result["listing_group"].tolist() == [1, 2, 0, pd.NA, 1]
+    assert result["listing_group"].dtype == "Int32"
+    assert group_keys(result) == "listing_group"
+    assert group_keys(listings()) == ["neighbourhood_cleansed", "property_type"]
+
+
+def test_group_index_maps_codes_back_to_keys():
+    index = group_index(add_group_codes(listings()))
+
+    assert index["listing_group"].tolist() == [0, 1, 2]
+    assert index["neighbourhood_cleansed"].tolist() == ["Barnet", "Camden", "Camden"]
+    assert index["property_type"].tolist() == ["Flat", "Flat", "House"]
+    assert index["listings"].tolist() == [1, 2, 1]
+
+
+def test_save_and_load_group_index_round_trip(tmp_path):
+    path = tmp_path / "listing_groups.csv"
+
+    save_group_index(add_group_codes(listings()), path)
+
+    loaded = load_group_index(path)
+    assert loaded["listing_group"].dtype == "Int32"
+    assert loaded["listings"].tolist() == [1, 2, 1]
+
+
+def test_save_group_index_skips_data_without_codes(tmp_path):
+    path = tmp_path / "listing_groups.csv"
+
+    save_group_index(listings(), path)
+
+    assert not path.exists()
@@ -0,0 +1,77 @@
+import pandas as pd
+
+from src.load.load import (
+    load_cleaned_listings,
+    load_listing_groups,
+    load_listing_aggregates,
+)
+from src.transform.category_vocabulary import save_vocabulary
+
+
+def test_load_cleaned_listings_restores_categories_from_csv(tmp_path):
+    # I only write the CSV so the loader has to use the saved vocabulary
+    pd.DataFrame({"id": [1, 2], "room_type": ["Hotel room", "Private room"]}) \
+        .to_csv(tmp_path / "cleaned_listings.csv", index=False)
+    save_vocabulary(
+        {"room_type": ["Private room", "Hotel room"]},
+        tmp_path / "category_vocabulary.json",
+    )
+
+    result = load_cleaned_listings(tmp_path)
+
+    assert list(result["room_type"].cat.categories) == ["Private room", "Hotel room"]
+    assert result["room_type"].cat.codes.tolist() == [1, 0]
+
+
+def test_load_cleaned_listings_prefers_parquet(tmp_path):
+    df = pd.DataFrame({"room_type": pd.Categorical(
+        ["Private room"], categories=["Private room", "Hotel room"])})
+    df.to_parquet(tmp_path / "cleaned_listings.parquet", index=False)
+
+    result = load_cleaned_listings(tmp_path)
+
+    assert list(result["room_type"].cat.categories) == ["Private room", "Hotel room"]
+
+
+def test_load_cleaned_listings_parses_host_since_from_csv(tmp_path):
+    pd.DataFrame({
+        "id": [1, 2],
+        "host_since": ["2020-05-10", None],
+        "host_cohort_quarter": ["2020Q2", None],
+    }).to_csv(tmp_path / "cleaned_listings.csv", index=False)
+
+    result = load_cleaned_listings(tmp_path)
+
+    # I expect the dates back as datetimes, not as the strings in the CSV
+    assert result["host_since"].dtype == "datetime64[ns]"
+    assert str(result["host_cohort_quarter"][0]) == "2020Q2"
+    assert pd.isna(result["host_cohort_quarter"][1])
+
+
+def test_load_listing_groups_reads_saved_index(tmp_path):
+    pd.DataFrame({
+        "listing_group": [0, 1],
+        "neighbourhood_cleansed": ["Barnet", "Camden"],
+        "property_type": ["Flat", "Flat"],
+        "listings": [3, 5],
+    }).to_csv(tmp_path / "listing_groups.csv", index=False)
+
+    result = load_listing_groups(tmp_path)
+
+    assert result["listing_group"].dtype == "Int32"
+    assert result["neighbourhood_cleansed"].tolist() == ["Barnet", "Camden"]
+
+
+def test_load_listing_aggregates_reads_saved_table(tmp_path):
+    pd.DataFrame({
+        "grouping_set": ["all", "room_type"],
+        "neighbourhood_cleansed": [None, None],
+        "room_type": [None, "Entire home"],
+        "property_type": [None, None],
+        "listings": [5, 3],
+        "price": [120.0, 150.0],
+    }).to_csv(tmp_path / "listing_aggregates.csv", index=False)
+
+    result = load_listing_aggregates(tmp_path)
+
+    assert result["listings"].tolist() == [5, 3]
@@ -0,0 +1,35 @@
+import pandas as pd
+from unittest.mock import patch
+
+from src.utils.memory_utils import frame_memory_mb, peak_rss_mb, copy_on_write
+
+
+def test_frame_memory_mb_counts_string_contents():
+    # I compare a short and a long string column so I know deep memory is used
+    short = pd.DataFrame({"a": ["x"] * 1000})
+    long = pd.DataFrame({"a": ["x" * 100] * 1000})
+
+    assert frame_memory_mb(long) > frame_memory_mb(short) > 0
+
+
+def test_peak_rss_mb_returns_positive_value():
+    assert peak_rss_mb() > 0
+
+
+@patch("src.utils.memory_utils.sys.platform", "darwin")
+@patch("src.utils.memory_utils.resource.getrusage")
+def test_peak_rss_mb_uses_bytes_on_macos(mock_getrusage):
+    # macOS reports ru_maxrss in bytes, so 1 MB should come back as 1.0
+    mock_getrusage.return_value.ru_maxrss = 1024 ** 2
+
+    assert peak_rss_mb() == 1.0
+
+
+def test_copy_on_write_only_applies_inside_the_block():
+    with copy_on_write():
+        assert pd.get_option("mode.copy_on_write") is True
+
+    with copy_on_write(enabled=False):
+        assert pd.get_option("mode.copy_on_write") is False
+
+    assert pd.get_option("mode.copy_on_write") is False
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.transform.quantile_sketch import (
+    build_sketch,
+    merge_sketches,
+    sketch_chunks,
+    sketch_quantiles,
+    group_quantile,
+)
+
+
+def prices(rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "neighbourhood_cleansed": rng.choice(["Hackney", "Camden", "Brent"], size=rows),
+        "property_type": rng.choice(["Flat", "House"], size=rows),
+        "price": rng.lognormal(4.5, 0.7, size=rows),
+    })
+    df.loc[rng.random(rows) < 0.05, "price"] = np.nan
+
+    return df
+
+
+KEYS = ["neighbourhood_cleansed", "property_type"]
+
+
+def test_sketch_quantiles_are_exact_while_groups_are_small():
+    df = pd.DataFrame({"group": [1, 1, 1, 1, 2, 2, 2, None],
+                       "price": [4.0, 1.0, 3.0, 2.0, 10.0, np.nan, 20.0, 5.0]})
+
+    result = sketch_quantiles(build_sketch(df, "price", "group"), "group")
+
+    # I expect the same medians as groupby, missing prices and keys left out
+    assert result[0.5].tolist() == [2.5, 15.0]
+
+
+@pytest.mark.parametrize("compression", [50, 200])
+def test_sketch_stays_small_and_close_in_rank(compression):
+    df = prices()
+
+    sketch = build_sketch(df, "price", KEYS, compression)
+    result = sketch_quantiles(sketch, KEYS, [0.1, 0.5, 0.9])
+
+    assert sketch.groupby(KEYS).size().max() <= compression // 2 + 2
+    for (neighbourhood, property_type), group in df.groupby(KEYS):
+        values = group["price"].dropna()
+        for q in [0.1, 0.5, 0.9]:
+            rank = (values <= result.loc[(neighbourhood, property_type), q]).mean()
+            assert abs(rank - q) < 0.01
+
+
+def test_merged_and_chunked_sketches_match_one_sketch():
+    df = prices()
+    chunks = [df.iloc[start:start + 3000] for start in range(0, len(df), 3000)]
+
+    whole = sketch_quantiles(build_sketch(df, "price", KEYS), KEYS)[0.5]
+    merged = sketch_quantiles(merge_sketches(
+        [build_sketch(chunk, "price", KEYS) for chunk in chunks], KEYS), KEYS)[0.5]
+    chunked = sketch_quantiles(sketch_chunks(iter(chunks), "price", KEYS), KEYS)[0.5]
+    exact = df.groupby(KEYS)["price"].median()
+
+    # Merging in a different order gives slightly different centroids, all close to exact
+    for result in [whole, merged, chunked]:
+        np.testing.assert_allclose(result, exact, rtol=0.02)
+
+
+def test_group_quantile_broadcasts_to_rows():
+    df = prices(2000)
+    df.loc[0, "neighbourhood_cleansed"] = None
+
+    exact = group_quantile(df, "price", KEYS)
+    approx = group_quantile(df, "price", KEYS, compression=200)
+
+    assert approx.index.equals(df.index)
+    assert np.isnan(approx[0]) and np.isnan(exact[0])
+    np.testing.assert_allclose(approx[1:], exact[1:], rtol=0.02)
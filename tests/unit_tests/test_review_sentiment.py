@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.transform.review_sentiment import (
+    load_lexicon,
+    score_comments,
+    sentiment_partials,
+    summarise_sentiment,
+    review_sentiment,
+)
+
+
+@pytest.fixture
+def lexicon(tmp_path):
+    # I use a tiny lexicon so the expected scores are easy to work out
+    path = tmp_path / "lexicon.tsv"
+    path.write_text("word\tscore\nclean\t2\ngreat\t3\nnoisy\t-1\n")
+    return load_lexicon(path)
+
+
+def batch(listing_ids, comments):
+    return pa.RecordBatch.from_pydict({
+        "listing_id": pa.array(listing_ids, type=pa.int64()),
+        "comments": pa.array(comments, type=pa.string()),
+    })
+
+
+class TestScoreComments:
+
+    def test_score_comments_averages_lexicon_words(self, lexicon):
+        comments = pd.Series(
+            ["Great and CLEAN!", "noisy street", "no words I know", None],
+            dtype="string",
+        )
+
+        scores = score_comments(comments, lexicon)
+
+        assert scores[0] == 2.5
+        assert scores[1] == -1
+        # Comments without lexicon words (or without text) are not scored
+        assert np.isnan(scores[2]) and np.isnan(scores[3])
+
+    def test_score_comments_flips_negated_words(self, lexicon):
+        # The negation only reaches the next word of the same comment
+        comments = pd.Series(["Wasn’t clean", "not", "clean"], dtype="string")
+
+        scores = score_comments(comments, lexicon)
+
+        assert scores.tolist() == [-2, pytest.approx(np.nan, nan_ok=True), 2]
+
+
+class TestSentimentAggregates:
+
+    def test_summarise_sentiment_mean_and_std(self, lexicon):
+        partials = sentiment_partials(
+            np.array([1, 1, 2]), ["great", "noisy", "clean"], lexicon
+        )
+
+        result = summarise_sentiment(partials)
+
+        assert result.loc[1, "review_sentiment_mean"] == 1
+        assert result.loc[1, "review_sentiment_std"] == round(np.sqrt(8), 3)
+        # One review gives no dispersion
+        assert pd.isna(result.loc[2, "review_sentiment_std"])
+
+    def test_review_sentiment_merges_batches(self, lexicon, tmp_path):
+        lexicon.reset_index().to_csv(tmp_path / "l.tsv", sep="\t", index=False)
+        batches = [batch([1, 2], ["great", "clean"]), batch([1], ["noisy"])]
+
+        result = review_sentiment(batches, lexicon_path=tmp_path / "l.tsv")
+
+        assert result["review_sentiment_mean"].to_dict() == {1: 1, 2: 2}
+
+    def test_review_sentiment_workers_match_single_process(self, tmp_path):
+        comments = ["great clean", "noisy", "not great", "clean", None] * 20
+        batches = [batch(list(range(i, i + 100)), comments[:100])
+                   for i in range(0, 300, 50)]
+
+        single = review_sentiment(iter(batches), workers=1)
+        pooled = review_sentiment(iter(batches), workers=2)
+
+        pd.testing.assert_frame_equal(single, pooled.loc[single.index])
+
+    def test_review_sentiment_raises_without_rows(self):
+        with pytest.raises(ValueError):
+            review_sentiment(iter([]))
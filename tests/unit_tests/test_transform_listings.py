@@ -7,11 +7,22 @@ from src.transform.transform_listings import (
     clean_amenities_column,
     add_price_competitiveness,
     impute_price_column,
+    impute_group_statistic,
+    flag_price_imputation,
     fix_review_columns,
     add_occupancy_potential,
+    add_host_tenure,
+    snapshot_date,
     impute_minimum_beds,
     impute_bathrooms,
+    estimate_bathrooms,
+    join_listing_aggregates,
+    add_calendar_occupancy,
+    place_review_sentiment,
     transform_listings,
+    transform_listings_rows,
+    transform_listings_groups,
+    split_amenities_arrow,
 )
 
 
@@ -50,6 +61,19 @@ class TestCleanAmenitiesColumn:
         assert result["amenities"].iloc[0] == []
 
 
+    def test_split_amenities_arrow_matches_apply(self):
+        # I included stray spaces, empty items and a missing value to compare both versions
+        amenities = ['["Wifi", " Kitchen"]', "[]", None, "['TV',, 'Oven ']"]
+        expected = clean_amenities_column(
+            pd.DataFrame({"amenities": amenities}))["amenities"]
+
+        result = split_amenities_arrow(
+            pd.Series(amenities, dtype="string[pyarrow]"))
+
+        assert str(result.dtype).startswith("large_list")
+        assert [list(items) for items in result] == expected.tolist()
+
+
 class TestAddPriceCompetitiveness:
 
     def test_price_competitiveness_computes_scaled_values(self):
@@ -69,6 +93,19 @@ class TestAddPriceCompetitiveness:
         vals = result["price_competitiveness (100%)"].tolist()
         assert all(isinstance(v, float) for v in vals)
 
+    def test_price_competitiveness_with_sketch_medians_matches_on_small_groups(self):
+        df = pd.DataFrame({
+            "neighbourhood_cleansed": ["A", "A", "A", "B"],
+            "property_type": ["House"] * 4,
+            "price": [100.0, 200.0, 400.0, 50.0],
+        })
+
+        expected = add_price_competitiveness(df.copy())
+        result = add_price_competitiveness(df.copy(), compression=100)
+
+        # Groups this small are not compressed, so the sketch median is the exact one
+        pd.testing.assert_frame_equal(result, expected)
+
 
 class TestImputePriceColumn:
 
@@ -86,6 +123,61 @@ class TestImputePriceColumn:
         # After imputation, both values should match the median
         assert result["price"].tolist() == [100.0, 100.0]
 
+    def test_impute_price_column_with_sketch_medians(self):
+        df = pd.DataFrame({
+            "neighbourhood_cleansed": ["A", "A", "A"],
+            "property_type": ["House", "House", "House"],
+            "price": [100.0, 300.0, None],
+            "estimated_revenue_l365d": [5000, 4000, 3000]
+        })
+
+        result = impute_price_column(df, compression=100)
+
+        assert result["price"].tolist() == [100.0, 300.0, 200.0]
+        assert result["was_price_imputed"].tolist() == [False, False, True]
+
+
+class TestImputeGroupStatistic:
+
+    def test_impute_group_statistic_fills_each_group_separately(self):
+        df = pd.DataFrame({
+            "room_type": pd.Categorical(["A", "A", "A", "B", "B", "C"]),
+            "beds": [1.0, 3.0, None, 8.0, None, None],
+        })
+
+        result = impute_group_statistic(df, "beds", "room_type")
+
+        # I expect each group to get its own median, a group with no values stays missing
+        assert result["beds"].tolist()[:5] == [1.0, 3.0, 2.0, 8.0, 8.0]
+        assert np.isnan(result["beds"].iloc[5])
+
+    def test_impute_group_statistic_supports_other_statistics_and_keys(self):
+        df = pd.DataFrame({
+            "city": ["x", "x", "x", None],
+            "size": [1, 1, 1, 1],
+            "price": [10.0, 40.0, None, 7.0],
+        })
+
+        result = impute_group_statistic(df, "price", ["city", "size"], stat="mean")
+
+        # Rows without a group key keep their value instead of being blanked
+        assert result["price"].tolist() == [10.0, 40.0, 25.0, 7.0]
+
+
+class TestFlagPriceImputation:
+
+    def test_flag_price_imputation_only_flags(self):
+        # I want the flag to be set without any price being filled in yet
+        df = pd.DataFrame({
+            "price": [100, None, 50],
+            "estimated_revenue_l365d": [5000, 4000, None]
+        })
+
+        result = flag_price_imputation(df)
+
+        assert result["was_price_imputed"].tolist() == [False, True, True]
+        assert pd.isna(result["price"][1])
+
 
 class TestFixReviewColumns:
 
@@ -124,6 +216,79 @@ class TestAddOccupancyPotential:
         assert result["occupancy_potential"].max() <= 1.0
 
 
+class TestAddHostTenure:
+    def test_add_host_tenure_counts_days_and_quarters(self):
+        df = pd.DataFrame({
+            "host_since": pd.to_datetime(["2024-01-01", "2023-11-15", None])
+        })
+
+        result = add_host_tenure(df, as_of="2024-03-01")
+
+        # I check the tenure is measured from as_of and missing dates stay missing
+        assert result["host_tenure_days"].tolist() == [60, 107, pd.NA]
+        assert [str(q) for q in result["host_cohort_quarter"]] == ["2024Q1", "2023Q4", "NaT"]
+
+    def test_add_host_tenure_skips_frames_without_host_since(self):
+        df = pd.DataFrame({"id": [1]})
+
+        assert list(add_host_tenure(df, as_of="2024-03-01").columns) == ["id"]
+
+    def test_add_host_tenure_without_as_of_uses_the_latest_host_since(self):
+        df = pd.DataFrame({"host_since": pd.to_datetime(["2024-01-01", "2024-02-01"])})
+
+        # I make sure the tenure never depends on the day the ETL runs
+        assert add_host_tenure(df)["host_tenure_days"].tolist() == [31, 0]
+
+    def test_snapshot_date_is_the_latest_scrape_date(self):
+        df = pd.DataFrame({"last_scraped": ["2024-03-01", "2024-03-02", None]})
+
+        assert snapshot_date(df) == pd.Timestamp("2024-03-02")
+        assert snapshot_date(df.drop(columns="last_scraped")) is None
+
+
+class TestCalendarAggregates:
+
+    def test_join_listing_aggregates_matches_on_id(self):
+        # I left listing 3 out of the aggregates so I can check it gets missing values
+        df = pd.DataFrame({"id": [1, 2, 3]})
+        aggregates = pd.DataFrame(
+            {"booked_nights": [100, 200]},
+            index=pd.Index([2, 1], name="listing_id"),
+        )
+
+        result = join_listing_aggregates(df, aggregates)
+
+        assert result["booked_nights"].tolist()[:2] == [200, 100]
+        assert pd.isna(result["booked_nights"].iloc[2])
+
+    def test_add_calendar_occupancy_excludes_blocked_nights(self):
+        df = pd.DataFrame({
+            "calendar_nights": [365, 365, 365],
+            "booked_nights": [100, 0, 0],
+            "blocked_nights": [165, 0, 365],
+        })
+
+        result = add_calendar_occupancy(df)
+
+        # 100 booked out of 200 bookable nights, and no bookable nights at all gives NA
+        assert result["calendar_occupancy_rate"].iloc[0] == 0.5
+        assert result["calendar_occupancy_rate"].iloc[1] == 0
+        assert pd.isna(result["calendar_occupancy_rate"].iloc[2])
+
+    def test_place_review_sentiment_next_to_rating(self):
+        df = pd.DataFrame(columns=[
+            "id", "review_scores_rating", "price", "reviews_total",
+            "review_sentiment_mean", "review_sentiment_std",
+        ])
+
+        result = place_review_sentiment(df)
+
+        assert list(result.columns) == [
+            "id", "review_scores_rating", "review_sentiment_mean",
+            "review_sentiment_std", "price", "reviews_total",
+        ]
+
+
 class TestImputeMinimumBeds:
 
     def test_impute_minimum_beds_uses_bedrooms_when_missing(self):
@@ -137,6 +302,20 @@ class TestImputeMinimumBeds:
 
         assert result["minimum_beds"].tolist() == [1, 3]
 
+    def test_impute_minimum_beds_keeps_flag_dtype_and_missing_rows(self):
+        df = pd.DataFrame({
+            "beds": pd.array([None, 2, None, 4], dtype="Int8"),
+            "bedrooms": pd.array([3, 5, None, None], dtype="Int8"),
+        }, index=[10, 11, 12, 13])
+
+        result = impute_minimum_beds(df)
+
+        # I check beds are raised to the bedroom count and rows with neither stay missing
+        assert result["minimum_beds"].tolist() == [3, 5, pd.NA, 4]
+        assert result["minimum_beds"].dtype == "Int64"
+        assert result["was_beds_imputed"].tolist() == [True, False, True, False]
+        assert result.index.tolist() == [10, 11, 12, 13]
+
 
 class TestImputeBathrooms:
 
@@ -151,6 +330,13 @@ class TestImputeBathrooms:
 
         assert result["bathrooms"].tolist() == [1, 2, 3]
 
+    def test_estimate_bathrooms_follows_piecewise_rule(self):
+        bedrooms = pd.Series([0, 2, 3, 4, 5, 6, 9, None], dtype="Int64")
+
+        # I expect 1 up to two bedrooms, 2 for three, then 2 per 3 bedrooms rounded up
+        assert estimate_bathrooms(bedrooms).tolist()[:7] == [1, 1, 2, 3, 4, 4, 6]
+        assert np.isnan(estimate_bathrooms(bedrooms)[7])
+
 
 class TestTransformListings:
 
@@ -175,7 +361,7 @@ class TestTransformListings:
             "availability_365": [200],
             "host_response_rate": [95],
             "host_response_time": ["within an hour"],
-            "host_since": ["2020-01-01"],
+            "host_since": pd.to_datetime(["2020-01-01"]),
             "amenities": ["['Wifi','Kitchen']"],
             "minimum_nights": [2],
             "maximum_nights": [365],
@@ -189,7 +375,7 @@ class TestTransformListings:
             "host_acceptance_rate": [90]
         })
 
-        result = transform_listings(df)
+        result = transform_listings(df, as_of="2025-01-01")
 
         # I expect the row to survive since it does not exceed the missing threshold
         assert len(result) == 1
@@ -200,3 +386,109 @@ class TestTransformListings:
         assert "minimum_beds" in result.columns
         assert "was_price_imputed" in result.columns
         assert "was_bathrooms_imputed" in result.columns
+        assert "host_tenure_days" in result.columns
+        assert "host_cohort_quarter" in result.columns
+
+    @patch("src.transform.transform_listings.setup_logger")
+    def test_transform_listings_keeps_borderline_row_with_missing_group_key(
+            self, mock_logger):
+        # The second row has no neighbourhood plus five more gaps, just under the
+        # 22% threshold. Its missing listing_group must not push it over.
+        df = pd.DataFrame({
+            "id": [1, 2],
+            "property_type": ["House", "House"],
+            "room_type": ["Entire home"] * 2,
+            "price": [100.0, 120.0],
+            "estimated_revenue_l365d": [50000, 40000],
+            "accommodates": [4, None],
+            "beds": [2, 1],
+            "bedrooms": [2, 1],
+            "bathrooms": [1, 1],
+            "review_scores_rating": [4.8, 4.5],
+            "number_of_reviews": [10, 3],
+            "reviews_per_month": [0.5, 0.2],
+            "availability_365": [200, 100],
+            "host_response_rate": [95, None],
+            "host_response_time": ["within an hour"] * 2,
+            "host_since": pd.to_datetime(["2020-01-01"] * 2),
+            "amenities": ["['Wifi']"] * 2,
+            "minimum_nights": [2, 1],
+            "maximum_nights": [365, None],
+            "latitude": [51.52, 51.5],
+            "longitude": [-0.1, None],
+            "neighbourhood_cleansed": ["Camden", None],
+            "host_total_listings_count": [3, None],
+            "host_is_superhost": [True, False],
+            "review_scores_cleanliness": [4.7, 4.5],
+            "review_scores_value": [4.6, 4.5],
+            "host_acceptance_rate": [90, 80]
+        })
+
+        result = transform_listings(df, as_of="2025-01-01")
+
+        assert result["id"].tolist() == [1, 2]
+        assert pd.isna(result["listing_group"][1])
+
+    @patch("src.transform.transform_listings.setup_logger")
+    def test_transform_listings_chunked_steps_match_full_run(self, mock_logger):
+        # I split the rows into two chunks to check the row steps give the same answer per chunk
+        df = pd.DataFrame({
+            "id": [1, 2, 3, 4],
+            "property_type": ["House", "House", "Flat", "House"],
+            "price": [100.0, None, 80.0, 300.0],
+            "estimated_revenue_l365d": [5000, 4000, 3000, None],
+            "beds": [None, 2, 1, None],
+            "bedrooms": [2, 2, None, 4],
+            "bathrooms": [None, 1, 1, None],
+            "review_scores_rating": [4.8, 4.5, 0.0, 4.9],
+            "review_scores_cleanliness": [4.7, 4.5, 0.0, 4.9],
+            "review_scores_value": [4.6, 4.5, 0.0, 4.9],
+            "number_of_reviews": [10, 3, 0, 8],
+            "reviews_per_month": [0.5, 0.2, 1.0, 0.7],
+            "availability_365": [200, 100, 50, 300],
+            "amenities": ["['Wifi']", "['TV']", None, "['Wifi','TV']"],
+            "minimum_nights": [2, 1, 3, 2],
+            "neighbourhood_cleansed": ["Camden"] * 4,
+        })
+
+        expected = transform_listings(df)
+
+        chunks = [transform_listings_rows(df.iloc[:2].copy()),
+                  transform_listings_rows(df.iloc[2:].copy())]
+        result = transform_listings_groups(pd.concat(chunks))
+
+        pd.testing.assert_frame_equal(result, expected)
+
+    @patch("src.transform.transform_listings.setup_logger")
+    def test_transform_listings_pyarrow_backend_matches_default(self, mock_logger):
+        # I run the same rows through both backends, the values should be identical
+        df = pd.DataFrame({
+            "id": [1, 2, 3, 4],
+            "property_type": ["House", "House", "Flat", "House"],
+            "price": [100, None, 80, 300],
+            "estimated_revenue_l365d": [5000.0, 4000.0, 3000.0, 2000.0],
+            "beds": [None, 2, 1, 3],
+            "bedrooms": [2, 2, 5, 3],
+            "bathrooms": [None, 1.0, None, 2.0],
+            "review_scores_rating": [4.8, 4.5, 0.0, 4.1],
+            "review_scores_cleanliness": [4.7, 4.5, 0.0, 4.0],
+            "review_scores_value": [4.6, 4.5, 0.0, 3.9],
+            "number_of_reviews": [10, 3, 0, 7],
+            "reviews_per_month": [0.5, 0.2, 1.0, 0.3],
+            "availability_365": [200, 100, 50, 30],
+            "amenities": ["['Wifi']", "['TV', 'Oven']", None, "[]"],
+            "minimum_nights": [2, 1, 3, 7],
+            "neighbourhood_cleansed": ["Camden"] * 4,
+        }).astype({"beds": "Int64", "bedrooms": "Int64", "price": "Int64"})
+
+        default = transform_listings(df)
+        arrow = transform_listings(
+            df.convert_dtypes(dtype_backend="pyarrow"), dtype_backend="pyarrow")
+
+        assert arrow["price"].dtype == "double[pyarrow]"
+        assert arrow["minimum_beds"].dtype == "int64[pyarrow]"
+        assert arrow["was_bathrooms_imputed"].dtype == "bool[pyarrow]"
+        arrow["amenities"] = arrow["amenities"].map(list)
+        pd.testing.assert_frame_equal(
+            arrow.astype(object).where(arrow.notna(), None),
+            default.astype(object).where(default.notna(), None))